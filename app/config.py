@@ -17,11 +17,21 @@ class Settings(BaseSettings):
     # Google Sheets
     google_sheets_id: str = ""
     google_service_account_path: str = "/etc/classapp/service-account.json"
+    sheets_max_workers: int = 8
+    sheets_outbox_flush_seconds: float = 2.0
+    sheets_replica_sync_seconds: float = 60.0
+
+    # In-memory cache budgets (LRU eviction beyond either limit)
+    cache_max_entries: int = 5000
+    cache_max_bytes: int = 64 * 1024 * 1024
 
     # Forward Email API
     forwardemail_api_url: str = "https://api.forwardemail.net/v1/emails"
     forwardemail_user: str = ""
     forwardemail_pass: str = ""
+    email_outbox_poll_seconds: float = 5.0
+    email_send_concurrency: int = 4
+    email_send_per_second: float = 2.0
 
     # Magic link settings
     magic_link_ttl_minutes: int = 15
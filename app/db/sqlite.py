@@ -1,14 +1,62 @@
-import json
+import logging
 import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
+from dataclasses import fields
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import get_args
 
 from app.config import settings
+from app.models.roster import RosterEntry
 
-if TYPE_CHECKING:
-    from app.models.roster import RosterEntry
+logger = logging.getLogger(__name__)
+
+# Connection tuning, applied once per pooled connection
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_CACHE_SIZE_KIB = 8192  # page cache per connection (8 MiB)
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024  # 64 MiB of memory-mapped reads
+SQLITE_STATEMENT_CACHE = 128  # prepared statements kept per connection
+
+
+class _ThreadConnections:
+    """
+    One thread's pooled connections, keyed by database path, and its
+    get_db() nesting depth per path.
+
+    Only the owning thread's local storage holds a strong reference, so the
+    connections are closed when that thread exits.
+    """
+
+    def __init__(self):
+        self.conns: dict[str, sqlite3.Connection] = {}
+        self.depth: dict[str, int] = {}
+        self.generation = _generation
+
+    def close(self) -> None:
+        for conn in self.conns.values():
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning("Failed to close SQLite connection: %s", e)
+        self.conns.clear()
+
+    def __del__(self):
+        self.close()
+
+
+# This thread's _ThreadConnections
+_local = threading.local()
+
+# Every live thread's connections, so shutdown can close them from any thread
+_all_connections: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+_all_connections_lock = threading.Lock()
+
+# Bumped by close_all_connections() so threads drop their closed connections
+_generation = 0
 
 # SQL schema for magic_tokens table
 SCHEMA_MAGIC_TOKENS = """
@@ -35,15 +83,178 @@ CREATE TABLE IF NOT EXISTS rate_limits (
 
 # SQL schema for student_cache table
 # Caches roster data locally so every page load doesn't hit the Sheets API.
+# One typed column per RosterEntry field (datetimes as ISO text); bulk-loaded
+# from each roster snapshot.
 SCHEMA_STUDENT_CACHE = """
 CREATE TABLE IF NOT EXISTS student_cache (
     student_id TEXT PRIMARY KEY,
-    profile_json TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    preferred_email TEXT,
+    preferred_name TEXT,
+    preferred_name_phonetic TEXT,
+    preferred_pronoun TEXT,
+    linkedin TEXT,
+    program_plan TEXT,
+    student_level TEXT,
+    cs_experience TEXT,
+    computer_system TEXT,
+    hobbies TEXT,
+    used_netlabs TEXT,
+    used_tryhackme TEXT,
+    class_goals TEXT,
+    support_request TEXT,
+    claimed_at TEXT,
+    onboarding_completed_at TEXT,
+    last_login_at TEXT,
+    presentation_order INTEGER,
+    presentation_grade INTEGER,
+    final_project TEXT,
     cached_at TEXT NOT NULL
 );
 """
 
+# student_cache columns holding RosterEntry fields, in table order
+STUDENT_CACHE_FIELDS = tuple(f.name for f in fields(RosterEntry))
+STUDENT_CACHE_DATETIME_FIELDS = tuple(
+    f.name for f in fields(RosterEntry) if datetime in get_args(f.type)
+)
+
+# SQL schema for sheets_outbox table
+# Durable write-behind queue for rows appended to append-only Sheets tabs.
+SCHEMA_SHEETS_OUTBOX = """
+CREATE TABLE IF NOT EXISTS sheets_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tab TEXT NOT NULL,
+    row_json TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    next_attempt_at TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    flushed_at TEXT,
+    failed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sheets_outbox_due ON sheets_outbox(flushed_at, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_sheets_outbox_tab ON sheets_outbox(tab);
+"""
+
+# SQL schema for outgoing email (see app/services/email_outbox.py)
+# Emails are queued inside the request and sent by a background task, with retries.
+SCHEMA_EMAIL_OUTBOX = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html TEXT,
+    text TEXT,
+    created_at TEXT NOT NULL,
+    next_attempt_at TEXT NOT NULL,
+    attempts INTEGER DEFAULT 0,
+    status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+    last_error TEXT,
+    message_id TEXT,
+    sent_at TEXT,
+    broadcast_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_email_outbox_broadcast
+    ON email_outbox(broadcast_id, to_email) WHERE broadcast_id IS NOT NULL;
+
+-- Class-wide announcements; each recipient is one email_outbox row
+CREATE TABLE IF NOT EXISTS email_broadcasts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    created_by TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    recipients INTEGER NOT NULL
+);
+"""
+
+# SQL schema for the Sheets read replica (see app/services/replica.py)
+# One row per sheet row, keyed by tab and sheet row number, plus per-tab sync state.
+SCHEMA_REPLICA = """
+CREATE TABLE IF NOT EXISTS replica_rows (
+    tab TEXT NOT NULL,
+    row_num INTEGER NOT NULL,
+    record_json TEXT NOT NULL,
+    PRIMARY KEY (tab, row_num)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS replica_tabs (
+    tab TEXT PRIMARY KEY,
+    headers_json TEXT NOT NULL,
+    last_row INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 1,
+    synced_at TEXT NOT NULL,
+    full_synced_at TEXT NOT NULL
+);
+"""
+
+# SQL schema for the materialized grade book (see app/services/gradebook.py)
+# Best score per student and quiz, per-quiz totals, the submissions already
+# counted, and how far into the replicated Quiz_Submissions the book is.
+SCHEMA_GRADES = """
+CREATE TABLE IF NOT EXISTS grades (
+    student_id TEXT NOT NULL,
+    quiz_id TEXT NOT NULL,
+    best_score REAL NOT NULL,
+    max_score REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_submitted_at TEXT NOT NULL,
+    PRIMARY KEY (student_id, quiz_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS quiz_grade_stats (
+    quiz_id TEXT PRIMARY KEY,
+    students INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    total_best_score REAL NOT NULL,
+    total_max_score REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS graded_submissions (
+    student_id TEXT NOT NULL,
+    quiz_id TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    submitted_at TEXT NOT NULL,
+    PRIMARY KEY (student_id, quiz_id, attempt, submitted_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS gradebook_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL,
+    last_row INTEGER NOT NULL
+);
+"""
+
+# SQL schema for regrade jobs (see app/services/regrade.py)
+# Progress of each job, saved as it runs so an interrupted job resumes on restart.
+SCHEMA_REGRADE = """
+CREATE TABLE IF NOT EXISTS regrade_jobs (
+    job_id TEXT PRIMARY KEY,
+    quiz_id TEXT NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    total INTEGER NOT NULL DEFAULT 0,
+    graded INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0,
+    written INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_regrade_jobs_status ON regrade_jobs(status);
+"""
+
 STUDENT_CACHE_TTL_SECONDS = 300  # refresh from Sheets every 5 minutes
+# cached_at of rows a roster load finds unchanged is bumped once this old, so
+# the stale fallback (up to 24h, while Sheets is down) keeps working for them
+# without rewriting the whole table on every load
+STUDENT_CACHE_TOUCH_SECONDS = 3600
+
+# In-process L1 in front of student_cache: {student_id: (RosterEntry, cached_at epoch)}
+# Holds ready-made entries so the per-request path skips SQLite and parsing.
+# student_cache (L2) survives restarts and refills L1 on first use.
+STUDENT_L1_MAX_ENTRIES = 1024
+_student_l1: OrderedDict[str, tuple[RosterEntry, float]] = OrderedDict()
+_student_l1_lock = threading.Lock()
 
 
 def init_db() -> None:
@@ -53,24 +264,134 @@ def init_db() -> None:
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
     with get_db() as db:
+        # Let optimize_db() return freed pages to the filesystem. Existing
+        # databases need one VACUUM for the new auto_vacuum mode to apply.
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.execute("VACUUM")
+
         db.executescript(SCHEMA_MAGIC_TOKENS)
         db.executescript(SCHEMA_RATE_LIMITS)
+        # student_cache used to hold one JSON blob per student; it is only a
+        # cache, so the old layout is dropped rather than migrated
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(student_cache)")}
+        if "profile_json" in columns:
+            db.execute("DROP TABLE student_cache")
         db.executescript(SCHEMA_STUDENT_CACHE)
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(sheets_outbox)")}
+        if columns and "failed_at" not in columns:
+            db.execute("ALTER TABLE sheets_outbox ADD COLUMN failed_at TEXT")
+        db.executescript(SCHEMA_SHEETS_OUTBOX)
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(email_outbox)")}
+        if columns and "broadcast_id" not in columns:
+            db.execute("ALTER TABLE email_outbox ADD COLUMN broadcast_id INTEGER")
+        db.executescript(SCHEMA_EMAIL_OUTBOX)
+        db.executescript(SCHEMA_REPLICA)
+        db.executescript(SCHEMA_GRADES)
+        db.executescript(SCHEMA_REGRADE)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """Open a tuned connection: WAL journal, NORMAL sync, mmap and a larger page cache."""
+    conn = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=SQLITE_STATEMENT_CACHE,
+        check_same_thread=False,  # only used by its own thread; closed from any
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _thread_connection(path: str) -> tuple[sqlite3.Connection, dict[str, int]]:
+    """Get this thread's connection for a path (opening it on first use) and its depth map."""
+    pool = getattr(_local, "pool", None)
+    if pool is None or pool.generation != _generation:
+        pool = _local.pool = _ThreadConnections()
+        with _all_connections_lock:
+            _all_connections.add(pool)
+    conn = pool.conns.get(path)
+    if conn is None:
+        conn = pool.conns[path] = _connect(path)
+    return conn, pool.depth
 
 
 @contextmanager
 def get_db():
-    """Get a database connection with automatic commit/rollback."""
-    conn = sqlite3.connect(settings.sqlite_path)
-    conn.row_factory = sqlite3.Row
+    """
+    Get a database connection with automatic commit/rollback.
+
+    Each thread reuses one open connection per database path, so callers
+    don't pay connect and schema-load costs, and the sqlite3 statement
+    cache keeps frequently used statements prepared. Nested get_db() blocks
+    on the same thread share the connection; the outermost block commits
+    or rolls back, and a nested block that raises rolls back to where it
+    started.
+    """
+    path = settings.sqlite_path
+    conn, depth = _thread_connection(path)
+    level = depth[path] = depth.get(path, 0) + 1
+    if level > 1:
+        # A nested block gets its own savepoint, so an error it raises undoes
+        # only its writes even when an outer block catches it and commits
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute(f"SAVEPOINT get_db_{level}")
     try:
         yield conn
-        conn.commit()
+        if level == 1:
+            conn.commit()
+        else:
+            conn.execute(f"RELEASE get_db_{level}")
     except Exception:
-        conn.rollback()
+        if level == 1:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO get_db_{level}")
+            conn.execute(f"RELEASE get_db_{level}")
         raise
     finally:
-        conn.close()
+        depth[path] -= 1
+
+
+def close_all_connections() -> None:
+    """Close every pooled connection (on shutdown, or when a database file goes away)."""
+    global _generation
+    with _all_connections_lock:
+        pools = list(_all_connections)
+        _all_connections.clear()
+        _generation += 1
+    for pool in pools:
+        pool.close()
+
+
+def optimize_db() -> dict:
+    """
+    Periodic SQLite upkeep: refresh planner statistics, release free pages
+    and truncate the WAL.
+
+    Returns:
+        Page counts freed by the incremental vacuum
+    """
+    with get_db() as db:
+        db.execute("PRAGMA optimize")
+        free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+        # incremental_vacuum frees one page per step; executescript() runs
+        # it to completion where execute() would stop after the first page
+        db.executescript("PRAGMA incremental_vacuum")
+        remaining = db.execute("PRAGMA freelist_count").fetchone()[0]
+    with get_db() as db:
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    if free_pages:
+        logger.info("SQLite optimize: freed %d pages", free_pages - remaining)
+    return {"freed_pages": free_pages - remaining}
 
 
 def check_db_health() -> bool:
@@ -92,41 +413,127 @@ def check_db_health() -> bool:
         return False
 
 
+def _l1_put(student: RosterEntry, cached_at: float) -> None:
+    """Store an entry in the L1 as most recently used, evicting the oldest beyond the cap."""
+    with _student_l1_lock:
+        _student_l1[student.student_id] = (student, cached_at)
+        _student_l1.move_to_end(student.student_id)
+        while len(_student_l1) > STUDENT_L1_MAX_ENTRIES:
+            _student_l1.popitem(last=False)
+
+
+def _student_from_row(row: sqlite3.Row) -> RosterEntry:
+    """Build a RosterEntry straight from typed student_cache columns."""
+    values = {name: row[name] for name in STUDENT_CACHE_FIELDS}
+    for name in STUDENT_CACHE_DATETIME_FIELDS:
+        if values[name]:
+            values[name] = datetime.fromisoformat(values[name])
+    return RosterEntry(**values)
+
+
+def _student_params(student: RosterEntry, cached_at: str) -> tuple:
+    """Get student_cache column values for a RosterEntry (datetimes as ISO text)."""
+    values = []
+    for name in STUDENT_CACHE_FIELDS:
+        value = getattr(student, name)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return (*values, cached_at)
+
+
+_UPSERT_STUDENT = """
+INSERT INTO student_cache ({columns}, cached_at)
+VALUES ({placeholders})
+ON CONFLICT(student_id) DO UPDATE SET {updates}
+WHERE ({fields}) IS NOT ({excluded})
+""".format(
+    columns=", ".join(STUDENT_CACHE_FIELDS),
+    placeholders=", ".join("?" * (len(STUDENT_CACHE_FIELDS) + 1)),
+    updates=", ".join(
+        f"{name} = excluded.{name}" for name in (*STUDENT_CACHE_FIELDS[1:], "cached_at")
+    ),
+    fields=", ".join(STUDENT_CACHE_FIELDS[1:]),
+    excluded=", ".join(f"excluded.{name}" for name in STUDENT_CACHE_FIELDS[1:]),
+)
+
+
 def get_cached_student(
     student_id: str, max_age_seconds: int = STUDENT_CACHE_TTL_SECONDS
-) -> "RosterEntry | None":
+) -> RosterEntry | None:
     """Return cached RosterEntry if within max_age_seconds, else None."""
-    from app.models.roster import RosterEntry  # noqa: PLC0415
+    # L1: ready-made entry, no SQLite or parsing
+    with _student_l1_lock:
+        hit = _student_l1.get(student_id)
+    if hit and time.time() - hit[1] <= max_age_seconds:
+        return hit[0]
 
+    # L2: SQLite
     with get_db() as db:
         row = db.execute(
-            "SELECT profile_json, cached_at FROM student_cache WHERE student_id = ?",
+            "SELECT * FROM student_cache WHERE student_id = ?",
             (student_id,),
         ).fetchone()
     if not row:
         return None
     cached_at = datetime.fromisoformat(row["cached_at"])
-    if datetime.utcnow() - cached_at > timedelta(seconds=max_age_seconds):
+    age = (datetime.utcnow() - cached_at).total_seconds()
+    if age > max_age_seconds:
         return None
-    data = json.loads(row["profile_json"])
-    return RosterEntry.from_row(data)
+    student = _student_from_row(row)
+    # Keep the L2 timestamp so the L1 copy expires when the row would
+    _l1_put(student, time.time() - age)
+    return student
+
 
+def set_cached_student(student: RosterEntry) -> None:
+    """Upsert a RosterEntry into the local SQLite cache (and the in-process L1)."""
+    set_cached_students([student])
 
-def set_cached_student(student: "RosterEntry") -> None:
-    """Upsert a RosterEntry into the local SQLite cache."""
-    import dataclasses
 
-    data = dataclasses.asdict(student)
-    # Convert datetime objects to ISO strings for JSON serialization
-    for key, val in data.items():
-        if isinstance(val, datetime):
-            data[key] = val.isoformat()
+def set_cached_students(students: list[RosterEntry]) -> int:
+    """
+    Bulk-upsert RosterEntries into the local SQLite cache in one transaction.
+
+    Called with the whole roster on every roster refresh, so student_cache
+    is warm for everyone rather than filled one cache miss at a time. Only
+    new or changed rows are written; unchanged rows get a fresh cached_at
+    once it is STUDENT_CACHE_TOUCH_SECONDS old. Every student is refreshed
+    in the L1.
+
+    Returns the number of new or changed rows written.
+    """
+    now = datetime.utcnow()
+    stored_at = now.isoformat()
+    touch_before = (now - timedelta(seconds=STUDENT_CACHE_TOUCH_SECONDS)).isoformat()
     with get_db() as db:
-        db.execute(
-            """INSERT INTO student_cache (student_id, profile_json, cached_at)
-               VALUES (?, ?, ?)
-               ON CONFLICT(student_id) DO UPDATE SET
-                   profile_json = excluded.profile_json,
-                   cached_at = excluded.cached_at""",
-            (student.student_id, json.dumps(data), datetime.utcnow().isoformat()),
+        cursor = db.executemany(_UPSERT_STUDENT, [_student_params(s, stored_at) for s in students])
+        written = cursor.rowcount
+        db.executemany(
+            "UPDATE student_cache SET cached_at = ? WHERE student_id = ? AND cached_at < ?",
+            [(stored_at, s.student_id, touch_before) for s in students],
         )
+    cached_at = time.time()
+    for student in students:
+        _l1_put(student, cached_at)
+    return written
+
+
+def invalidate_cached_student(*student_ids: str) -> None:
+    """
+    Mark students' cached entries stale after their roster row changes.
+
+    The L1 copy is dropped and the L2 row backdated past the TTL, so the
+    next get_current_student reloads them from Sheets. The row is kept as
+    the stale fallback for when Sheets is unavailable.
+    """
+    with _student_l1_lock:
+        for student_id in student_ids:
+            _student_l1.pop(student_id, None)
+    expired_at = (datetime.utcnow() - timedelta(seconds=STUDENT_CACHE_TTL_SECONDS + 1)).isoformat()
+    try:
+        with get_db() as db:
+            db.executemany(
+                "UPDATE student_cache SET cached_at = MIN(cached_at, ?) WHERE student_id = ?",
+                [(expired_at, student_id) for student_id in student_ids],
+            )
+    except sqlite3.Error as e:
+        logger.warning("Failed to invalidate student_cache for %s: %s", student_ids, e)
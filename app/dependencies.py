@@ -4,13 +4,19 @@ import logging
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Request, status
 from fastapi.templating import Jinja2Templates
 
 from app.db.sqlite import get_cached_student, set_cached_student
 from app.models.roster import RosterEntry
-from app.services.sessions import COOKIE_NAME, SessionData, verify_session_token
-from app.services.sheets import SheetsUnavailableError, get_sheets_client
+from app.services.sessions import (
+    COOKIE_NAME,
+    SessionData,
+    create_session_token,
+    role_for,
+    verify_session_token,
+)
+from app.services.sheets import AsyncSheetsClient, SheetsUnavailableError, get_sheets_client
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +25,69 @@ TEMPLATES_DIR = Path(__file__).parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
+def _refresh_claims(request: Request, session: SessionData) -> SessionData:
+    """
+    Re-issue a session whose claims predate a roster or config change.
+
+    The new token is set as the session cookie on the way out (see main.py).
+    If Config or the student's roster row can't be read, the old claims are
+    kept for this request rather than re-issued from missing data.
+    """
+    try:
+        role = role_for(session.email, get_sheets_client().get_admin_emails())
+        student = get_cached_student(session.student_id)
+        if student is None:
+            student = get_sheets_client().get_roster_by_id(session.student_id)
+    except SheetsUnavailableError:
+        logger.warning("Sheets unavailable, keeping session claims for %s", session.student_id)
+        return session
+    if student is None:
+        logger.warning("No roster row for %s, keeping session claims", session.student_id)
+        return session
+
+    token = create_session_token(
+        session.email,
+        session.student_id,
+        role=role,
+        onboarded=bool(student and student.is_onboarded),
+    )
+    request.state.refreshed_session = token
+    return verify_session_token(token)
+
+
+async def session_role(sheets: AsyncSheetsClient, email: str) -> str | None:
+    """
+    Get the role for a new session.
+
+    None if Config can't be read: the session then carries no role claim
+    and gets one on its first request, instead of an admin being issued a
+    student session.
+    """
+    try:
+        return role_for(email, await sheets.get_admin_emails())
+    except SheetsUnavailableError:
+        return None
+
+
 def get_current_session(
+    request: Request,
     session: Annotated[str | None, Cookie(alias=COOKIE_NAME)] = None,
 ) -> SessionData | None:
     """
     Get current session from cookie.
 
+    Verified tokens are cached in memory; the role and onboarding claims
+    are refreshed only after the roster or config changed.
+
     Returns None if no valid session.
     """
     if not session:
         return None
 
-    return verify_session_token(session)
+    data = verify_session_token(session)
+    if data is not None and not data.claims_current:
+        data = _refresh_claims(request, data)
+    return data
 
 
 def require_session(
@@ -116,10 +173,7 @@ def require_admin(
 
     Raises 403 if user is not the admin.
     """
-    sheets = get_sheets_client()
-    admin_email = sheets.get_config("admin_email")
-
-    if not admin_email or session.email.lower() != admin_email.lower():
+    if not session.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
@@ -137,13 +191,4 @@ AdminSession = Annotated[SessionData, Depends(require_admin)]
 
 def is_admin(session: SessionData | None) -> bool:
     """Check if session belongs to admin user."""
-    if not session:
-        return False
-
-    sheets = get_sheets_client()
-    admin_email = sheets.get_config("admin_email")
-
-    if not admin_email:
-        return False
-
-    return session.email.lower() == admin_email.lower()
+    return bool(session and session.is_admin)
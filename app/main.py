@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -5,9 +6,12 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 
 from app.config import settings
-from app.db.sqlite import init_db
+from app.db.sqlite import close_all_connections, init_db
 from app.routers import admin, auth, book_reading, claim, health, onboarding, pages, quizzes, tools
-from app.services.sessions import COOKIE_NAME
+from app.services import email, email_outbox, maintenance, outbox, regrade, replica
+from app.services.quiz_parser import registry as quiz_registry
+from app.services.sessions import COOKIE_NAME, get_cookie_settings
+from app.services.sheets import get_sheets_client, shutdown_sheets_executor
 
 # Configure logging
 logging.basicConfig(
@@ -24,9 +28,53 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     init_db()
     logger.info("Database initialized")
+
+    # Parse every quiz once; later loads are lookups, reloaded only on file change
+    quiz_registry.load_all()
+
+    # Bulk-load the student cache from the roster without delaying startup
+    warmup = asyncio.create_task(asyncio.to_thread(get_sheets_client().warm_student_cache))
+
+    # Background flush of queued Sheets appends, and sync of the local read replica
+    stop = asyncio.Event()
+    flusher = asyncio.create_task(
+        outbox.run_flusher(get_sheets_client(), stop, settings.sheets_outbox_flush_seconds)
+    )
+    syncer = asyncio.create_task(
+        replica.run_syncer(get_sheets_client(), stop, settings.sheets_replica_sync_seconds)
+    )
+    # Token/rate-limit cleanup, cache sweeps and SQLite upkeep
+    scheduler = asyncio.create_task(maintenance.run_scheduler(stop))
+    # Outgoing email over one pooled HTTP client
+    email.start_http_client()
+    sender = asyncio.create_task(
+        email_outbox.run_sender(get_sheets_client(), stop, settings.email_outbox_poll_seconds)
+    )
+    # Regrades interrupted by the last shutdown
+    regrade.resume_jobs(get_sheets_client())
+
     yield
+
     # Shutdown
     logger.info("Shutting down...")
+    stop.set()
+    await regrade.shutdown()
+    await warmup
+    await flusher
+    await syncer
+    await scheduler
+    await sender
+    await email.close_http_client()
+    await asyncio.to_thread(_drain_outbox)
+    shutdown_sheets_executor()
+    close_all_connections()
+
+
+def _drain_outbox() -> None:
+    """Flush every queued Sheets append before exit, ignoring retry backoff."""
+    client = get_sheets_client()
+    while outbox.flush(client, force=True):
+        pass
 
 
 app = FastAPI(
@@ -49,6 +97,20 @@ app.include_router(book_reading.router)
 app.include_router(admin.router)
 
 
+@app.middleware("http")
+async def refresh_session_cookie(request: Request, call_next):
+    """Set the session cookie when a request re-issued the session's claims."""
+    response = await call_next(request)
+    token = getattr(request.state, "refreshed_session", None)
+    # Not when the response itself sets or clears the cookie (login, logout, 401)
+    sets_cookie = any(
+        c.startswith(f"{COOKIE_NAME}=") for c in response.headers.getlist("set-cookie")
+    )
+    if token and response.status_code < 400 and not sets_cookie:
+        response.set_cookie(value=token, **get_cookie_settings())
+    return response
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with appropriate responses."""
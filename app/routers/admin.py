@@ -5,13 +5,17 @@ import io
 import json
 import logging
 
-from fastapi import APIRouter, Form, Request
+from fastapi import APIRouter, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 
 from app.dependencies import AdminSession, templates
-from app.services.analytics import compute_quiz_analytics, get_best_submissions
+from app.services import broadcast, outbox, regrade
+from app.services.analytics import compute_quiz_analytics
+from app.services.cache import get_cache_stats
+from app.services.email_outbox import get_outbox_stats
+from app.services.maintenance import get_maintenance_stats
 from app.services.quiz_parser import get_parsed_quiz
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -22,41 +26,27 @@ async def analytics_overview(request: Request, session: AdminSession):
     """
     Admin overview page showing all quizzes with completion rates.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
-    quizzes = sheets.get_quizzes()
-    total_students = sheets.get_roster_count()
+    quizzes = await sheets.get_quizzes()
+    total_students = await sheets.get_roster_count()
+
+    # Per-quiz totals maintained by the grade book
+    grade_stats = await sheets.get_quiz_grade_stats()
 
     quiz_summaries = []
     for quiz_meta in quizzes:
-        submissions = sheets.get_all_quiz_submissions(quiz_meta.quiz_id)
-
-        # Count unique students who submitted
-        unique_students = len(set(sub.student_id for sub in submissions))
-
-        # Calculate average score from best submissions
-        if submissions:
-            from app.services.analytics import get_best_submissions
-
-            best_subs = get_best_submissions(submissions)
-            if best_subs:
-                total_score = sum(s.score for s in best_subs.values())
-                total_max = sum(s.max_score for s in best_subs.values())
-                avg_score = (total_score / total_max * 100) if total_max > 0 else 0.0
-            else:
-                avg_score = 0.0
-        else:
-            avg_score = 0.0
-
-        completion_rate = (unique_students / total_students * 100) if total_students > 0 else 0.0
+        stats = grade_stats.get(quiz_meta.quiz_id)
+        completed_students = stats.students if stats else 0
+        completion_rate = (completed_students / total_students * 100) if total_students > 0 else 0.0
 
         quiz_summaries.append(
             {
                 "quiz": quiz_meta,
-                "completed_students": unique_students,
+                "completed_students": completed_students,
                 "total_students": total_students,
                 "completion_rate": completion_rate,
-                "avg_score": avg_score,
+                "avg_score": stats.avg_score if stats else 0.0,
             }
         )
 
@@ -76,10 +66,10 @@ async def quiz_analytics(request: Request, quiz_id: str, session: AdminSession):
     """
     Detailed per-question analytics for a specific quiz.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Get quiz metadata
-    quiz_meta = sheets.get_quiz_by_id(quiz_id)
+    quiz_meta = await sheets.get_quiz_by_id(quiz_id)
     if not quiz_meta:
         return templates.TemplateResponse(
             "error.html",
@@ -104,8 +94,8 @@ async def quiz_analytics(request: Request, quiz_id: str, session: AdminSession):
         )
 
     # Get all submissions and roster count
-    submissions = sheets.get_all_quiz_submissions(quiz_id)
-    total_students = sheets.get_roster_count()
+    submissions = await sheets.get_all_quiz_submissions(quiz_id)
+    total_students = await sheets.get_roster_count()
 
     # Compute analytics
     analytics = compute_quiz_analytics(quiz, submissions, total_students)
@@ -122,7 +112,7 @@ async def quiz_analytics(request: Request, quiz_id: str, session: AdminSession):
     )
 
 
-def _build_grade_table(sheets) -> tuple[list, list, dict]:
+async def _build_grade_table(sheets) -> tuple[list, list, dict]:
     """
     Build grade table data.
 
@@ -130,22 +120,17 @@ def _build_grade_table(sheets) -> tuple[list, list, dict]:
         Tuple of (quizzes, roster, grades_dict)
         grades_dict maps student_id -> quiz_id -> best_score
     """
-    quizzes = sheets.get_quizzes()
-    roster = sheets.get_all_roster()
+    quizzes = await sheets.get_quizzes()
+    roster = await sheets.get_all_roster()
 
-    # Build grades: student_id -> quiz_id -> best_score
-    grades: dict[str, dict[str, float]] = {
-        student.student_id: {quiz.quiz_id: 0 for quiz in quizzes} for student in roster
-    }
-
-    # Fill in best scores
-    for quiz in quizzes:
-        submissions = sheets.get_all_quiz_submissions(quiz.quiz_id)
-        best_subs = get_best_submissions(submissions)
+    # Best scores for every quiz, read from the grade book
+    best_scores = await sheets.get_best_scores()
 
-        for student_id, submission in best_subs.items():
-            if student_id in grades:
-                grades[student_id][quiz.quiz_id] = submission.score
+    # Build grades: student_id -> quiz_id -> best_score (0 when not submitted)
+    grades: dict[str, dict[str, float]] = {}
+    for student in roster:
+        scores = best_scores.get(student.student_id, {})
+        grades[student.student_id] = {quiz.quiz_id: scores.get(quiz.quiz_id, 0) for quiz in quizzes}
 
     return quizzes, roster, grades
 
@@ -155,8 +140,8 @@ async def grading_page(request: Request, session: AdminSession):
     """
     Admin grading page showing all students' best scores per quiz.
     """
-    sheets = get_sheets_client()
-    quizzes, roster, grades = _build_grade_table(sheets)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    quizzes, roster, grades = await _build_grade_table(sheets)
 
     return templates.TemplateResponse(
         "admin_grading.html",
@@ -175,8 +160,8 @@ async def grading_csv(session: AdminSession):
     """
     Download grades as CSV.
     """
-    sheets = get_sheets_client()
-    quizzes, roster, grades = _build_grade_table(sheets)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    quizzes, roster, grades = await _build_grade_table(sheets)
 
     # Build CSV
     output = io.StringIO()
@@ -217,15 +202,15 @@ async def grading_csv(session: AdminSession):
 PRESENTATION_QUIZ_ID = "q006"
 
 
-def _build_presentation_rows(sheets) -> list[dict]:
+async def _build_presentation_rows(sheets) -> list[dict]:
     """
     Join quiz-006 submissions with roster to produce one row per student.
 
     Returns list of dicts with keys:
         student_id, name, email, title, timing, order, grade
     """
-    roster = sheets.get_all_roster()
-    submissions = sheets.get_all_quiz_submissions(PRESENTATION_QUIZ_ID)
+    roster = await sheets.get_all_roster()
+    submissions = await sheets.get_all_quiz_submissions(PRESENTATION_QUIZ_ID)
 
     # Best (most recent) submission per student
     by_student: dict[str, dict] = {}
@@ -263,8 +248,8 @@ def _build_presentation_rows(sheets) -> list[dict]:
 @router.get("/presentations", response_class=HTMLResponse)
 async def presentations_page(request: Request, session: AdminSession):
     """Admin presentations page — order and grade student presentations."""
-    sheets = get_sheets_client()
-    rows = _build_presentation_rows(sheets)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    rows = await _build_presentation_rows(sheets)
 
     return templates.TemplateResponse(
         "admin_presentations.html",
@@ -279,14 +264,18 @@ async def presentations_page(request: Request, session: AdminSession):
 @router.post("/presentations/reorder")
 async def presentations_reorder(request: Request, session: AdminSession):
     """Save presentation order numbers from form submission."""
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
     form = await request.form()
 
+    updates = {}
     for key, value in form.items():
         if key.startswith("order_"):
             student_id = key[len("order_") :]
             order_val = str(value).strip()
-            sheets.update_roster(student_id, presentation_order=order_val if order_val else "")
+            updates[student_id] = {"presentation_order": order_val if order_val else ""}
+
+    if updates:
+        await sheets.update_roster_many(updates)
 
     return RedirectResponse("/admin/presentations", status_code=303)
 
@@ -298,17 +287,17 @@ async def presentations_grade(
     grade: int = Form(...),
 ):
     """Save presentation grade (1–50) for a student."""
-    sheets = get_sheets_client()
-    sheets.update_roster(student_id, presentation_grade=str(grade))
+    sheets = AsyncSheetsClient(get_sheets_client())
+    await sheets.update_roster(student_id, presentation_grade=str(grade))
     return RedirectResponse("/admin/presentations", status_code=303)
 
 
 @router.get("/book-reading", response_class=HTMLResponse)
 async def admin_book_reading(request: Request, session: AdminSession):
     """Admin page showing students with no book reading assignment."""
-    sheets = get_sheets_client()
-    chapters = sheets.get_book_readings()
-    roster = sheets.get_all_roster()
+    sheets = AsyncSheetsClient(get_sheets_client())
+    chapters = await sheets.get_book_readings()
+    roster = await sheets.get_all_roster()
 
     # Collect all assigned display names (case-insensitive)
     assigned: set[str] = set()
@@ -344,8 +333,8 @@ async def admin_book_reading(request: Request, session: AdminSession):
 @router.get("/presentations/csv")
 async def presentations_csv(session: AdminSession):
     """Download presentations as CSV."""
-    sheets = get_sheets_client()
-    rows = _build_presentation_rows(sheets)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    rows = await _build_presentation_rows(sheets)
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -368,3 +357,73 @@ async def presentations_csv(session: AdminSession):
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=presentations.csv"},
     )
+
+
+@router.get("/stats")
+async def admin_stats(session: AdminSession):
+    """Background maintenance run timings, cache and outbox statistics, as JSON."""
+    return {
+        "maintenance": get_maintenance_stats(),
+        "cache": get_cache_stats(),
+        "email_outbox": get_outbox_stats(),
+        "sheets_outbox": outbox.get_outbox_stats(),
+    }
+
+
+@router.post("/broadcasts")
+async def create_broadcast(
+    session: AdminSession,
+    subject: str = Form(...),
+    text: str = Form(...),
+    html: str = Form(""),
+):
+    """
+    Email every claimed student a message rendered from templates.
+
+    Templates may use $name, $full_name, $email and $student_id. Messages
+    are queued and sent in the background; poll the progress endpoint.
+    """
+    sheets = AsyncSheetsClient(get_sheets_client())
+    students = await sheets.get_all_roster()
+    broadcast_id, recipients = broadcast.create_broadcast(
+        subject, text, students, created_by=session.email, html_body=html or None
+    )
+    return {"broadcast_id": broadcast_id, "recipients": recipients}
+
+
+@router.get("/broadcasts/{broadcast_id}")
+async def broadcast_progress(broadcast_id: int, session: AdminSession):
+    """Per-recipient delivery progress of a broadcast, as JSON."""
+    progress = broadcast.get_progress(broadcast_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return progress
+
+
+@router.post("/quiz/{quiz_id}/regrade")
+async def start_regrade(quiz_id: str, session: AdminSession):
+    """
+    Re-grade every stored submission of a quiz against its current answer key.
+
+    Runs in the background; poll the regrade progress endpoint.
+    """
+    sheets = AsyncSheetsClient(get_sheets_client())
+    quiz_meta = await sheets.get_quiz_by_id(quiz_id)
+    if not quiz_meta:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    quiz = get_parsed_quiz(quiz_meta.content_path, quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=500, detail="Quiz content could not be loaded")
+
+    job = regrade.start_regrade(get_sheets_client(), quiz)
+    logger.info("Regrade of %s started by %s (job %s)", quiz_id, session.email, job.job_id)
+    return job.to_dict()
+
+
+@router.get("/regrade/{job_id}")
+async def regrade_progress(job_id: str, session: AdminSession):
+    """Progress of a regrade job, as JSON."""
+    job = regrade.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Regrade job not found")
+    return job.to_dict()
@@ -7,15 +7,15 @@ from fastapi import APIRouter, Form, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.config import settings
-from app.dependencies import templates
-from app.services.email import send_magic_link_email
+from app.dependencies import session_role, templates
+from app.services.email import queue_magic_link_email
 from app.services.sessions import (
     COOKIE_NAME,
     create_session_token,
     get_cookie_settings,
     verify_session_token,
 )
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 from app.services.tokens import check_rate_limit, create_magic_token, validate_magic_token
 
 logger = logging.getLogger(__name__)
@@ -30,7 +30,10 @@ async def signin_page(request: Request):
     if session_token:
         session = verify_session_token(session_token)
         if session:
-            return RedirectResponse(url="/home", status_code=302)
+            redirect_url = (
+                "/onboarding" if session.claims_current and not session.onboarded else "/home"
+            )
+            return RedirectResponse(url=redirect_url, status_code=302)
 
     return templates.TemplateResponse(
         "signin.html",
@@ -46,14 +49,14 @@ async def request_magic_link(request: Request, email: str = Form(...)):
     Returns same response for known/unknown emails to prevent enumeration.
     """
     email = email.strip().lower()
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Rate limit check
     allowed, count = check_rate_limit(email)
     if not allowed:
         logger.warning("Rate limited magic link request for %s (count: %d)", email, count)
         # Log to sheets
-        sheets.append_magic_link_request(
+        await sheets.append_magic_link_request(
             {
                 "requested_at": datetime.utcnow().isoformat(),
                 "email": email,
@@ -74,23 +77,9 @@ async def request_magic_link(request: Request, email: str = Form(...)):
     token = create_magic_token(email)
     magic_link = f"{settings.base_url}/auth/verify?token={token}"
 
-    # Send email
-    result = await send_magic_link_email(email, magic_link)
-
-    # Log to sheets
-    sheets.append_magic_link_request(
-        {
-            "requested_at": datetime.utcnow().isoformat(),
-            "email": email,
-            "result": "sent" if result.success else "error",
-            "note": result.error or "",
-        }
-    )
-
-    if not result.success:
-        logger.error("Failed to send magic link to %s: %s", email, result.error)
-        # Don't reveal email sending errors to user
-        # Fall through to success message
+    # Queue the email; a background task sends it and logs the outcome to
+    # sheets, so a slow mail provider never delays this response
+    queue_magic_link_email(email, magic_link)
 
     # Always show success (prevents email enumeration)
     logger.info("Magic link requested for %s", email)
@@ -122,17 +111,22 @@ async def verify_magic_link(request: Request, token: str, response: Response):
             },
         )
 
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Look up student by email
-    student = sheets.get_student_by_email(email)
+    student = await sheets.get_student_by_email(email)
 
     if student and student.is_claimed:
-        # Existing claimed student - create session
-        session_token = create_session_token(email, student.student_id)
-
         # Update last_login_at
-        sheets.update_roster(student.student_id, last_login_at=datetime.utcnow().isoformat())
+        await sheets.update_roster(student.student_id, last_login_at=datetime.utcnow().isoformat())
+
+        # Existing claimed student - create session
+        session_token = create_session_token(
+            email,
+            student.student_id,
+            role=await session_role(sheets, email),
+            onboarded=student.is_onboarded,
+        )
 
         # Check if onboarding is needed
         redirect_url = "/home" if student.is_onboarded else "/onboarding"
@@ -6,14 +6,14 @@ from fastapi import APIRouter, Form, Request
 from fastapi.responses import HTMLResponse
 
 from app.dependencies import CurrentSession, OnboardedStudent, is_admin, templates
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def _page_context(request, student, session, sheets, error=None, success=None):
-    chapters = sheets.get_book_readings()
+async def _page_context(request, student, session, sheets, error=None, success=None):
+    chapters = await sheets.get_book_readings()
 
     my_name = student.display_name
     my_name_lower = my_name.lower()
@@ -39,8 +39,8 @@ def _page_context(request, student, session, sheets, error=None, success=None):
 
 @router.get("/book-reading", response_class=HTMLResponse)
 async def book_reading_page(request: Request, student: OnboardedStudent, session: CurrentSession):
-    sheets = get_sheets_client()
-    ctx = _page_context(request, student, session, sheets)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    ctx = await _page_context(request, student, session, sheets)
     return templates.TemplateResponse("book_reading.html", ctx)
 
 
@@ -52,20 +52,20 @@ async def book_reading_signup(
     chapter: str = Form(...),
     role: str = Form(...),
 ):
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     if role not in ("primary", "secondary"):
-        ctx = _page_context(request, student, session, sheets, error="Invalid role.")
+        ctx = await _page_context(request, student, session, sheets, error="Invalid role.")
         return templates.TemplateResponse("book_reading.html", ctx)
 
-    chapters = sheets.get_book_readings()
+    chapters = await sheets.get_book_readings()
     my_name = student.display_name
     my_name_lower = my_name.lower()
 
     # Enforce one-role-per-type constraint
     for ch in chapters:
         if role == "primary" and ch.primary_reader.lower() == my_name_lower:
-            ctx = _page_context(
+            ctx = await _page_context(
                 request,
                 student,
                 session,
@@ -74,7 +74,7 @@ async def book_reading_signup(
             )
             return templates.TemplateResponse("book_reading.html", ctx)
         if role == "secondary" and ch.secondary_reader.lower() == my_name_lower:
-            ctx = _page_context(
+            ctx = await _page_context(
                 request,
                 student,
                 session,
@@ -83,11 +83,11 @@ async def book_reading_signup(
             )
             return templates.TemplateResponse("book_reading.html", ctx)
 
-    ok, err = sheets.assign_book_reader(chapter, my_name, role)
+    ok, err = await sheets.assign_book_reader(chapter, my_name, role)
 
     if ok:
         logger.info("Student %s signed up as %s for '%s'", student.student_id, role, chapter)
-        ctx = _page_context(
+        ctx = await _page_context(
             request,
             student,
             session,
@@ -95,6 +95,6 @@ async def book_reading_signup(
             success=f'You are now the {role} reader for "{chapter}".',
         )
     else:
-        ctx = _page_context(request, student, session, sheets, error=err)
+        ctx = await _page_context(request, student, session, sheets, error=err)
 
     return templates.TemplateResponse("book_reading.html", ctx)
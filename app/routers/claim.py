@@ -5,9 +5,9 @@ import logging
 from fastapi import APIRouter, Form, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 
-from app.dependencies import templates
+from app.dependencies import session_role, templates
 from app.services.sessions import create_session_token, get_cookie_settings
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 from app.services.tokens import validate_magic_token
 
 logger = logging.getLogger(__name__)
@@ -61,10 +61,10 @@ async def claim_submit(
     email = email.strip().lower()
     student_id = student_id.strip()
 
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Look up student by ID
-    student = sheets.get_roster_by_id(student_id)
+    student = await sheets.get_roster_by_id(student_id)
 
     if not student:
         logger.warning("Claim attempt for non-existent student: %s", student_id)
@@ -90,7 +90,7 @@ async def claim_submit(
         )
 
     # Claim the account
-    success = sheets.claim_student(student_id, email)
+    success = await sheets.claim_student(student_id, email)
 
     if not success:
         logger.error("Failed to claim student %s", student_id)
@@ -104,7 +104,7 @@ async def claim_submit(
         )
 
     # Create session
-    session_token = create_session_token(email, student_id)
+    session_token = create_session_token(email, student_id, role=await session_role(sheets, email))
 
     # Redirect to onboarding
     response = RedirectResponse(url="/onboarding", status_code=302)
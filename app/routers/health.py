@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse
 
 from app.config import settings
 from app.db.sqlite import check_db_health
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 router = APIRouter(tags=["health"])
 
@@ -17,11 +17,11 @@ async def health():
         - 200 OK if all checks pass
         - 503 Service Unavailable if any check fails
     """
-    sheets_client = get_sheets_client()
+    sheets_client = AsyncSheetsClient(get_sheets_client())
 
     checks = {
         "sqlite": check_db_health(),
-        "sheets": sheets_client.check_connection(),
+        "sheets": await sheets_client.check_connection(),
     }
 
     all_healthy = all(checks.values())
@@ -7,7 +7,7 @@ from fastapi import APIRouter, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.dependencies import RequiredSession, templates
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -120,8 +120,8 @@ async def onboarding_form(request: Request, session: RequiredSession):
     Requires authentication. Redirects to /home if already onboarded.
     Only shows fields that are empty in the Roster.
     """
-    sheets = get_sheets_client()
-    student = sheets.get_roster_by_id(session.student_id)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    student = await sheets.get_roster_by_id(session.student_id)
 
     if not student:
         logger.warning("Student not found for session: %s", session.student_id)
@@ -166,8 +166,8 @@ async def onboarding_submit(
 
     All fields are optional. Updates roster and logs responses to Sheets.
     """
-    sheets = get_sheets_client()
-    student = sheets.get_roster_by_id(session.student_id)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    student = await sheets.get_roster_by_id(session.student_id)
 
     if not student:
         logger.warning("Student not found for session: %s", session.student_id)
@@ -198,7 +198,7 @@ async def onboarding_submit(
 
     # Update roster with non-empty fields and mark onboarding complete
     update_fields = {**form_data, "onboarding_completed_at": now}
-    success = sheets.update_roster(session.student_id, **update_fields)
+    success = await sheets.update_roster(session.student_id, **update_fields)
 
     if not success:
         logger.error("Failed to update roster %s during onboarding", session.student_id)
@@ -214,23 +214,27 @@ async def onboarding_submit(
         )
 
     # Log each field to Onboarding_Responses
+    responses = []
     for field in ONBOARDING_FIELDS:
         key = field["key"]
         value = form_data.get(key, "")
 
         if value:  # Only log non-empty responses
-            response_data = {
-                "timestamp": now,
-                "student_id": session.student_id,
-                "email": session.email,
-                "form_version": FORM_VERSION,
-                "question_key": key,
-                "question_label": field["label"],
-                "answer": value,
-                "answer_type": field["type"],
-                "source": "web",
-            }
-            sheets.append_onboarding_response(response_data)
+            responses.append(
+                {
+                    "timestamp": now,
+                    "student_id": session.student_id,
+                    "email": session.email,
+                    "form_version": FORM_VERSION,
+                    "question_key": key,
+                    "question_label": field["label"],
+                    "answer": value,
+                    "answer_type": field["type"],
+                    "source": "web",
+                }
+            )
+    if responses:
+        await sheets.append_onboarding_responses(responses)
 
     logger.info("Onboarding completed for student %s", session.student_id)
     return RedirectResponse(url="/home", status_code=302)
@@ -8,7 +8,7 @@ from fastapi import APIRouter, Form, Request
 from fastapi.responses import HTMLResponse
 
 from app.dependencies import CurrentSession, OnboardedStudent, is_admin, templates
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 # Project root for resolving content files
 _BASE_PATH = Path(__file__).parent.parent.parent
@@ -24,11 +24,11 @@ async def home_page(request: Request, student: OnboardedStudent, session: Curren
 
     Requires authentication and completed onboarding.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Get course info from config
-    course_title = sheets.get_config("course_title") or "Class Portal"
-    term = sheets.get_config("term") or ""
+    course_title = await sheets.get_config("course_title") or "Class Portal"
+    term = await sheets.get_config("term") or ""
 
     return templates.TemplateResponse(
         "home.html",
@@ -83,7 +83,7 @@ async def profile_update(
 
     Requires authentication and completed onboarding.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Build update fields
     update_fields = {
@@ -100,10 +100,10 @@ async def profile_update(
         "support_request": support_request.strip(),
     }
 
-    success = sheets.update_roster(student.student_id, **update_fields)
+    success = await sheets.update_roster(student.student_id, **update_fields)
 
     # Refresh student data
-    updated_student = sheets.get_roster_by_id(student.student_id) or student
+    updated_student = await sheets.get_roster_by_id(student.student_id) or student
 
     if success:
         logger.info("Profile updated for student %s", student.student_id)
@@ -138,13 +138,13 @@ async def schedule_page(request: Request, student: OnboardedStudent, session: Cu
 
     Requires authentication and completed onboarding.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Get schedule entries
-    schedule = sheets.get_schedule()
+    schedule = await sheets.get_schedule()
 
     # Get course info from config
-    course_title = sheets.get_config("course_title") or "Class Portal"
+    course_title = await sheets.get_config("course_title") or "Class Portal"
 
     return templates.TemplateResponse(
         "schedule.html",
@@ -163,11 +163,11 @@ async def class_page(request: Request, id: str, student: OnboardedStudent, sessi
     """
     Render lecture/class content page from markdown file on disk.
     """
-    sheets = get_sheets_client()
-    entry = sheets.get_schedule_entry_by_class_number(id)
+    sheets = AsyncSheetsClient(get_sheets_client())
+    entry = await sheets.get_schedule_entry_by_class_number(id)
 
     # Get all numbered classes for sidebar navigation
-    all_schedule = sheets.get_schedule()
+    all_schedule = await sheets.get_schedule()
     numbered_classes = [e for e in all_schedule if e.class_number and e.has_content]
 
     if not entry or not entry.has_content:
@@ -243,8 +243,8 @@ async def class_page(request: Request, id: str, student: OnboardedStudent, sessi
 @router.get("/final-projects", response_class=HTMLResponse)
 async def final_projects_page(request: Request, student: OnboardedStudent, session: CurrentSession):
     """Render the final projects page showing all teams and members."""
-    sheets = get_sheets_client()
-    projects = sheets.get_final_projects()
+    sheets = AsyncSheetsClient(get_sheets_client())
+    projects = await sheets.get_final_projects()
 
     # Attach rendered markdown description to each project if a content file exists
     projects_dir = _BASE_PATH / "content" / "cis60" / "projects"
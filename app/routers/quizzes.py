@@ -10,7 +10,7 @@ from fastapi.responses import HTMLResponse
 from app.dependencies import CurrentSession, OnboardedStudent, is_admin, templates
 from app.services.grading import grade_quiz
 from app.services.quiz_parser import get_parsed_quiz
-from app.services.sheets import get_sheets_client
+from app.services.sheets import AsyncSheetsClient, get_sheets_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -21,21 +21,19 @@ async def list_quizzes(request: Request, student: OnboardedStudent, session: Cur
     """
     List all available quizzes for the student.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
 
     # Get all quizzes
-    quizzes = sheets.get_quizzes()
+    quizzes = await sheets.get_quizzes()
+
+    # Best score and attempt count for each quiz, from the grade book
+    grades = await sheets.get_student_grades(student.student_id)
 
-    # Get submission counts for each quiz
     quiz_info = []
     for quiz in quizzes:
-        submissions = sheets.get_quiz_submissions(student.student_id, quiz.quiz_id)
-        attempt_count = len(submissions)
-
-        # Calculate best score
-        best_score = None
-        if submissions:
-            best_score = max(s.score for s in submissions)
+        grade = grades.get(quiz.quiz_id)
+        attempt_count = grade.attempts if grade else 0
+        best_score = grade.best_score if grade else None
 
         quiz_info.append(
             {
@@ -70,11 +68,11 @@ async def quiz_form(
     """
     Display a quiz form for the student to take.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
     admin_flag = is_admin(session)
 
     # Get quiz metadata
-    quiz_meta = sheets.get_quiz_by_id(quiz_id)
+    quiz_meta = await sheets.get_quiz_by_id(quiz_id)
     if not quiz_meta:
         return templates.TemplateResponse(
             "error.html",
@@ -101,7 +99,7 @@ async def quiz_form(
         )
 
     # Check attempts
-    submissions = sheets.get_quiz_submissions(student.student_id, quiz_id)
+    submissions = await sheets.get_quiz_submissions(student.student_id, quiz_id)
     attempt_count = len(submissions)
 
     if quiz_meta.attempts_allowed > 0 and attempt_count >= quiz_meta.attempts_allowed:
@@ -156,11 +154,11 @@ async def quiz_submit(
     """
     Submit a quiz for grading.
     """
-    sheets = get_sheets_client()
+    sheets = AsyncSheetsClient(get_sheets_client())
     admin_flag = is_admin(session)
 
     # Get quiz metadata
-    quiz_meta = sheets.get_quiz_by_id(quiz_id)
+    quiz_meta = await sheets.get_quiz_by_id(quiz_id)
     if not quiz_meta:
         return templates.TemplateResponse(
             "error.html",
@@ -187,7 +185,7 @@ async def quiz_submit(
         )
 
     # Check attempts again
-    submissions = sheets.get_quiz_submissions(student.student_id, quiz_id)
+    submissions = await sheets.get_quiz_submissions(student.student_id, quiz_id)
     attempt_count = len(submissions)
 
     if quiz_meta.attempts_allowed > 0 and attempt_count >= quiz_meta.attempts_allowed:
@@ -248,7 +246,7 @@ async def quiz_submit(
         "source": "web",
     }
 
-    sheets.append_quiz_submission(submission_data)
+    await sheets.append_quiz_submission(submission_data)
 
     logger.info(
         "Quiz submitted: student=%s quiz=%s score=%d/%d",
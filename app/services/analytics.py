@@ -1,7 +1,10 @@
 """Analytics computation service for quiz performance."""
 
 import json
+from collections import Counter
 from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable
 
 from app.models.quiz import Quiz, QuizSubmission
 
@@ -56,6 +59,104 @@ def get_best_submissions(
     return best
 
 
+@dataclass
+class CourseAggregate:
+    """Best submission, attempts and latest submission per student for every quiz."""
+
+    # quiz_id -> student_id -> best submission
+    best: dict[str, dict[str, QuizSubmission]] = field(default_factory=dict)
+    # quiz_id -> student_id -> number of submissions
+    attempts: dict[str, dict[str, int]] = field(default_factory=dict)
+    # quiz_id -> student_id -> latest submitted_at
+    last_submitted_at: dict[str, dict[str, datetime]] = field(default_factory=dict)
+
+
+def aggregate_course(submissions: Iterable[QuizSubmission]) -> CourseAggregate:
+    """
+    Group every quiz's submissions and keep each student's best, in one pass.
+
+    Same choice of best submission as get_best_submissions, for all quizzes.
+    """
+    aggregate = CourseAggregate()
+
+    for sub in submissions:
+        best = aggregate.best.setdefault(sub.quiz_id, {})
+        current = best.get(sub.student_id)
+        if current is None or sub.score > current.score:
+            best[sub.student_id] = sub
+
+        attempts = aggregate.attempts.setdefault(sub.quiz_id, {})
+        attempts[sub.student_id] = attempts.get(sub.student_id, 0) + 1
+        last = aggregate.last_submitted_at.setdefault(sub.quiz_id, {})
+        if sub.student_id not in last or sub.submitted_at > last[sub.student_id]:
+            last[sub.student_id] = sub.submitted_at
+
+    return aggregate
+
+
+@dataclass
+class SubmissionColumns:
+    """
+    Submissions decoded once into per-question columns.
+
+    Each submission's autograde_json and answers_json is parsed a single
+    time; every statistic is then a reduction over a column.
+    """
+
+    scores: list[float]
+    max_scores: list[float]
+    # question_id -> one correctness flag per submission
+    correct: dict[str, list[bool]]
+    # question_id -> option indexes chosen, across all submissions (MCQ only)
+    choices: dict[str, list[int]]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+def _decode(value: str) -> dict:
+    try:
+        decoded = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return decoded if isinstance(decoded, dict) else {}
+
+
+def build_columns(quiz: Quiz, submissions: Iterable[QuizSubmission]) -> SubmissionColumns:
+    """Decode submissions into per-question columns for a quiz."""
+    option_codes = {
+        q.id: {opt: code for code, opt in enumerate(q.options)} for q in quiz.questions if q.is_mcq
+    }
+    columns = SubmissionColumns(
+        scores=[],
+        max_scores=[],
+        correct={q.id: [] for q in quiz.questions},
+        choices={question_id: [] for question_id in option_codes},
+    )
+
+    for sub in submissions:
+        columns.scores.append(sub.score)
+        columns.max_scores.append(sub.max_score)
+        autograde = _decode(sub.autograde_json)
+        answers = _decode(sub.answers_json)
+
+        for question_id, flags in columns.correct.items():
+            result = autograde.get(question_id)
+            flags.append(bool(isinstance(result, dict) and result.get("correct", False)))
+
+        for question_id, codes in option_codes.items():
+            answer = answers.get(question_id)
+            if not answer:
+                continue
+            chosen = columns.choices[question_id]
+            for opt in answer if isinstance(answer, list) else (answer,):
+                code = codes.get(opt) if isinstance(opt, str) else None
+                if code is not None:
+                    chosen.append(code)
+
+    return columns
+
+
 def compute_quiz_analytics(
     quiz: Quiz,
     submissions: list[QuizSubmission],
@@ -64,58 +165,25 @@ def compute_quiz_analytics(
     """
     Compute per-question analytics for a quiz.
 
-    Uses only the best submission per student.
+    Uses only the best submission per student, decoded once into columns.
     """
-    best_submissions = get_best_submissions(submissions)
-    completed_students = len(best_submissions)
+    columns = build_columns(quiz, get_best_submissions(submissions).values())
+    completed_students = len(columns)
 
     # Calculate average score
-    if completed_students > 0:
-        total_score = sum(sub.score for sub in best_submissions.values())
-        total_max = sum(sub.max_score for sub in best_submissions.values())
-        avg_score = (total_score / total_max * 100) if total_max > 0 else 0.0
-    else:
-        avg_score = 0.0
+    total_max = sum(columns.max_scores)
+    avg_score = (sum(columns.scores) / total_max * 100) if total_max > 0 else 0.0
 
     # Compute per-question stats
     question_stats = []
 
     for question in quiz.questions:
-        correct_count = 0
-        option_dist: dict[str, int] = {}
+        correct_count = sum(columns.correct[question.id])
 
-        # Initialize option distribution for MCQ questions
+        option_dist: dict[str, int] = {}
         if question.is_mcq:
-            for opt in question.options:
-                option_dist[opt] = 0
-
-        # Analyze each best submission
-        for sub in best_submissions.values():
-            try:
-                autograde = json.loads(sub.autograde_json)
-            except (json.JSONDecodeError, TypeError):
-                autograde = {}
-
-            try:
-                answers = json.loads(sub.answers_json)
-            except (json.JSONDecodeError, TypeError):
-                answers = {}
-
-            # Check if question was answered correctly
-            q_result = autograde.get(question.id, {})
-            if q_result.get("correct", False):
-                correct_count += 1
-
-            # Tally MCQ option selections
-            if question.is_mcq:
-                answer = answers.get(question.id)
-                if answer:
-                    if isinstance(answer, list):
-                        for opt in answer:
-                            if opt in option_dist:
-                                option_dist[opt] += 1
-                    elif answer in option_dist:
-                        option_dist[answer] += 1
+            counts = Counter(columns.choices[question.id])
+            option_dist = {opt: counts[code] for code, opt in enumerate(question.options)}
 
         # Calculate correct percentage
         correct_pct = (correct_count / completed_students * 100) if completed_students > 0 else 0.0
@@ -0,0 +1,126 @@
+"""Class-wide email announcements (quiz reminders, grade notifications).
+
+A broadcast renders one message per student from the roster and queues them
+all in the email outbox in one transaction. Delivery, concurrency, pacing
+and retries are the outbox's; each recipient's row is its progress, so a
+restart resumes with whoever has not been sent yet.
+"""
+
+import html
+import logging
+from datetime import datetime
+from string import Template
+
+from app.db.sqlite import get_db
+from app.models.roster import RosterEntry
+from app.services import email_outbox
+
+logger = logging.getLogger(__name__)
+
+
+def student_fields(student: RosterEntry) -> dict[str, str]:
+    """Placeholders available to broadcast templates for one student."""
+    return {
+        "name": student.display_name,
+        "full_name": student.full_name,
+        "email": student.preferred_email or "",
+        "student_id": student.student_id,
+    }
+
+
+def render(template: str, fields: dict[str, str], escape: bool = False) -> str:
+    """
+    Fill $placeholders in a template. Unknown placeholders are left as is.
+
+    Args:
+        template: Template text, e.g. "Hi $name, quiz $quiz is open"
+        fields: Placeholder values
+        escape: HTML-escape the values (for HTML templates)
+    """
+    if escape:
+        fields = {key: html.escape(str(value)) for key, value in fields.items()}
+    return Template(template).safe_substitute(fields)
+
+
+def create_broadcast(
+    subject: str,
+    text: str,
+    students: list[RosterEntry],
+    created_by: str,
+    html_body: str | None = None,
+    context: dict[str, str] | None = None,
+) -> tuple[int, int]:
+    """
+    Render and queue a message for every student with an email address.
+
+    Args:
+        subject: Subject template
+        text: Plain text body template
+        students: Roster entries to send to (unclaimed students are skipped)
+        created_by: Email of the admin sending the broadcast
+        html_body: HTML body template (optional)
+        context: Extra placeholders shared by every message
+
+    Returns:
+        Tuple of (broadcast ID, number of recipients queued)
+    """
+    messages = []
+    for student in students:
+        if not student.is_claimed:
+            continue
+        fields = {**(context or {}), **student_fields(student)}
+        messages.append(
+            {
+                "to": student.preferred_email.lower(),
+                "subject": render(subject, fields),
+                "text": render(text, fields),
+                "html": render(html_body, fields, escape=True) if html_body else None,
+            }
+        )
+
+    with get_db() as db:
+        cursor = db.execute(
+            """
+            INSERT INTO email_broadcasts (subject, created_by, created_at, recipients)
+            VALUES (?, ?, ?, ?)
+            """,
+            (subject, created_by, datetime.utcnow().isoformat(), 0),
+        )
+        broadcast_id = cursor.lastrowid
+        # Duplicate addresses are queued once, so count what was actually queued
+        queued = email_outbox.enqueue_many("broadcast", messages, broadcast_id=broadcast_id)
+        db.execute(
+            "UPDATE email_broadcasts SET recipients = ? WHERE id = ?", (queued, broadcast_id)
+        )
+
+    logger.info("Broadcast %d by %s: %d recipients queued", broadcast_id, created_by, queued)
+    return broadcast_id, queued
+
+
+def get_progress(broadcast_id: int) -> dict | None:
+    """Get a broadcast's per-status recipient counts, or None if it doesn't exist."""
+    with get_db() as db:
+        broadcast = db.execute(
+            "SELECT * FROM email_broadcasts WHERE id = ?", (broadcast_id,)
+        ).fetchone()
+        if broadcast is None:
+            return None
+        rows = db.execute(
+            """
+            SELECT status, COUNT(*) AS n FROM email_outbox
+            WHERE broadcast_id = ? GROUP BY status
+            """,
+            (broadcast_id,),
+        ).fetchall()
+
+    counts = {"pending": 0, "sent": 0, "failed": 0}
+    counts.update({row["status"]: row["n"] for row in rows})
+    return {
+        "id": broadcast["id"],
+        "subject": broadcast["subject"],
+        "created_by": broadcast["created_by"],
+        "created_at": broadcast["created_at"],
+        "recipients": broadcast["recipients"],
+        **counts,
+        "done": counts["pending"] == 0,
+    }
@@ -1,23 +1,254 @@
 """In-memory TTL cache for reducing Google Sheets API calls."""
 
+import asyncio
 import logging
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
+from itertools import islice
 from time import time
 from typing import Any, Callable
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
-# Global cache storage: {key: (value, expires_at)}
-_cache: dict[str, tuple[Any, float]] = {}
+# Global cache storage in LRU order (least recently used first):
+# {key: (value, expires_at, stale_until, size_bytes)}
+# stale_until == expires_at unless the entry was cached with a stale_ttl
+_cache: OrderedDict[str, tuple[Any, float, float, int]] = OrderedDict()
+
+# Approximate bytes held by _cache values
+_bytes = 0
+
+# Loads currently running, by cache key: {key: Future}. Concurrent misses for
+# the same key wait on the first caller's Future instead of calling through.
+_inflight: dict[str, Future] = {}
+
+# Guards _cache and _inflight across threadpool workers and the event loop thread
+_lock = threading.Lock()
+
+# Tag index for O(k) invalidation: {tag: {key, ...}} and {key: tag}, where an
+# entry's tag is its key prefix. Keys are tracked from the moment a load
+# starts until the entry is removed.
+_tag_index: dict[str, set[str]] = {}
+_key_tag: dict[str, str] = {}
+
+_stats = {"coalesced": 0, "stale_hits": 0, "evictions": 0, "swept": 0}
+
+# Entries past their stale window are swept at most this often (on writes),
+# so keys that are never read again don't stay resident all term
+SWEEP_INTERVAL_SECONDS = 60
+_last_sweep = 0.0
+
+# Size estimation measures at most this many items of each container and
+# scales up by its length, and stops descending after this many objects
+_SIZE_SAMPLE_ITEMS = 64
+_SIZE_MAX_OBJECTS = 10_000
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate the memory held by a cached value, in bytes.
+
+    Walks containers and object attributes, counting shared objects once.
+    Large containers are sampled: a spread of _SIZE_SAMPLE_ITEMS items is
+    measured and scaled by the container's length, so a whole-tab snapshot
+    costs about as much to size as a small one. Indexes built lazily after
+    caching are not counted; the result is an estimate good enough for
+    budgeting.
+    """
+    return _estimate(value, set())
+
+
+def _estimate(obj: Any, seen: set[int]) -> int:
+    """Estimate one object and what it holds, skipping objects already in seen."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if len(seen) >= _SIZE_MAX_OBJECTS:
+        return size
+
+    if not isinstance(obj, (dict, list, tuple, set, frozenset)):
+        return size + _estimate(vars(obj), seen) if hasattr(obj, "__dict__") else size
+    if not obj:
+        return size
+
+    # Every step-th item (a key and value for dicts)
+    step = max(1, len(obj) // _SIZE_SAMPLE_ITEMS)
+    if isinstance(obj, dict):
+        sample = list(islice(obj.items(), 0, None, step))
+    else:
+        sample = [(item,) for item in islice(obj, 0, None, step)]
+    sampled = sum(_estimate(part, seen) for item in sample for part in item)
+    return size + sampled * len(obj) // len(sample)
+
+
+def _track(key: str, tag: str) -> None:
+    """Register a key under its tag. Caller holds _lock."""
+    if key in _key_tag:
+        return
+    _key_tag[key] = tag
+    _tag_index.setdefault(tag, set()).add(key)
+
+
+def _untrack(key: str) -> None:
+    """Forget a key's tag once it is neither cached nor loading. Caller holds _lock."""
+    if key in _cache or key in _inflight or key not in _key_tag:
+        return
+    tag = _key_tag.pop(key)
+    keys = _tag_index.get(tag)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _tag_index[tag]
+
+
+def _begin(key: str, tag: str) -> Future:
+    """Register a load for a key and return the Future its waiters share. Caller holds _lock."""
+    future = Future()
+    _inflight[key] = future
+    _track(key, tag)
+    return future
+
+
+def _finish(key: str, future: Future) -> bool:
+    """End a load; False if it was invalidated meanwhile. Caller holds _lock."""
+    if _inflight.get(key) is not future:
+        return False
+    del _inflight[key]
+    return True
+
+
+def _remove(key: str) -> None:
+    """Delete an entry and release its bytes. Caller holds _lock."""
+    global _bytes
+    _bytes -= _cache.pop(key)[3]
+    _untrack(key)
+
+
+def _store(key: str, value: Any, size: int, expires_at: float, stale_until: float) -> None:
+    """Insert an entry as most recently used and evict down to budget. Caller holds _lock."""
+    global _bytes
+    if key in _cache:
+        _bytes -= _cache.pop(key)[3]
+    if size > settings.cache_max_bytes:
+        logger.warning("Not caching %s: ~%d bytes exceeds the cache budget", key, size)
+        _untrack(key)
+        return
+
+    _cache[key] = (value, expires_at, stale_until, size)
+    _bytes += size
 
+    while len(_cache) > settings.cache_max_entries or _bytes > settings.cache_max_bytes:
+        _remove(next(iter(_cache)))
+        _stats["evictions"] += 1
 
-def cached(ttl_seconds: int, prefix: str = ""):
+    if time() - _last_sweep > SWEEP_INTERVAL_SECONDS:
+        _sweep(time())
+
+
+def _sweep(now: float) -> int:
+    """Drop entries past their stale window. Caller holds _lock."""
+    global _last_sweep
+    _last_sweep = now
+    expired = [k for k, (_, _, stale_until, _) in _cache.items() if stale_until <= now]
+    for key in expired:
+        _remove(key)
+    _stats["swept"] += len(expired)
+    return len(expired)
+
+
+def sweep_expired() -> int:
+    """
+    Remove entries that can no longer be served (past TTL and stale window).
+
+    Returns:
+        Number of entries removed
+    """
+    with _lock:
+        count = _sweep(time())
+    if count:
+        logger.debug("Swept %d expired cache entries", count)
+    return count
+
+
+# Background refreshes of stale entries run here, off the request path
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+def _load(
+    cache_key: str,
+    future: Future,
+    func: Callable,
+    args: tuple,
+    kwargs: dict,
+    ttl_seconds: float,
+    stale_ttl: float,
+) -> Any:
+    """Run a load this caller leads, store the result and resolve its waiters."""
+    now = time()
+    try:
+        result = func(*args, **kwargs)
+    except BaseException as e:
+        with _lock:
+            _finish(cache_key, future)
+            _untrack(cache_key)
+        future.set_exception(e)
+        raise
+
+    # Store in cache, unless the key was invalidated while loading
+    size = estimate_size(result)
+    with _lock:
+        if _finish(cache_key, future):
+            expires_at = now + ttl_seconds
+            _store(cache_key, result, size, expires_at, expires_at + stale_ttl)
+    future.set_result(result)
+    return result
+
+
+def _refresh(cache_key: str, future: Future, *load_args) -> None:
+    """Background refresh of a stale entry. Failures keep the stale value."""
+    try:
+        _load(cache_key, future, *load_args)
+    except Exception as e:
+        logger.warning("Background refresh of %s failed, serving stale value: %s", cache_key, e)
+
+
+def _on_event_loop() -> bool:
+    """Whether the current thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def cached(ttl_seconds: int, prefix: str = "", stale_ttl: int = 0):
     """
     Decorator to cache function results with TTL.
 
+    Concurrent misses for the same key are coalesced: the first caller runs
+    the function and other worker-thread callers block until its result (or
+    exception) is ready. A miss on the event loop thread never waits on
+    another thread's load; it calls the function itself.
+
+    With stale_ttl, an entry past its TTL is still returned for up to
+    stale_ttl more seconds while one background refresh replaces it, so
+    callers only wait on the wrapped function once the stale window ends.
+
+    Every entry is tagged with its key prefix, and invalidate_tags() drops
+    exactly the entries carrying a tag.
+
     Args:
         ttl_seconds: Time-to-live in seconds
         prefix: Optional prefix for cache key (used for invalidation)
+        stale_ttl: Seconds past the TTL during which the old value is served
     """
 
     def decorator(func: Callable) -> Callable:
@@ -32,27 +263,50 @@ def cached(ttl_seconds: int, prefix: str = ""):
             key_parts.extend(str(arg) for arg in args[start_idx:])
             key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
             cache_key = ":".join(key_parts)
+            load_args = (func, args, kwargs, ttl_seconds, stale_ttl)
 
             now = time()
 
-            # Check cache
-            if cache_key in _cache:
-                value, expires_at = _cache[cache_key]
-                if now < expires_at:
-                    logger.debug("Cache hit: %s", cache_key)
-                    return value
-                else:
-                    # Expired, remove it
-                    del _cache[cache_key]
+            with _lock:
+                # Check cache
+                if cache_key in _cache:
+                    value, expires_at, stale_until, _ = _cache[cache_key]
+                    if now < expires_at:
+                        logger.debug("Cache hit: %s", cache_key)
+                        _cache.move_to_end(cache_key)
+                        return value
+                    elif now < stale_until:
+                        # Serve the stale value; start a refresh unless one is running
+                        _stats["stale_hits"] += 1
+                        if cache_key not in _inflight:
+                            future = _begin(cache_key, key_prefix)
+                            _refresh_executor.submit(_refresh, cache_key, future, *load_args)
+                            logger.debug("Cache stale, refreshing: %s", cache_key)
+                        return value
+                    else:
+                        # Expired, remove it
+                        _remove(cache_key)
 
-            # Cache miss, call function
-            logger.debug("Cache miss: %s", cache_key)
-            result = func(*args, **kwargs)
+                # Join a load already running for this key, or become its leader
+                future = _inflight.get(cache_key)
+                leader = future is None
+                if leader:
+                    future = _begin(cache_key, key_prefix)
+                elif not _on_event_loop():
+                    _stats["coalesced"] += 1
 
-            # Store in cache
-            _cache[cache_key] = (result, now + ttl_seconds)
+            if not leader:
+                if _on_event_loop():
+                    # Blocking here would stall every request on the loop until
+                    # the other thread's load finishes; load for this caller only
+                    logger.debug("Cache miss (in-flight load elsewhere): %s", cache_key)
+                    return func(*args, **kwargs)
+                logger.debug("Cache miss (waiting on in-flight load): %s", cache_key)
+                return future.result()
 
-            return result
+            # Cache miss, call function
+            logger.debug("Cache miss: %s", cache_key)
+            return _load(cache_key, future, *load_args)
 
         # Attach cache key generator for manual invalidation
         wrapper.cache_prefix = prefix or func.__name__
@@ -61,24 +315,34 @@ def cached(ttl_seconds: int, prefix: str = ""):
     return decorator
 
 
-def invalidate(prefix: str) -> int:
+def invalidate_tags(*tags: str) -> int:
     """
-    Invalidate all cache entries matching prefix.
+    Invalidate the cache entries carrying any of the given tags.
+
+    Uses the tag index, so the cost is proportional to the number of
+    matching entries rather than the size of the cache. Loads already
+    running for those keys will not store their results.
 
     Args:
-        prefix: Prefix to match against cache keys
+        tags: Tags to match (the prefix given to cached())
 
     Returns:
         Number of entries invalidated
     """
-    keys_to_delete = [k for k in _cache if k.startswith(prefix)]
-    for key in keys_to_delete:
-        del _cache[key]
+    count = 0
+    with _lock:
+        keys = set().union(*(_tag_index.get(tag, ()) for tag in tags))
+        for key in keys:
+            if key in _cache:
+                _remove(key)
+                count += 1
+            if _inflight.pop(key, None) is not None:
+                _untrack(key)
 
-    if keys_to_delete:
-        logger.debug("Invalidated %d cache entries with prefix: %s", len(keys_to_delete), prefix)
+    if count:
+        logger.debug("Invalidated %d cache entries with tags: %s", count, ", ".join(tags))
 
-    return len(keys_to_delete)
+    return count
 
 
 def invalidate_all() -> int:
@@ -88,8 +352,14 @@ def invalidate_all() -> int:
     Returns:
         Number of entries cleared
     """
-    count = len(_cache)
-    _cache.clear()
+    global _bytes
+    with _lock:
+        count = len(_cache)
+        _cache.clear()
+        _inflight.clear()
+        _tag_index.clear()
+        _key_tag.clear()
+        _bytes = 0
     logger.debug("Cleared entire cache: %d entries", count)
     return count
 
@@ -97,11 +367,23 @@ def invalidate_all() -> int:
 def get_cache_stats() -> dict:
     """Get cache statistics for debugging."""
     now = time()
-    total = len(_cache)
-    expired = sum(1 for _, (_, exp) in _cache.items() if exp < now)
+    with _lock:
+        total = len(_cache)
+        expired = sum(1 for _, exp, _, _ in _cache.values() if exp < now)
+        stale = sum(1 for _, exp, stale_until, _ in _cache.values() if exp < now < stale_until)
+        approx_bytes = _bytes
 
     return {
         "total_entries": total,
         "expired_entries": expired,
         "active_entries": total - expired,
+        "stale_entries": stale,
+        "stale_hits": _stats["stale_hits"],
+        "inflight_loads": len(_inflight),
+        "coalesced_misses": _stats["coalesced"],
+        "approx_bytes": approx_bytes,
+        "max_entries": settings.cache_max_entries,
+        "max_bytes": settings.cache_max_bytes,
+        "evictions": _stats["evictions"],
+        "swept_entries": _stats["swept"],
     }
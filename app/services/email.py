@@ -6,9 +6,17 @@ from dataclasses import dataclass
 import httpx
 
 from app.config import settings
+from app.services import email_outbox
 
 logger = logging.getLogger(__name__)
 
+# Per-request timeout for the Forward Email API
+SEND_TIMEOUT_SECONDS = 30.0
+
+# App-lifetime HTTP client (see start_http_client); keeps TLS connections
+# to the mail provider alive between sends
+_client: httpx.AsyncClient | None = None
+
 
 @dataclass
 class EmailResult:
@@ -19,17 +27,8 @@ class EmailResult:
     error: str | None = None
 
 
-async def send_magic_link_email(to_email: str, magic_link: str) -> EmailResult:
-    """
-    Send a magic link email using Forward Email API.
-
-    Args:
-        to_email: Recipient email address
-        magic_link: Full magic link URL
-
-    Returns:
-        EmailResult with success status
-    """
+def _magic_link_message(magic_link: str) -> tuple[str, str, str]:
+    """Build the subject, HTML body and text body of a magic link email."""
     subject = "Sign in to Class Portal"
     html_body = f"""
     <html>
@@ -64,6 +63,21 @@ Click the link below to sign in. This link expires in {settings.magic_link_ttl_m
 If you didn't request this link, you can safely ignore this email.
     """
 
+    return subject, html_body, text_body
+
+
+async def send_magic_link_email(to_email: str, magic_link: str) -> EmailResult:
+    """
+    Send a magic link email using Forward Email API.
+
+    Args:
+        to_email: Recipient email address
+        magic_link: Full magic link URL
+
+    Returns:
+        EmailResult with success status
+    """
+    subject, html_body, text_body = _magic_link_message(magic_link)
     return await send_email(
         to=to_email,
         subject=subject,
@@ -72,6 +86,40 @@ If you didn't request this link, you can safely ignore this email.
     )
 
 
+def queue_magic_link_email(to_email: str, magic_link: str) -> int:
+    """
+    Queue a magic link email for background delivery (see email_outbox).
+
+    Args:
+        to_email: Recipient email address
+        magic_link: Full magic link URL
+
+    Returns:
+        Queue ID of the email
+    """
+    subject, html_body, text_body = _magic_link_message(magic_link)
+    return email_outbox.enqueue(
+        "magic_link", to=to_email, subject=subject, html=html_body, text=text_body
+    )
+
+
+def start_http_client() -> None:
+    """Create the shared HTTP client. Called once at startup."""
+    global _client
+    _client = httpx.AsyncClient(
+        timeout=SEND_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client. Called once at shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 async def send_email(
     to: str,
     subject: str,
@@ -106,23 +154,22 @@ async def send_email(
         payload["text"] = text
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.forwardemail_api_url,
-                auth=(settings.forwardemail_user, settings.forwardemail_pass),
-                json=payload,
-                timeout=30.0,
-            )
-
-            if response.status_code in (200, 201, 202):
-                data = response.json()
-                message_id = data.get("id") or data.get("message_id")
-                logger.info("Email sent to %s (id: %s)", to, message_id)
-                return EmailResult(success=True, message_id=message_id)
-
-            error_msg = f"API returned {response.status_code}: {response.text}"
-            logger.error("Failed to send email to %s: %s", to, error_msg)
-            return EmailResult(success=False, error=error_msg)
+        if _client is not None:
+            response = await _post(_client, payload)
+        else:
+            # Outside the app lifespan (scripts, tests): one-off client
+            async with httpx.AsyncClient(timeout=SEND_TIMEOUT_SECONDS) as client:
+                response = await _post(client, payload)
+
+        if response.status_code in (200, 201, 202):
+            data = response.json()
+            message_id = data.get("id") or data.get("message_id")
+            logger.info("Email sent to %s (id: %s)", to, message_id)
+            return EmailResult(success=True, message_id=message_id)
+
+        error_msg = f"API returned {response.status_code}: {response.text}"
+        logger.error("Failed to send email to %s: %s", to, error_msg)
+        return EmailResult(success=False, error=error_msg)
 
     except httpx.TimeoutException:
         logger.error("Timeout sending email to %s", to)
@@ -133,3 +180,11 @@ async def send_email(
     except Exception as e:
         logger.exception("Unexpected error sending email to %s", to)
         return EmailResult(success=False, error=str(e))
+
+
+async def _post(client: httpx.AsyncClient, payload: dict) -> httpx.Response:
+    return await client.post(
+        settings.forwardemail_api_url,
+        auth=(settings.forwardemail_user, settings.forwardemail_pass),
+        json=payload,
+    )
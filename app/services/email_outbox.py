@@ -0,0 +1,341 @@
+"""Durable queue for outgoing email.
+
+Emails are committed to SQLite inside the request and sent by a background
+task over the shared HTTP client, so request latency no longer depends on
+the mail provider. Failed sends are retried with backoff.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from app.config import settings
+from app.db.sqlite import get_db
+from app.services.outbox import backoff_seconds
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    from app.services.sheets import SheetsClient
+
+logger = logging.getLogger(__name__)
+
+# Give up on an email after this many failed sends
+MAX_ATTEMPTS = 6
+
+# Maximum emails claimed per delivery pass
+MAX_BATCH = 50
+
+# A pass also claims no more than email_send_per_second allows in this
+# long, so an email queued mid-pass (a magic link during a broadcast) is
+# picked up within about this long
+MAX_PASS_SECONDS = 5
+
+# Sent before other kinds, so sign-in is not held up behind a broadcast
+PRIORITY_KIND = "magic_link"
+
+# A claimed email is not picked up again for this long on top of the time
+# the batch needs at the configured send rate, so concurrent senders never
+# send it twice
+CLAIM_LEASE_SECONDS = 120
+
+# Sent and failed emails are kept this long for inspection
+RETENTION_DAYS = 7
+
+# Set by enqueue() to start a delivery pass without waiting for the poll
+_wake: asyncio.Event | None = None
+_wake_loop: asyncio.AbstractEventLoop | None = None
+
+
+class RateLimiter:
+    """Spaces send starts at least 1 / per_second apart, across concurrent tasks."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        # No await between reading and advancing _next, so no lock is needed
+        now = monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def enqueue(
+    kind: str,
+    to: str,
+    subject: str,
+    html: str | None = None,
+    text: str | None = None,
+) -> int:
+    """
+    Queue an email for sending.
+
+    Args:
+        kind: What the email is for (e.g. "magic_link")
+        to: Recipient email address
+        subject: Email subject
+        html: HTML body (optional)
+        text: Plain text body (optional)
+
+    Returns:
+        Queue ID of the email
+    """
+    now = datetime.utcnow().isoformat()
+    with get_db() as db:
+        cursor = db.execute(
+            """
+            INSERT INTO email_outbox (kind, to_email, subject, html, text, created_at, next_attempt_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (kind, to, subject, html, text, now, now),
+        )
+        email_id = cursor.lastrowid
+    _notify()
+    return email_id
+
+
+def enqueue_many(kind: str, messages: list[dict], broadcast_id: int | None = None) -> int:
+    """
+    Queue several emails in one transaction.
+
+    Args:
+        kind: What the emails are for (e.g. "broadcast")
+        messages: Dicts with to, subject and optional html / text
+        broadcast_id: Broadcast the emails belong to; a recipient is queued
+            at most once per broadcast
+
+    Returns:
+        Number of emails queued
+    """
+    now = datetime.utcnow().isoformat()
+    with get_db() as db:
+        cursor = db.executemany(
+            """
+            INSERT OR IGNORE INTO email_outbox
+                (kind, to_email, subject, html, text, created_at, next_attempt_at, broadcast_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    kind,
+                    m["to"],
+                    m["subject"],
+                    m.get("html"),
+                    m.get("text"),
+                    now,
+                    now,
+                    broadcast_id,
+                )
+                for m in messages
+            ],
+        )
+        count = cursor.rowcount
+    _notify()
+    return count
+
+
+def _notify() -> None:
+    """Wake the sender, from the event loop or any thread."""
+    if _wake is not None and _wake_loop is not None and not _wake_loop.is_closed():
+        _wake_loop.call_soon_threadsafe(_wake.set)
+
+
+def _claim(limit: int) -> list["sqlite3.Row"]:
+    """Lease due emails to this sender in one statement."""
+    now = datetime.utcnow()
+    send_seconds = limit / settings.email_send_per_second if settings.email_send_per_second else 0
+    lease = (now + timedelta(seconds=CLAIM_LEASE_SECONDS + send_seconds)).isoformat()
+    with get_db() as db:
+        rows = db.execute(
+            """
+            UPDATE email_outbox SET next_attempt_at = ?
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY kind != ?, id LIMIT ?
+            )
+            RETURNING *
+            """,
+            (lease, now.isoformat(), PRIORITY_KIND, limit),
+        ).fetchall()
+    # RETURNING does not keep the subquery's order
+    return sorted(rows, key=lambda row: (row["kind"] != PRIORITY_KIND, row["id"]))
+
+
+def _clear_login_links(db: "sqlite3.Connection", email_id: int | None = None) -> int:
+    """
+    Drop the bodies of finished magic link emails (one, or all of them).
+
+    They hold a working login link, while tokens.py stores only the token's
+    hash; the row itself stays as the delivery record.
+    """
+    return db.execute(
+        """
+        UPDATE email_outbox SET html = NULL, text = NULL
+        WHERE kind = 'magic_link' AND status != 'pending'
+            AND (html IS NOT NULL OR text IS NOT NULL)
+            AND (:id IS NULL OR id = :id)
+        """,
+        {"id": email_id},
+    ).rowcount
+
+
+def _record(email_id: int, attempts: int, success: bool, message_id, error) -> str:
+    """Store a send outcome. Returns the email's new status."""
+    now = datetime.utcnow()
+    if success:
+        status = "sent"
+    elif attempts >= MAX_ATTEMPTS:
+        status = "failed"
+    else:
+        status = "pending"
+    retry_at = now + timedelta(seconds=backoff_seconds(attempts))
+    with get_db() as db:
+        db.execute(
+            """
+            UPDATE email_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?,
+                message_id = ?, sent_at = ?
+            WHERE id = ?
+            """,
+            (
+                status,
+                attempts,
+                retry_at.isoformat(),
+                None if success else (error or "")[:500],
+                message_id,
+                now.isoformat() if success else None,
+                email_id,
+            ),
+        )
+        if status != "pending":
+            _clear_login_links(db, email_id)
+    return status
+
+
+# Paces sends across delivery passes
+_limiter = RateLimiter(settings.email_send_per_second)
+
+
+async def deliver(client: "SheetsClient | None" = None, limit: int = MAX_BATCH) -> int:
+    """
+    Send due emails once each.
+
+    Up to email_send_concurrency sends run at once, started no faster than
+    email_send_per_second. Magic link outcomes (sent, or failed for good)
+    are written to the MagicLink_Requests audit log through the Sheets
+    client.
+
+    Returns:
+        Number of emails sent
+    """
+    if settings.email_send_per_second > 0:
+        limit = min(limit, max(1, int(settings.email_send_per_second * MAX_PASS_SECONDS)))
+    rows = await asyncio.to_thread(_claim, limit)
+    if not rows:
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, settings.email_send_concurrency))
+
+    async def send(row: "sqlite3.Row") -> bool:
+        async with semaphore:
+            await _limiter.wait()
+            return await _send_one(row, client)
+
+    results = await asyncio.gather(*(send(row) for row in rows))
+    return sum(results)
+
+
+async def _send_one(row: "sqlite3.Row", client: "SheetsClient | None") -> bool:
+    """Send one claimed email and record the outcome. Returns True if sent."""
+    from app.services.email import send_email  # email imports this module
+
+    result = await send_email(
+        to=row["to_email"], subject=row["subject"], html=row["html"], text=row["text"]
+    )
+    attempts = row["attempts"] + 1
+    status = await asyncio.to_thread(
+        _record, row["id"], attempts, result.success, result.message_id, result.error
+    )
+    if status == "pending":
+        logger.warning(
+            "Email %d to %s failed (attempt %d), will retry: %s",
+            row["id"],
+            row["to_email"],
+            attempts,
+            result.error,
+        )
+    elif status == "failed":
+        logger.error("Giving up on email %d to %s: %s", row["id"], row["to_email"], result.error)
+
+    if row["kind"] == "magic_link" and client is not None and status != "pending":
+        await asyncio.to_thread(
+            client.append_magic_link_request,
+            {
+                "requested_at": row["created_at"],
+                "email": row["to_email"],
+                "result": "sent" if result.success else "error",
+                "note": result.error or "",
+            },
+        )
+    return result.success
+
+
+def get_outbox_stats() -> dict:
+    """Count queued emails by status."""
+    with get_db() as db:
+        rows = db.execute(
+            "SELECT status, COUNT(*) AS n FROM email_outbox GROUP BY status"
+        ).fetchall()
+    counts = {"pending": 0, "sent": 0, "failed": 0}
+    counts.update({row["status"]: row["n"] for row in rows})
+    return counts
+
+
+def prune_finished() -> int:
+    """Delete sent and failed emails past the retention window. Returns rows deleted."""
+    cutoff = (datetime.utcnow() - timedelta(days=RETENTION_DAYS)).isoformat()
+    with get_db() as db:
+        # Covers links finished before their bodies were cleared on send
+        _clear_login_links(db)
+        cursor = db.execute(
+            "DELETE FROM email_outbox WHERE status != 'pending' AND created_at < ?",
+            (cutoff,),
+        )
+        return cursor.rowcount
+
+
+async def run_sender(client: "SheetsClient", stop: asyncio.Event, interval: float) -> None:
+    """
+    Send queued email until `stop` is set.
+
+    Runs a pass as soon as an email is queued, and every `interval`
+    seconds for retries.
+    """
+    global _wake, _wake_loop
+    _wake = asyncio.Event()
+    _wake_loop = asyncio.get_running_loop()
+    try:
+        while not stop.is_set():
+            _wake.clear()
+            try:
+                while await deliver(client):
+                    pass
+            except Exception:
+                logger.exception("Email delivery pass failed")
+
+            stop_wait = asyncio.ensure_future(stop.wait())
+            wake_wait = asyncio.ensure_future(_wake.wait())
+            _, pending = await asyncio.wait(
+                {stop_wait, wake_wait}, timeout=interval, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+    finally:
+        _wake = None
+        _wake_loop = None
@@ -0,0 +1,295 @@
+"""Grade book materialized in SQLite and kept up to date as submissions arrive.
+
+`grades` holds each student's best score and attempt count per quiz, with
+per-quiz totals kept beside it in `quiz_grade_stats`, so grade tables and
+the quiz list are read without scanning submissions. A submission is
+recorded when it is queued and seen again when it reaches the replica;
+`graded_submissions` makes sure it is only counted once, keyed on the
+submitted_at the app wrote (the raw cell for replicated rows, which may
+not parse). When existing
+submission rows change (a new replica generation, e.g. after a regrade),
+the book is rebuilt from the replica: every submission is grouped in one
+pass (analytics.aggregate_course) and each student's grade written once.
+"""
+
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from app.db.sqlite import get_db
+from app.models.quiz import QuizSubmission
+from app.services.analytics import aggregate_course
+from app.services.snapshot import FIRST_DATA_ROW
+
+logger = logging.getLogger(__name__)
+
+# Serializes updates (appends, background sync and catch-up on read)
+_lock = threading.Lock()
+
+
+@dataclass
+class StudentGrade:
+    """A student's standing on one quiz."""
+
+    quiz_id: str
+    best_score: float
+    max_score: float
+    attempts: int
+    last_submitted_at: str
+
+
+@dataclass
+class QuizGradeStats:
+    """Totals over every student's best submission to one quiz."""
+
+    quiz_id: str
+    students: int
+    attempts: int
+    total_best_score: float
+    total_max_score: float
+
+    @property
+    def avg_score(self) -> float:
+        """Average best score as a percentage of max score."""
+        if self.total_max_score <= 0:
+            return 0.0
+        return self.total_best_score / self.total_max_score * 100
+
+
+def _record(db: sqlite3.Connection, submissions: Iterable[tuple[QuizSubmission, str]]) -> int:
+    """
+    Fold submissions not seen before into grades and refresh their quiz totals.
+
+    Each submission comes with the submitted_at it is keyed on in
+    `graded_submissions`.
+    """
+    added = 0
+    quiz_ids = set()
+
+    for sub, key in submissions:
+        submitted_at = sub.submitted_at.isoformat()
+        cursor = db.execute(
+            """
+            INSERT OR IGNORE INTO graded_submissions (student_id, quiz_id, attempt, submitted_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (sub.student_id, sub.quiz_id, sub.attempt, key),
+        )
+        if cursor.rowcount == 0:
+            continue
+
+        # SET expressions all see the row as it was before this update
+        db.execute(
+            """
+            INSERT INTO grades
+                (student_id, quiz_id, best_score, max_score, attempts, last_submitted_at)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(student_id, quiz_id) DO UPDATE SET
+                max_score = CASE WHEN excluded.best_score > best_score
+                    THEN excluded.max_score ELSE max_score END,
+                best_score = MAX(best_score, excluded.best_score),
+                attempts = attempts + 1,
+                last_submitted_at = MAX(last_submitted_at, excluded.last_submitted_at)
+            """,
+            (sub.student_id, sub.quiz_id, sub.score, sub.max_score, submitted_at),
+        )
+        quiz_ids.add(sub.quiz_id)
+        added += 1
+
+    # Totals are re-summed over the quiz's grade rows: one row per student,
+    # however many submissions there are
+    db.executemany(
+        """
+        INSERT OR REPLACE INTO quiz_grade_stats
+            (quiz_id, students, attempts, total_best_score, total_max_score)
+        SELECT ?, COUNT(*), TOTAL(attempts), TOTAL(best_score), TOTAL(max_score)
+        FROM grades WHERE quiz_id = ?
+        """,
+        [(quiz_id, quiz_id) for quiz_id in quiz_ids],
+    )
+    return added
+
+
+def _rebuild(db: sqlite3.Connection, submissions: Iterable[tuple[QuizSubmission, str]]) -> int:
+    """Fill the emptied book from every submission, one write per grade."""
+    unique: dict[tuple, QuizSubmission] = {}
+    for sub, key in submissions:
+        unique.setdefault((sub.student_id, sub.quiz_id, sub.attempt, key), sub)
+    course = aggregate_course(unique.values())
+
+    db.executemany(
+        """
+        INSERT INTO graded_submissions (student_id, quiz_id, attempt, submitted_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        list(unique),
+    )
+    db.executemany(
+        """
+        INSERT INTO grades
+            (student_id, quiz_id, best_score, max_score, attempts, last_submitted_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                student_id,
+                quiz_id,
+                sub.score,
+                sub.max_score,
+                course.attempts[quiz_id][student_id],
+                course.last_submitted_at[quiz_id][student_id].isoformat(),
+            )
+            for quiz_id, best in course.best.items()
+            for student_id, sub in best.items()
+        ],
+    )
+    db.execute(
+        """
+        INSERT INTO quiz_grade_stats
+            (quiz_id, students, attempts, total_best_score, total_max_score)
+        SELECT quiz_id, COUNT(*), TOTAL(attempts), TOTAL(best_score), TOTAL(max_score)
+        FROM grades GROUP BY quiz_id
+        """
+    )
+    return len(unique)
+
+
+def record(submissions: Iterable[QuizSubmission]) -> int:
+    """
+    Add new submissions to the grade book.
+
+    Submissions already recorded (same student, quiz, attempt and
+    submitted_at) are skipped.
+
+    Returns:
+        Number of submissions added
+    """
+    with _lock, get_db() as db:
+        return _record(db, [(sub, sub.submitted_at.isoformat()) for sub in submissions])
+
+
+def catch_up(
+    generation: int,
+    rows_after: Callable[[int], list[tuple[int, dict]]],
+    pending: Callable[[], list[QuizSubmission]],
+) -> int:
+    """
+    Bring the grade book up to date with the replicated Quiz_Submissions.
+
+    Only rows replicated since the last call are recorded. On a new
+    generation the book is rebuilt from every row plus the queued
+    submissions that have not reached the sheet yet.
+
+    Args:
+        generation: Current replica generation of Quiz_Submissions
+        rows_after: Returns (sheet row number, record) pairs below a row
+        pending: Returns queued submissions
+
+    Returns:
+        Number of submissions added
+    """
+    # Up to date (the common case on reads): no lock and no write
+    seen = _state()
+    new_rows = None
+    if seen is not None and seen[0] == generation:
+        new_rows = rows_after(seen[1])
+        if not new_rows:
+            return 0
+
+    with _lock, get_db() as db:
+        # Another thread may have caught up while this one waited
+        state = _state(db)
+        submissions = []
+        rebuild = state is None or state[0] != generation
+        if not rebuild:
+            last_row = state[1]
+            if state != seen or new_rows is None:
+                new_rows = rows_after(last_row)
+        else:
+            db.execute("DELETE FROM graded_submissions")
+            db.execute("DELETE FROM grades")
+            db.execute("DELETE FROM quiz_grade_stats")
+            last_row = FIRST_DATA_ROW - 1
+            if state is not None:
+                logger.info("Quiz_Submissions changed, rebuilding the grade book")
+            submissions = [(sub, sub.submitted_at.isoformat()) for sub in pending()]
+            new_rows = rows_after(last_row)
+
+        for row_num, row in new_rows:
+            if row.get("student_id") or row.get("quiz_id"):
+                # Key on the cell as written: from_row() stamps an unparseable
+                # submitted_at with the current time, which differs every rebuild
+                key = str(row.get("submitted_at") or f"row {row_num}")
+                submissions.append((QuizSubmission.from_row(row), key))
+            last_row = row_num
+
+        added = _rebuild(db, submissions) if rebuild else _record(db, submissions)
+        if state != (generation, last_row):
+            db.execute(
+                """
+                INSERT INTO gradebook_state (id, generation, last_row) VALUES (1, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    generation = excluded.generation, last_row = excluded.last_row
+                """,
+                (generation, last_row),
+            )
+    return added
+
+
+def _state(db: sqlite3.Connection | None = None) -> tuple[int, int] | None:
+    """(generation, last_row) the book was last caught up to, if any."""
+    if db is None:
+        with get_db() as db:
+            return _state(db)
+    row = db.execute("SELECT generation, last_row FROM gradebook_state").fetchone()
+    return None if row is None else (row["generation"], row["last_row"])
+
+
+def clear() -> None:
+    """Drop the grade book; the next catch_up() rebuilds it."""
+    with _lock, get_db() as db:
+        db.execute("DELETE FROM gradebook_state")
+        db.execute("DELETE FROM graded_submissions")
+        db.execute("DELETE FROM grades")
+        db.execute("DELETE FROM quiz_grade_stats")
+
+
+def get_student_grades(student_id: str) -> dict[str, StudentGrade]:
+    """Get quiz_id -> grade for one student's attempted quizzes."""
+    with get_db() as db:
+        rows = db.execute(
+            """
+            SELECT quiz_id, best_score, max_score, attempts, last_submitted_at
+            FROM grades WHERE student_id = ?
+            """,
+            (str(student_id),),
+        ).fetchall()
+    return {row["quiz_id"]: StudentGrade(**dict(row)) for row in rows}
+
+
+def get_best_scores() -> dict[str, dict[str, float]]:
+    """Get student_id -> quiz_id -> best score."""
+    with get_db() as db:
+        rows = db.execute("SELECT student_id, quiz_id, best_score FROM grades").fetchall()
+    scores: dict[str, dict[str, float]] = {}
+    for row in rows:
+        scores.setdefault(row["student_id"], {})[row["quiz_id"]] = row["best_score"]
+    return scores
+
+
+def get_quiz_stats() -> dict[str, QuizGradeStats]:
+    """Get quiz_id -> totals for every quiz with submissions."""
+    with get_db() as db:
+        rows = db.execute("SELECT * FROM quiz_grade_stats").fetchall()
+    return {
+        row["quiz_id"]: QuizGradeStats(
+            quiz_id=row["quiz_id"],
+            students=row["students"],
+            attempts=int(row["attempts"]),
+            total_best_score=row["total_best_score"],
+            total_max_score=row["total_max_score"],
+        )
+        for row in rows
+    }
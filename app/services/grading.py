@@ -1,7 +1,9 @@
 """Quiz auto-grading service."""
 
 import logging
+import weakref
 from dataclasses import dataclass
+from typing import Callable
 
 from app.models.quiz import Question, Quiz
 
@@ -48,6 +50,59 @@ class GradeResult:
         }
 
 
+# Grades one answer to one question
+Grader = Callable[[str | list[str] | None], QuestionResult]
+
+
+@dataclass
+class GradingPlan:
+    """
+    A quiz compiled for grading.
+
+    Each question's answer key is normalized once (sets for mcq_multi,
+    lowercased text, parsed numbers) into a grader closure, so grading a
+    submission does no per-question dispatch or re-normalization.
+    """
+
+    quiz_id: str
+    max_score: int
+    graders: tuple[tuple[str, Grader], ...]
+
+    def grade(self, answers: dict[str, str | list[str]]) -> GradeResult:
+        """Grade one submission."""
+        results = {}
+        total_score = 0
+        get = answers.get
+        for question_id, grader in self.graders:
+            result = grader(get(question_id))
+            results[question_id] = result
+            total_score += result.points
+        return GradeResult(score=total_score, max_score=self.max_score, questions=results)
+
+
+# Compiled plans by id(quiz); entries are dropped when their quiz is collected
+_plans: dict[int, GradingPlan] = {}
+
+
+def compile_quiz(quiz: Quiz) -> GradingPlan:
+    """
+    Get the grading plan for a quiz, compiling it on first use.
+
+    Plans are cached per Quiz object, so quizzes served from the quiz
+    registry are compiled once until their file changes.
+    """
+    plan = _plans.get(id(quiz))
+    if plan is None:
+        plan = GradingPlan(
+            quiz_id=quiz.quiz_id,
+            max_score=quiz.total_points,
+            graders=tuple((q.id, compile_question(q)) for q in quiz.questions),
+        )
+        _plans[id(quiz)] = plan
+        weakref.finalize(quiz, _plans.pop, id(quiz), None)
+    return plan
+
+
 def grade_quiz(quiz: Quiz, answers: dict[str, str | list[str]]) -> GradeResult:
     """
     Grade a quiz submission.
@@ -59,20 +114,7 @@ def grade_quiz(quiz: Quiz, answers: dict[str, str | list[str]]) -> GradeResult:
     Returns:
         GradeResult with score and per-question results
     """
-    results = {}
-    total_score = 0
-
-    for question in quiz.questions:
-        student_answer = answers.get(question.id)
-        result = grade_question(question, student_answer)
-        results[question.id] = result
-        total_score += result.points
-
-    return GradeResult(
-        score=total_score,
-        max_score=quiz.total_points,
-        questions=results,
-    )
+    return compile_quiz(quiz).grade(answers)
 
 
 def grade_question(question: Question, answer: str | list[str] | None) -> QuestionResult:
@@ -86,127 +128,138 @@ def grade_question(question: Question, answer: str | list[str] | None) -> Questi
     Returns:
         QuestionResult with correctness and points
     """
-    if question.type == "mcq_single":
-        return grade_mcq_single(question, answer)
-    elif question.type == "mcq_multi":
-        return grade_mcq_multi(question, answer)
-    elif question.type == "numeric":
-        return grade_numeric(question, answer)
-    elif question.type == "short_text":
-        return grade_short_text(question, answer)
-    elif question.type == "free_response":
-        return grade_free_response(question, answer)
-    else:
+    return compile_question(question)(answer)
+
+
+def compile_question(question: Question) -> Grader:
+    """Build the grader for a question, with its answer key normalized up front."""
+    compiler = _COMPILERS.get(question.type)
+    if compiler is None:
         logger.warning("Unknown question type: %s", question.type)
+        return _compile_unknown(question)
+    return compiler(question)
+
+
+def _compile_unknown(question: Question) -> Grader:
+    points = question.points
+    expected = question.correct
+
+    def grade(answer):
         return QuestionResult(
-            correct=False,
-            points=0,
-            max_points=question.points,
-            expected=question.correct,
-            got=answer,
+            correct=False, points=0, max_points=points, expected=expected, got=answer
         )
 
+    return grade
+
 
-def grade_mcq_single(question: Question, answer: str | None) -> QuestionResult:
-    """Grade a single-choice MCQ."""
+def _compile_mcq_single(question: Question) -> Grader:
+    """Single-choice MCQ: exact match on the option."""
+    points = question.points
     expected = question.correct
-    correct = answer == expected
 
-    return QuestionResult(
-        correct=correct,
-        points=question.points if correct else 0,
-        max_points=question.points,
-        expected=expected if not correct else None,
-        got=answer if not correct else None,
-    )
+    def grade(answer):
+        if answer == expected:
+            return QuestionResult(correct=True, points=points, max_points=points)
+        return QuestionResult(
+            correct=False, points=0, max_points=points, expected=expected, got=answer
+        )
 
+    return grade
 
-def grade_mcq_multi(question: Question, answer: str | list[str] | None) -> QuestionResult:
+
+def _compile_mcq_multi(question: Question) -> Grader:
     """
-    Grade a multiple-choice MCQ.
+    Multiple-choice MCQ.
 
     Student must select ALL correct options and NONE of the incorrect ones.
     """
-    expected = set(question.correct) if question.correct else set()
-
-    if answer is None:
-        student_set = set()
-    elif isinstance(answer, str):
-        student_set = {answer}
-    else:
-        student_set = set(answer)
-
-    correct = student_set == expected
+    points = question.points
+    expected = frozenset(question.correct) if question.correct else frozenset()
+    expected_sorted = sorted(expected)
+
+    def grade(answer):
+        if answer is None:
+            student_set = set()
+        elif isinstance(answer, str):
+            student_set = {answer}
+        else:
+            student_set = set(answer)
+
+        if student_set == expected:
+            return QuestionResult(correct=True, points=points, max_points=points)
+        return QuestionResult(
+            correct=False,
+            points=0,
+            max_points=points,
+            expected=expected_sorted,
+            got=sorted(student_set),
+        )
 
-    return QuestionResult(
-        correct=correct,
-        points=question.points if correct else 0,
-        max_points=question.points,
-        expected=sorted(expected) if not correct else None,
-        got=sorted(student_set) if not correct else None,
-    )
+    return grade
 
 
-def grade_numeric(question: Question, answer: str | None) -> QuestionResult:
+def _compile_numeric(question: Question) -> Grader:
     """
-    Grade a numeric answer question.
-
-    Compares as strings to handle exact integer matching.
+    Numeric answer: compared as numbers when both parse, else as trimmed strings.
     """
+    points = question.points
     expected = str(question.correct).strip() if question.correct else ""
-
-    if answer is None:
-        student_answer = ""
-    else:
-        student_answer = str(answer).strip()
-
-    # Try numeric comparison first
     try:
         expected_num = float(expected)
-        student_num = float(student_answer)
-        correct = expected_num == student_num
-    except (ValueError, TypeError):
-        # Fall back to string comparison
-        correct = student_answer == expected
-
-    return QuestionResult(
-        correct=correct,
-        points=question.points if correct else 0,
-        max_points=question.points,
-        expected=expected if not correct else None,
-        got=student_answer if not correct else None,
-    )
-
-
-def grade_free_response(question: Question, answer: str | list[str] | None) -> QuestionResult:
-    """Grade a free-response question — any non-empty answer earns full points."""
-    has_answer = bool(answer) if not isinstance(answer, list) else bool(answer)
-    return QuestionResult(
-        correct=True,
-        points=question.points if has_answer else 0,
-        max_points=question.points,
-    )
-
-
-def grade_short_text(question: Question, answer: str | None) -> QuestionResult:
-    """
-    Grade a short text answer question.
+    except ValueError:
+        expected_num = None
+
+    def grade(answer):
+        student_answer = "" if answer is None else str(answer).strip()
+        correct = False
+        if expected_num is not None:
+            try:
+                correct = float(student_answer) == expected_num
+            except ValueError:
+                correct = student_answer == expected
+        else:
+            correct = student_answer == expected
+
+        if correct:
+            return QuestionResult(correct=True, points=points, max_points=points)
+        return QuestionResult(
+            correct=False, points=0, max_points=points, expected=expected, got=student_answer
+        )
 
-    Case-insensitive, trimmed comparison.
-    """
+    return grade
+
+
+def _compile_short_text(question: Question) -> Grader:
+    """Short text answer: case-insensitive, trimmed comparison."""
+    points = question.points
+    expected_raw = question.correct
     expected = str(question.correct).strip().lower() if question.correct else ""
 
-    if answer is None:
-        student_answer = ""
-    else:
-        student_answer = str(answer).strip().lower()
+    def grade(answer):
+        student_answer = "" if answer is None else str(answer).strip().lower()
+        if student_answer == expected:
+            return QuestionResult(correct=True, points=points, max_points=points)
+        return QuestionResult(
+            correct=False, points=0, max_points=points, expected=expected_raw, got=answer
+        )
+
+    return grade
+
+
+def _compile_free_response(question: Question) -> Grader:
+    """Free response: any non-empty answer earns full points."""
+    points = question.points
+
+    def grade(answer):
+        return QuestionResult(correct=True, points=points if answer else 0, max_points=points)
+
+    return grade
 
-    correct = student_answer == expected
 
-    return QuestionResult(
-        correct=correct,
-        points=question.points if correct else 0,
-        max_points=question.points,
-        expected=question.correct if not correct else None,
-        got=answer if not correct else None,
-    )
+_COMPILERS: dict[str, Callable[[Question], Grader]] = {
+    "mcq_single": _compile_mcq_single,
+    "mcq_multi": _compile_mcq_multi,
+    "numeric": _compile_numeric,
+    "short_text": _compile_short_text,
+    "free_response": _compile_free_response,
+}
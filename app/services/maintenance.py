@@ -0,0 +1,118 @@
+"""Periodic housekeeping tasks run in the background for the app's lifetime."""
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import Any, Callable
+
+from app.db.sqlite import optimize_db
+from app.services.cache import sweep_expired
+from app.services.email_outbox import prune_finished
+from app.services.tokens import cleanup_expired_tokens, prune_rate_limits
+
+logger = logging.getLogger(__name__)
+
+# How often the scheduler checks for due tasks
+TICK_SECONDS = 30
+
+
+@dataclass
+class MaintenanceTask:
+    """A housekeeping function run every interval_seconds, with its run history."""
+
+    name: str
+    interval_seconds: float
+    func: Callable[[], Any]
+    runs: int = 0
+    failures: int = 0
+    last_run_at: datetime | None = None
+    last_duration_ms: float | None = None
+    last_result: Any = None
+    last_error: str | None = None
+    total_duration_ms: float = 0.0
+    _next_due: float = field(default=0.0, repr=False)
+
+    def due(self, now: float) -> bool:
+        return now >= self._next_due
+
+    def run(self, now: float) -> None:
+        """Run the task once, recording its timing and outcome."""
+        started = perf_counter()
+        try:
+            self.last_result = self.func()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)[:500]
+            logger.exception("Maintenance task %s failed", self.name)
+        finally:
+            self.last_duration_ms = round((perf_counter() - started) * 1000, 2)
+            self.total_duration_ms += self.last_duration_ms
+            self.runs += 1
+            self.last_run_at = datetime.utcnow()
+            self._next_due = now + self.interval_seconds
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "avg_duration_ms": (
+                round(self.total_duration_ms / self.runs, 2) if self.runs else None
+            ),
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+TASKS = [
+    MaintenanceTask("cache_sweep", 60, sweep_expired),
+    MaintenanceTask("token_cleanup", 15 * 60, cleanup_expired_tokens),
+    MaintenanceTask("rate_limit_prune", 15 * 60, prune_rate_limits),
+    MaintenanceTask("email_outbox_prune", 60 * 60, prune_finished),
+    MaintenanceTask("sqlite_optimize", 6 * 60 * 60, optimize_db),
+]
+
+# Serializes passes (background loop vs. an on-demand run)
+_run_lock = threading.Lock()
+
+
+def run_due(tasks: list[MaintenanceTask] | None = None) -> list[str]:
+    """
+    Run every task that is due.
+
+    Returns:
+        Names of the tasks that ran
+    """
+    ran = []
+    with _run_lock:
+        now = monotonic()
+        for task in tasks if tasks is not None else TASKS:
+            if task.due(now):
+                task.run(now)
+                ran.append(task.name)
+    return ran
+
+
+def get_maintenance_stats() -> dict:
+    """Get run timings and outcomes for every maintenance task."""
+    return {task.name: task.stats() for task in TASKS}
+
+
+async def run_scheduler(stop: asyncio.Event, tick: float = TICK_SECONDS) -> None:
+    """Run due maintenance tasks every `tick` seconds until `stop` is set."""
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(run_due)
+        except Exception:
+            logger.exception("Maintenance pass failed")
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=tick)
+        except asyncio.TimeoutError:
+            pass
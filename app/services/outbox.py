@@ -0,0 +1,226 @@
+"""Durable write-behind queue for rows appended to Google Sheets tabs.
+
+Appends are committed to SQLite inside the request and flushed to Sheets by a
+background task in one append_rows call per tab, so request latency no longer
+depends on Sheets write latency (or availability). Rows reach each tab in
+queue order: while a row is backing off, later rows for its tab wait too.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from app.db.sqlite import get_db
+
+if TYPE_CHECKING:
+    from app.services.sheets import SheetsClient
+
+logger = logging.getLogger(__name__)
+
+# Retry backoff for failed flushes (seconds): 5, 10, 20, ... capped at 5 minutes
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 300
+
+# Stop retrying a row after this many failed flushes. It is kept so it can
+# be inspected and re-queued by hand, but no longer shown to readers.
+MAX_ATTEMPTS = 10
+
+# Maximum rows sent per flush pass
+MAX_BATCH_ROWS = 500
+
+# Flushed rows stay visible through pending_rows() for this long. This covers
+# the window in which a tab snapshot cached before the flush is still served.
+FLUSHED_RETENTION_SECONDS = 600
+
+# Serializes flushes (background loop vs. shutdown flush)
+_flush_lock = threading.Lock()
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Get the retry delay after a given number of failed attempts."""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def enqueue(tab: str, data: dict) -> None:
+    """Queue one row for appending to a tab."""
+    enqueue_many(tab, [data])
+
+
+def enqueue_many(tab: str, rows: list[dict]) -> None:
+    """Queue several rows for appending to a tab, in order, in one transaction."""
+    now = datetime.utcnow().isoformat()
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO sheets_outbox (tab, row_json, created_at, next_attempt_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(tab, json.dumps(row, default=str), now, now) for row in rows],
+        )
+
+
+def pending_rows(tab: str, **match: str) -> list[dict]:
+    """
+    Get queued rows for a tab that readers may not see in Sheets data yet.
+
+    Includes rows still waiting to be flushed and rows flushed within the
+    last FLUSHED_RETENTION_SECONDS. Callers de-duplicate against sheet data.
+
+    Args:
+        tab: Tab the rows are queued for
+        **match: Only rows whose fields equal these values (e.g. student_id="stu_001"),
+            filtered in SQL so other rows are not decoded
+    """
+    cutoff = (datetime.utcnow() - timedelta(seconds=FLUSHED_RETENTION_SECONDS)).isoformat()
+    query = """
+        SELECT row_json FROM sheets_outbox
+        WHERE tab = ? AND (flushed_at IS NULL OR flushed_at > ?) AND failed_at IS NULL
+    """
+    params: list = [tab, cutoff]
+    for name, value in match.items():
+        query += " AND CAST(json_extract(row_json, ?) AS TEXT) = ?"
+        params += [f"$.{name}", str(value)]
+    with get_db() as db:
+        rows = db.execute(query + " ORDER BY id", params).fetchall()
+    return [json.loads(row["row_json"]) for row in rows]
+
+
+def flush(client: "SheetsClient", force: bool = False) -> int:
+    """
+    Append due rows to Sheets, one append_rows call per tab.
+
+    Args:
+        client: SheetsClient used to write the rows
+        force: Ignore retry backoff (used for the final flush on shutdown)
+
+    Returns:
+        Number of rows flushed
+    """
+    with _flush_lock:
+        now = datetime.utcnow()
+
+        query = (
+            "SELECT id, tab, row_json, attempts FROM sheets_outbox"
+            " WHERE flushed_at IS NULL AND failed_at IS NULL"
+        )
+        params: tuple = ()
+        if not force:
+            # Due, and not queued behind a row of the same tab that is backing off
+            query += """
+                AND next_attempt_at <= ? AND NOT EXISTS (
+                    SELECT 1 FROM sheets_outbox AS earlier
+                    WHERE earlier.tab = sheets_outbox.tab AND earlier.id < sheets_outbox.id
+                        AND earlier.flushed_at IS NULL AND earlier.failed_at IS NULL
+                        AND earlier.next_attempt_at > ?
+                )
+            """
+            params = (now.isoformat(), now.isoformat())
+        query += " ORDER BY id LIMIT ?"
+
+        with get_db() as db:
+            rows = db.execute(query, (*params, MAX_BATCH_ROWS)).fetchall()
+
+        # Group by tab, keeping queue order within each tab
+        batches: dict[str, list] = {}
+        for row in rows:
+            batches.setdefault(row["tab"], []).append(row)
+
+        flushed = 0
+        for tab, items in batches.items():
+            ids = [item["id"] for item in items]
+            try:
+                client.flush_appends(tab, [json.loads(item["row_json"]) for item in items])
+            except Exception as e:
+                attempts = max(item["attempts"] for item in items) + 1
+                retry_at = now + timedelta(seconds=backoff_seconds(attempts))
+                logger.warning(
+                    "Outbox flush to %s failed (%d rows, attempt %d), retrying at %s: %s",
+                    tab,
+                    len(items),
+                    attempts,
+                    retry_at.isoformat(),
+                    e,
+                )
+                with get_db() as db:
+                    db.executemany(
+                        """
+                        UPDATE sheets_outbox
+                        SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?,
+                            failed_at = CASE WHEN attempts + 1 >= ? THEN ? END
+                        WHERE id = ?
+                        """,
+                        [
+                            (
+                                retry_at.isoformat(),
+                                str(e)[:500],
+                                MAX_ATTEMPTS,
+                                now.isoformat(),
+                                row_id,
+                            )
+                            for row_id in ids
+                        ],
+                    )
+                given_up = sum(item["attempts"] + 1 >= MAX_ATTEMPTS for item in items)
+                if given_up:
+                    logger.error(
+                        "Giving up on %d rows for %s after %d attempts: %s",
+                        given_up,
+                        tab,
+                        MAX_ATTEMPTS,
+                        e,
+                    )
+                continue
+
+            flushed_at = datetime.utcnow().isoformat()
+            with get_db() as db:
+                db.executemany(
+                    "UPDATE sheets_outbox SET flushed_at = ? WHERE id = ?",
+                    [(flushed_at, row_id) for row_id in ids],
+                )
+            flushed += len(items)
+            logger.info("Outbox flushed %d rows to %s", len(items), tab)
+
+        prune_flushed()
+        return flushed
+
+
+def get_outbox_stats() -> dict:
+    """Count rows waiting to be flushed and rows given up on."""
+    with get_db() as db:
+        row = db.execute(
+            """
+            SELECT
+                TOTAL(flushed_at IS NULL AND failed_at IS NULL) AS pending,
+                TOTAL(failed_at IS NOT NULL) AS failed
+            FROM sheets_outbox
+            """
+        ).fetchone()
+    return {"pending": int(row["pending"]), "failed": int(row["failed"])}
+
+
+def prune_flushed() -> int:
+    """Delete flushed rows past the visibility window. Returns rows deleted."""
+    cutoff = (datetime.utcnow() - timedelta(seconds=FLUSHED_RETENTION_SECONDS)).isoformat()
+    with get_db() as db:
+        cursor = db.execute(
+            "DELETE FROM sheets_outbox WHERE flushed_at IS NOT NULL AND flushed_at < ?",
+            (cutoff,),
+        )
+        return cursor.rowcount
+
+
+async def run_flusher(client: "SheetsClient", stop: asyncio.Event, interval: float) -> None:
+    """Flush the outbox every `interval` seconds until `stop` is set."""
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(flush, client)
+        except Exception:
+            logger.exception("Outbox flush pass failed")
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
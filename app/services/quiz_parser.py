@@ -2,12 +2,14 @@
 
 import logging
 import re
+import threading
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+from time import monotonic
 
 import yaml
 
 from app.models.quiz import Question, Quiz
-from app.services.cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -183,10 +185,96 @@ def parse_question(q_id: str, q_type: str, points: int, content: str) -> Questio
         return None
 
 
-@cached(ttl_seconds=900, prefix="quiz_content")
+@dataclass
+class _QuizFile:
+    """A parsed quiz file and the stat it was parsed at."""
+
+    mtime_ns: int
+    size: int
+    quiz: Quiz | None  # None if the file failed to parse
+    checked_at: float  # monotonic time of the last stat
+    by_id: dict[str, Quiz] = field(default_factory=dict)  # views with quiz_id assigned
+
+
+class QuizRegistry:
+    """
+    Parsed quizzes, keyed by file and reloaded only when a file changes.
+
+    Every quiz under content/*/quizzes is parsed once at startup. Lookups
+    are dictionary reads; a file is re-stat'ed at most every
+    STAT_INTERVAL_SECONDS and re-parsed only if its mtime or size changed.
+    """
+
+    STAT_INTERVAL_SECONDS = 5.0
+
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+        self._files: dict[Path, _QuizFile] = {}
+        self._lock = threading.Lock()
+
+    def load_all(self) -> int:
+        """Parse every quiz file under content/*/quizzes. Returns the number parsed."""
+        paths = sorted(self.base_path.glob("content/*/quizzes/*.md"))
+        for path in paths:
+            self._reload(path)
+        logger.info("Quiz registry loaded %d quizzes", len(paths))
+        return len(paths)
+
+    def get(self, content_path: str, quiz_id: str) -> Quiz | None:
+        """Get the parsed quiz at a content path (relative to the project root)."""
+        path = self.base_path / content_path
+        entry = self._files.get(path)
+        if entry is None or monotonic() - entry.checked_at > self.STAT_INTERVAL_SECONDS:
+            entry = self._reload(path)
+            if entry is None:
+                return None
+
+        if entry.quiz is None:
+            return None
+        quiz = entry.by_id.get(quiz_id)
+        if quiz is None:
+            quiz = entry.by_id.setdefault(quiz_id, replace(entry.quiz, quiz_id=quiz_id))
+        return quiz
+
+    def _reload(self, path: Path) -> _QuizFile | None:
+        """Stat a file and re-parse it if it changed since it was last parsed."""
+        with self._lock:
+            try:
+                stat = path.stat()
+            except OSError:
+                if self._files.pop(path, None) is not None:
+                    logger.warning("Quiz file removed: %s", path)
+                else:
+                    logger.error("Quiz file not found: %s", path)
+                return None
+
+            entry = self._files.get(path)
+            if entry is not None and (entry.mtime_ns, entry.size) == (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                entry.checked_at = monotonic()
+                return entry
+
+            if entry is not None:
+                logger.info("Quiz file changed, reloading: %s", path)
+            entry = _QuizFile(
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                quiz=parse_quiz_file(path, quiz_id=""),
+                checked_at=monotonic(),
+            )
+            self._files[path] = entry
+            return entry
+
+
+# Project root (content paths in the Quizzes sheet are relative to it)
+registry = QuizRegistry(Path(__file__).parent.parent.parent)
+
+
 def get_parsed_quiz(content_path: str, quiz_id: str) -> Quiz | None:
     """
-    Get a parsed quiz from a content path (with caching).
+    Get a parsed quiz from a content path (served from the quiz registry).
 
     Args:
         content_path: Relative path to quiz markdown file
@@ -195,8 +283,4 @@ def get_parsed_quiz(content_path: str, quiz_id: str) -> Quiz | None:
     Returns:
         Parsed Quiz object or None
     """
-    # Resolve path relative to project root
-    base_path = Path(__file__).parent.parent.parent  # Go up from services to project root
-    file_path = base_path / content_path
-
-    return parse_quiz_file(file_path, quiz_id)
+    return registry.get(content_path, quiz_id)
@@ -0,0 +1,324 @@
+"""Admin-triggered regrading of stored quiz submissions.
+
+After an answer key is corrected, a regrade job reads every stored
+submission of the quiz (with its sheet row number), re-grades the stored
+answers against the current quiz, and writes back only rows whose score or
+autograde result changed. Writes go out in batched range updates spaced
+apart, so a few thousand submissions stay well within the Sheets write
+quota. Each batch is checked against a fresh sync first, and the job stops
+if rows now hold other submissions (e.g. rows deleted or sorted in the
+sheet mid-job). All blocking work runs in worker threads, off the event loop.
+
+Job progress is saved in SQLite. Jobs still running at shutdown are
+cancelled and resumed on the next startup: the resumed job re-reads and
+re-diffs the quiz's rows, so rows already written are not written again.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from app.db.sqlite import get_db
+from app.models.quiz import Quiz
+from app.services.grading import compile_quiz
+from app.services.quiz_parser import get_parsed_quiz
+
+if TYPE_CHECKING:
+    from app.services.sheets import SheetsClient
+
+logger = logging.getLogger(__name__)
+
+# Rows graded per worker-thread step (progress is reported between steps)
+GRADE_CHUNK_ROWS = 500
+
+# Rows per batch_update request, and the pause between requests
+WRITE_BATCH_ROWS = 200
+WRITE_PAUSE_SECONDS = 2.0
+
+# Finished jobs kept for the progress endpoint (in memory and in SQLite)
+MAX_JOBS = 20
+
+_jobs: OrderedDict[str, "RegradeJob"] = OrderedDict()
+_running: dict[str, "RegradeJob"] = {}  # by quiz_id
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class RegradeJob:
+    """Progress of one regrade run."""
+
+    job_id: str
+    quiz_id: str
+    status: str = "pending"  # pending, running, done, failed
+    total: int = 0
+    graded: int = 0
+    skipped: int = 0  # rows whose stored answers could not be read
+    changed: int = 0
+    written: int = 0
+    error: str | None = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "quiz_id": self.quiz_id,
+            "status": self.status,
+            "total": self.total,
+            "graded": self.graded,
+            "skipped": self.skipped,
+            "changed": self.changed,
+            "written": self.written,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _stored_autograde(value) -> dict | None:
+    try:
+        return json.loads(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def diff_rows(quiz: Quiz, rows: list[tuple[int, dict]]) -> tuple[dict[int, dict], int]:
+    """
+    Re-grade stored submissions and collect the ones whose result changed.
+
+    Args:
+        quiz: Quiz with the current answer key
+        rows: (sheet row number, raw submission record) pairs
+
+    Returns:
+        Tuple of (sheet row number -> fields to write, rows skipped)
+    """
+    plan = compile_quiz(quiz)
+    updates = {}
+    skipped = 0
+    for row_num, record in rows:
+        try:
+            answers = json.loads(record.get("answers_json") or "{}")
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        if not isinstance(answers, dict):
+            skipped += 1
+            continue
+
+        result = plan.grade(answers)
+        autograde = json.loads(json.dumps(result.to_autograde_json()))
+        if (
+            _number(record.get("score")) != result.score
+            or _number(record.get("max_score")) != result.max_score
+            or _stored_autograde(record.get("autograde_json")) != autograde
+        ):
+            updates[row_num] = {
+                "score": result.score,
+                "max_score": result.max_score,
+                "autograde_json": json.dumps(autograde),
+            }
+    return updates, skipped
+
+
+def _save(job: RegradeJob) -> None:
+    """Write a job's progress to SQLite, pruning old finished jobs once it ends."""
+    with get_db() as db:
+        db.execute(
+            """
+            INSERT OR REPLACE INTO regrade_jobs
+                (job_id, quiz_id, status, total, graded, skipped, changed, written,
+                 error, started_at, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                job.job_id,
+                job.quiz_id,
+                job.status,
+                job.total,
+                job.graded,
+                job.skipped,
+                job.changed,
+                job.written,
+                job.error,
+                job.started_at.isoformat(),
+                job.finished_at.isoformat() if job.finished_at else None,
+            ),
+        )
+        if job.finished_at is not None:
+            db.execute(
+                """
+                DELETE FROM regrade_jobs WHERE finished_at IS NOT NULL AND job_id NOT IN (
+                    SELECT job_id FROM regrade_jobs WHERE finished_at IS NOT NULL
+                    ORDER BY finished_at DESC LIMIT ?
+                )
+                """,
+                (MAX_JOBS,),
+            )
+
+
+def _job_from_row(row) -> RegradeJob:
+    return RegradeJob(
+        job_id=row["job_id"],
+        quiz_id=row["quiz_id"],
+        status=row["status"],
+        total=row["total"],
+        graded=row["graded"],
+        skipped=row["skipped"],
+        changed=row["changed"],
+        written=row["written"],
+        error=row["error"],
+        started_at=datetime.fromisoformat(row["started_at"]),
+        finished_at=datetime.fromisoformat(row["finished_at"]) if row["finished_at"] else None,
+    )
+
+
+def _load_quiz(client: "SheetsClient", quiz_id: str) -> Quiz | None:
+    """Parse a quiz's current content, for resuming its regrade."""
+    quiz_meta = client.get_quiz_by_id(quiz_id)
+    if quiz_meta is None:
+        return None
+    return get_parsed_quiz(quiz_meta.content_path, quiz_id)
+
+
+async def _run(job: RegradeJob, client: "SheetsClient", quiz: Quiz | None) -> None:
+    job.status = "running"
+    # Rows written before a restart no longer differ; they still count as changed
+    written_before = job.written
+    job.graded = job.skipped = 0
+    try:
+        if quiz is None:
+            quiz = await asyncio.to_thread(_load_quiz, client, job.quiz_id)
+            if quiz is None:
+                raise ValueError("Quiz content could not be loaded")
+        rows = await asyncio.to_thread(client.get_submission_rows, job.quiz_id)
+        records = dict(rows)
+        job.total = len(rows)
+
+        updates: dict[int, dict] = {}
+        for start in range(0, len(rows), GRADE_CHUNK_ROWS):
+            chunk = rows[start : start + GRADE_CHUNK_ROWS]
+            chunk_updates, skipped = await asyncio.to_thread(diff_rows, quiz, chunk)
+            updates.update(chunk_updates)
+            job.skipped += skipped
+            job.graded += len(chunk) - skipped
+            job.changed = written_before + len(updates)
+        _save(job)
+
+        items = sorted(updates.items())
+        for start in range(0, len(items), WRITE_BATCH_ROWS):
+            if start:
+                await asyncio.sleep(WRITE_PAUSE_SECONDS)
+            batch = dict(items[start : start + WRITE_BATCH_ROWS])
+            expected = {row_num: records[row_num] for row_num in batch}
+            await asyncio.to_thread(client.update_submission_rows, batch, expected)
+            job.written += len(batch)
+            _save(job)
+
+        job.status = "done"
+        logger.info(
+            "Regrade %s of %s: %d graded, %d changed, %d skipped",
+            job.job_id,
+            job.quiz_id,
+            job.graded,
+            job.changed,
+            job.skipped,
+        )
+    except asyncio.CancelledError:
+        # Shutting down; the job stays running in SQLite and resumes on restart
+        logger.info(
+            "Regrade %s of %s interrupted at %d written", job.job_id, job.quiz_id, job.written
+        )
+        raise
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)[:500]
+        logger.exception("Regrade %s of %s failed", job.job_id, job.quiz_id)
+    finally:
+        if job.status in ("done", "failed"):
+            job.finished_at = datetime.utcnow()
+        _save(job)
+        _running.pop(job.quiz_id, None)
+
+
+def _launch(job: RegradeJob, client: "SheetsClient", quiz: Quiz | None) -> None:
+    """Track a job and run it in a background task."""
+    _jobs[job.job_id] = job
+    while len(_jobs) > MAX_JOBS:
+        _jobs.popitem(last=False)
+    _running[job.quiz_id] = job
+
+    task = asyncio.create_task(_run(job, client, quiz))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def start_regrade(client: "SheetsClient", quiz: Quiz) -> RegradeJob:
+    """
+    Start regrading a quiz in the background (call from the event loop).
+
+    If a regrade of the quiz is already running, that job is returned.
+    """
+    job = _running.get(quiz.quiz_id)
+    if job is not None:
+        return job
+
+    job = RegradeJob(job_id=uuid.uuid4().hex[:12], quiz_id=quiz.quiz_id)
+    _save(job)
+    _launch(job, client, quiz)
+    return job
+
+
+def resume_jobs(client: "SheetsClient") -> int:
+    """
+    Restart jobs left unfinished by the last shutdown (call from the event loop).
+
+    Each quiz is re-read when its job starts, so a key corrected again in
+    the meantime is the one applied.
+
+    Returns:
+        Number of jobs resumed
+    """
+    with get_db() as db:
+        rows = db.execute(
+            "SELECT * FROM regrade_jobs WHERE status IN ('pending', 'running') ORDER BY started_at"
+        ).fetchall()
+    resumed = 0
+    for row in rows:
+        job = _job_from_row(row)
+        if job.quiz_id in _running:
+            continue
+        logger.info("Resuming regrade %s of %s", job.job_id, job.quiz_id)
+        _launch(job, client, None)
+        resumed += 1
+    return resumed
+
+
+async def shutdown() -> None:
+    """Cancel running jobs and wait for them to stop; their progress stays saved."""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def get_job(job_id: str) -> RegradeJob | None:
+    """Get a regrade job by ID."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    with get_db() as db:
+        row = db.execute("SELECT * FROM regrade_jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return None if row is None else _job_from_row(row)
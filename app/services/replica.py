@@ -0,0 +1,387 @@
+"""Local SQLite read replica of the Google Sheets tabs.
+
+Sheets stays the system of record: writes go to Sheets first and are then
+patched into the replica. Reads are served from the replica, which a
+background task keeps in sync, so pages keep working while Sheets is slow,
+unavailable or out of quota.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from gspread.utils import numericise, rowcol_to_a1
+
+from app.db.sqlite import get_db
+
+if TYPE_CHECKING:
+    import gspread
+
+    from app.services.sheets import SheetsClient
+
+logger = logging.getLogger(__name__)
+
+# Data rows start on sheet row 2 (row 1 holds the headers)
+FIRST_DATA_ROW = 2
+
+# Tabs that only ever grow at the bottom; these are tail-synced
+APPEND_ONLY_TABS = {"Quiz_Submissions"}
+
+# Tail-synced tabs still do a full reload this often, to pick up edits made
+# above the last synced row (e.g. a manually corrected score)
+FULL_RESYNC_SECONDS = 900  # 15 minutes
+
+# One sync per tab at a time (background syncer vs. inline cold-start syncs)
+_tab_locks: dict[str, threading.Lock] = {}
+_tab_locks_guard = threading.Lock()
+
+
+@dataclass
+class TabState:
+    """Sync bookkeeping for one replicated tab."""
+
+    tab: str
+    headers: list[str]
+    last_row: int  # sheet row number of the last replicated row (1 if none)
+    content_hash: str
+    generation: int  # bumped whenever existing rows change (not on appends)
+    synced_at: datetime
+    full_synced_at: datetime
+
+
+def _tab_lock(tab: str) -> threading.Lock:
+    with _tab_locks_guard:
+        return _tab_locks.setdefault(tab, threading.Lock())
+
+
+def _trim(row: list) -> list:
+    """Drop trailing blank cells so rows compare equal regardless of padding."""
+    end = len(row)
+    while end and row[end - 1] in ("", None):
+        end -= 1
+    return list(row[:end])
+
+
+# content_hash is the sum of per-row hashes (each keyed by its row number),
+# so appends and patches update it without re-reading the whole tab
+_HASH_MOD = 2**160
+
+
+def _row_hash(row_num: int, record: dict) -> int:
+    payload = json.dumps([row_num, record], sort_keys=True, default=str).encode()
+    return int(hashlib.sha1(payload).hexdigest(), 16)
+
+
+def _hash_records(records: list[dict]) -> str:
+    return _combine_hash(
+        "", [_row_hash(pos + FIRST_DATA_ROW, record) for pos, record in enumerate(records)]
+    )
+
+
+def _combine_hash(content_hash: str, added: list[int], removed: list[int] | None = None) -> str:
+    """Add and remove row hashes from a tab's content hash."""
+    total = int(content_hash or "0", 16) + sum(added) - sum(removed or [])
+    return f"{total % _HASH_MOD:040x}"
+
+
+def _cell_value(tab: str, value: object) -> object:
+    """
+    Convert a value written to Sheets into what a sync reads back for it.
+
+    Append-only tabs are loaded with get_all_values (formatted strings),
+    others with get_all_records (numbers parsed). Matching this keeps a
+    patched row equal to the synced one, so the tail anchor and content
+    hash do not see the app's own writes as edits.
+    """
+    if value is None:
+        text = ""
+    elif isinstance(value, bool):
+        text = "TRUE" if value else "FALSE"
+    elif isinstance(value, float) and value.is_integer():
+        text = str(int(value))
+    else:
+        text = str(value)
+    return text if tab in APPEND_ONLY_TABS else numericise(text)
+
+
+def tab_state(tab: str) -> TabState | None:
+    """Get a tab's sync state, or None if it has never been replicated."""
+    with get_db() as db:
+        row = db.execute("SELECT * FROM replica_tabs WHERE tab = ?", (tab,)).fetchone()
+    if row is None:
+        return None
+    return TabState(
+        tab=row["tab"],
+        headers=json.loads(row["headers_json"]),
+        last_row=row["last_row"],
+        content_hash=row["content_hash"],
+        generation=row["generation"],
+        synced_at=datetime.fromisoformat(row["synced_at"]),
+        full_synced_at=datetime.fromisoformat(row["full_synced_at"]),
+    )
+
+
+def read_records(tab: str) -> list[dict] | None:
+    """
+    Get all replicated records of a tab in sheet order.
+
+    Returns None if the tab has never been replicated (as opposed to an
+    empty tab), so callers can fall back to a direct Sheets read.
+    """
+    with get_db() as db:
+        if db.execute("SELECT 1 FROM replica_tabs WHERE tab = ?", (tab,)).fetchone() is None:
+            return None
+        rows = db.execute(
+            "SELECT record_json FROM replica_rows WHERE tab = ? ORDER BY row_num", (tab,)
+        ).fetchall()
+    return [json.loads(row["record_json"]) for row in rows]
+
+
+def read_records_after(tab: str, row_num: int) -> list[tuple[int, dict]]:
+    """Get (sheet row number, record) pairs for rows below row_num."""
+    with get_db() as db:
+        rows = db.execute(
+            """
+            SELECT row_num, record_json FROM replica_rows
+            WHERE tab = ? AND row_num > ?
+            ORDER BY row_num
+            """,
+            (tab, row_num),
+        ).fetchall()
+    return [(row["row_num"], json.loads(row["record_json"])) for row in rows]
+
+
+def read_rows(tab: str, row_nums: list[int]) -> dict[int, dict]:
+    """Get sheet row number -> record for the given rows (missing rows are left out)."""
+    if not row_nums:
+        return {}
+    with get_db() as db:
+        rows = db.execute(
+            f"""
+            SELECT row_num, record_json FROM replica_rows
+            WHERE tab = ? AND row_num IN ({", ".join("?" * len(row_nums))})
+            """,
+            (tab, *row_nums),
+        ).fetchall()
+    return {row["row_num"]: json.loads(row["record_json"]) for row in rows}
+
+
+def sync_tab(worksheet: "gspread.Worksheet", tab: str) -> bool:
+    """
+    Bring a tab's replica up to date with the sheet.
+
+    Append-only tabs fetch only rows below the last replicated one, falling
+    back to a full reload when that row no longer matches or every
+    FULL_RESYNC_SECONDS. Other tabs are re-read whole and only rewritten
+    when their content changed.
+
+    Returns:
+        True if the replica changed
+    """
+    with _tab_lock(tab):
+        state = tab_state(tab)
+        now = datetime.utcnow()
+        if tab in APPEND_ONLY_TABS:
+            if (
+                state is not None
+                and (now - state.full_synced_at).total_seconds() <= FULL_RESYNC_SECONDS
+            ):
+                changed = _tail_sync(worksheet, state, now)
+                if changed is not None:
+                    return changed
+            return _full_sync_values(worksheet, tab, state, now)
+        return _full_sync_records(worksheet, tab, state, now)
+
+
+def _replace(
+    tab: str,
+    state: TabState | None,
+    headers: list[str],
+    records: list[dict],
+    now: datetime,
+) -> bool:
+    """Store a full copy of a tab if its content changed. Returns True if it did."""
+    content_hash = _hash_records(records)
+    with get_db() as db:
+        if state is not None and state.content_hash == content_hash:
+            db.execute(
+                "UPDATE replica_tabs SET synced_at = ?, full_synced_at = ? WHERE tab = ?",
+                (now.isoformat(), now.isoformat(), tab),
+            )
+            return False
+
+        db.execute("DELETE FROM replica_rows WHERE tab = ?", (tab,))
+        db.executemany(
+            "INSERT INTO replica_rows (tab, row_num, record_json) VALUES (?, ?, ?)",
+            [
+                (tab, pos + FIRST_DATA_ROW, json.dumps(record, default=str))
+                for pos, record in enumerate(records)
+            ],
+        )
+        db.execute(
+            """
+            INSERT INTO replica_tabs
+                (tab, headers_json, last_row, content_hash, generation, synced_at, full_synced_at)
+            VALUES (?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT(tab) DO UPDATE SET
+                headers_json = excluded.headers_json,
+                last_row = excluded.last_row,
+                content_hash = excluded.content_hash,
+                generation = replica_tabs.generation + 1,
+                synced_at = excluded.synced_at,
+                full_synced_at = excluded.full_synced_at
+            """,
+            (
+                tab,
+                json.dumps(headers),
+                len(records) + FIRST_DATA_ROW - 1,
+                content_hash,
+                now.isoformat(),
+                now.isoformat(),
+            ),
+        )
+    logger.info("Replicated %s: %d rows", tab, len(records))
+    return True
+
+
+def _full_sync_records(
+    worksheet: "gspread.Worksheet", tab: str, state: TabState | None, now: datetime
+) -> bool:
+    records = worksheet.get_all_records()
+    headers = list(records[0].keys()) if records else []
+    return _replace(tab, state, headers, records, now)
+
+
+def _full_sync_values(
+    worksheet: "gspread.Worksheet", tab: str, state: TabState | None, now: datetime
+) -> bool:
+    values = worksheet.get_all_values()
+    headers = [str(h) for h in values[0]] if values else []
+    records = [dict(zip(headers, row)) for row in values[1:]]
+    return _replace(tab, state, headers, records, now)
+
+
+def _tail_sync(worksheet: "gspread.Worksheet", state: TabState, now: datetime) -> bool | None:
+    """
+    Fetch rows below the last replicated one.
+
+    Re-reads the last replicated row (or the header row) as an anchor.
+    Returns None if it no longer matches or the tab shrank, meaning a full
+    reload is needed; otherwise whether new rows were added.
+    """
+    if not state.headers:
+        return None
+
+    if state.last_row < FIRST_DATA_ROW:
+        anchor = _trim(state.headers)
+    else:
+        with get_db() as db:
+            last = db.execute(
+                "SELECT record_json FROM replica_rows WHERE tab = ? AND row_num = ?",
+                (state.tab, state.last_row),
+            ).fetchone()
+        if last is None:
+            return None
+        record = json.loads(last["record_json"])
+        anchor = _trim([record.get(h, "") for h in state.headers])
+
+    last_col = rowcol_to_a1(1, len(state.headers))[:-1]
+    values = worksheet.get_all_values(f"A{state.last_row}:{last_col}")
+    if not values or _trim(values[0]) != anchor:
+        logger.info("%s changed above row %d, reloading", state.tab, state.last_row)
+        return None
+
+    new_rows = [
+        (state.last_row + 1 + i, dict(zip(state.headers, row))) for i, row in enumerate(values[1:])
+    ]
+    content_hash = _combine_hash(
+        state.content_hash, [_row_hash(row_num, record) for row_num, record in new_rows]
+    )
+    with get_db() as db:
+        db.executemany(
+            "INSERT INTO replica_rows (tab, row_num, record_json) VALUES (?, ?, ?)",
+            [(state.tab, row_num, json.dumps(record)) for row_num, record in new_rows],
+        )
+        db.execute(
+            "UPDATE replica_tabs SET last_row = ?, content_hash = ?, synced_at = ? WHERE tab = ?",
+            (state.last_row + len(new_rows), content_hash, now.isoformat(), state.tab),
+        )
+    if new_rows:
+        logger.info("%s tail sync: %d new rows", state.tab, len(new_rows))
+    return bool(new_rows)
+
+
+def patch_rows(tab: str, updates: dict[int, dict[str, object]]) -> None:
+    """
+    Apply field changes just written to Sheets to the replicated rows.
+
+    Values are stored as a sync would read them back, and the content hash
+    is updated for the patched rows only, so a later sync that finds the
+    sheet holding what the app wrote sees no change. The generation still
+    moves on: existing rows changed, so readers holding derived state
+    rebuild.
+
+    Args:
+        tab: Worksheet name
+        updates: Sheet row number -> {column header: new value}
+    """
+    with _tab_lock(tab), get_db() as db:
+        patched = []
+        removed, added = [], []
+        for row_num, fields in updates.items():
+            row = db.execute(
+                "SELECT record_json FROM replica_rows WHERE tab = ? AND row_num = ?",
+                (tab, row_num),
+            ).fetchone()
+            if row is None:
+                continue
+            record = json.loads(row["record_json"])
+            removed.append(_row_hash(row_num, record))
+            record.update({name: _cell_value(tab, value) for name, value in fields.items()})
+            added.append(_row_hash(row_num, record))
+            patched.append((json.dumps(record, default=str), tab, row_num))
+
+        if patched:
+            db.executemany(
+                "UPDATE replica_rows SET record_json = ? WHERE tab = ? AND row_num = ?", patched
+            )
+            state = db.execute(
+                "SELECT content_hash FROM replica_tabs WHERE tab = ?", (tab,)
+            ).fetchone()
+            db.execute(
+                """
+                UPDATE replica_tabs SET generation = generation + 1, content_hash = ?
+                WHERE tab = ?
+                """,
+                (_combine_hash(state["content_hash"] if state else "", added, removed), tab),
+            )
+
+
+def clear(tab: str | None = None) -> None:
+    """Drop replicated data for one tab, or for all tabs."""
+    with get_db() as db:
+        if tab is None:
+            db.execute("DELETE FROM replica_rows")
+            db.execute("DELETE FROM replica_tabs")
+        else:
+            db.execute("DELETE FROM replica_rows WHERE tab = ?", (tab,))
+            db.execute("DELETE FROM replica_tabs WHERE tab = ?", (tab,))
+
+
+async def run_syncer(client: "SheetsClient", stop: asyncio.Event, interval: float) -> None:
+    """Sync every replicated tab every `interval` seconds until `stop` is set."""
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(client.sync_replica)
+        except Exception:
+            logger.exception("Replica sync pass failed")
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
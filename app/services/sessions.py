@@ -1,8 +1,13 @@
 """Session management using JWT tokens."""
 
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from time import time
+from typing import Iterable
 
 from jose import JWTError, jwt
 
@@ -15,6 +20,25 @@ ALGORITHM = "HS256"
 SESSION_TTL_DAYS = 7
 COOKIE_NAME = "session"
 
+ROLE_ADMIN = "admin"
+ROLE_STUDENT = "student"
+
+# Recently verified tokens, by SHA-256 digest, so repeat requests skip the
+# HMAC check: {digest: SessionData}
+VERIFIED_CACHE_MAX_ENTRIES = 1024
+_verified: OrderedDict[str, "SessionData"] = OrderedDict()
+_verified_lock = threading.Lock()
+
+# When the claims sessions carry (role, onboarding state) last changed,
+# globally and per student. Sessions issued earlier are re-issued. Starts at
+# import time, so every session is refreshed once after a restart.
+# This state is per process: with several workers, each notices a change
+# when its own sync or write sees it. Per-student entries are kept in
+# insertion order and dropped once older than any session could be.
+_claims_changed_at = time()
+_student_claims_changed_at: dict[str, float] = {}
+_claims_lock = threading.Lock()
+
 
 @dataclass
 class SessionData:
@@ -23,15 +47,46 @@ class SessionData:
     email: str
     student_id: str
     exp: datetime
-
-
-def create_session_token(email: str, student_id: str) -> str:
+    role: str | None = None  # None for sessions issued without claims
+    onboarded: bool = False
+    issued_at: float = 0.0
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == ROLE_ADMIN
+
+    @property
+    def claims_current(self) -> bool:
+        """Whether the role and onboarding claims postdate the last roster/config change."""
+        if self.role is None:
+            return False
+        changed_at = max(_claims_changed_at, _student_claims_changed_at.get(self.student_id, 0.0))
+        return self.issued_at > changed_at
+
+
+def role_for(email: str, admin_emails: str | Iterable[str] | None) -> str:
+    """Get the session role for an email, given the configured admin email(s)."""
+    if isinstance(admin_emails, str):
+        admin_emails = [admin_emails]
+    admins = {admin.strip().lower() for admin in admin_emails or () if admin}
+    return ROLE_ADMIN if email.strip().lower() in admins else ROLE_STUDENT
+
+
+def create_session_token(
+    email: str,
+    student_id: str,
+    role: str | None = None,
+    onboarded: bool = False,
+) -> str:
     """
     Create a JWT session token.
 
     Args:
         email: Student email
         student_id: Student ID
+        role: ROLE_ADMIN or ROLE_STUDENT; without it the session is
+            re-issued with claims on its first request
+        onboarded: Whether the student has completed onboarding
 
     Returns:
         Encoded JWT token
@@ -41,7 +96,11 @@ def create_session_token(email: str, student_id: str) -> str:
         "email": email,
         "student_id": student_id,
         "exp": expires,
+        "iat": time(),
+        "onboarded": onboarded,
     }
+    if role is not None:
+        payload["role"] = role
 
     token = jwt.encode(payload, settings.secret_key, algorithm=ALGORITHM)
     logger.info("Created session for %s (student: %s)", email, student_id)
@@ -52,19 +111,34 @@ def verify_session_token(token: str) -> SessionData | None:
     """
     Verify and decode a JWT session token.
 
+    Tokens verified recently are served from a bounded in-memory cache
+    until they expire.
+
     Args:
         token: JWT token to verify
 
     Returns:
         SessionData if valid, None otherwise
     """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    with _verified_lock:
+        session = _verified.get(digest)
+        if session is not None:
+            if session.exp > datetime.now():
+                _verified.move_to_end(digest)
+                return session
+            del _verified[digest]
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
 
-        return SessionData(
+        session = SessionData(
             email=payload["email"],
             student_id=payload["student_id"],
             exp=datetime.fromtimestamp(payload["exp"]),
+            role=payload.get("role"),
+            onboarded=bool(payload.get("onboarded", False)),
+            issued_at=float(payload.get("iat", 0.0)),
         )
     except JWTError as e:
         logger.warning("Invalid session token: %s", e)
@@ -73,6 +147,40 @@ def verify_session_token(token: str) -> SessionData | None:
         logger.warning("Malformed session token, missing key: %s", e)
         return None
 
+    with _verified_lock:
+        _verified[digest] = session
+        while len(_verified) > VERIFIED_CACHE_MAX_ENTRIES:
+            _verified.popitem(last=False)
+    return session
+
+
+def mark_claims_changed(student_id: str | None = None) -> None:
+    """
+    Record that session claims may be out of date.
+
+    Sessions issued before this call are re-issued on their next request:
+    every session, or only the given student's.
+    """
+    global _claims_changed_at
+    now = time()
+    with _claims_lock:
+        if student_id is None:
+            # Supersedes every per-student change
+            _claims_changed_at = now
+            _student_claims_changed_at.clear()
+            return
+        _student_claims_changed_at.pop(student_id, None)
+        _student_claims_changed_at[student_id] = now
+        cutoff = now - SESSION_TTL_DAYS * 86400
+        while next(iter(_student_claims_changed_at.values())) < cutoff:
+            _student_claims_changed_at.pop(next(iter(_student_claims_changed_at)))
+
+
+def clear_verified_sessions() -> None:
+    """Forget every cached token verification."""
+    with _verified_lock:
+        _verified.clear()
+
 
 def get_cookie_settings() -> dict:
     """
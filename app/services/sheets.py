@@ -1,18 +1,36 @@
 """Google Sheets client for data access."""
 
+import asyncio
+import functools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable
 
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.utils import rowcol_to_a1
 
 from app.config import settings
+from app.db.sqlite import invalidate_cached_student, set_cached_students
 from app.models.book_reading import BookChapter
 from app.models.quiz import QuizMeta, QuizSubmission
 from app.models.roster import RosterEntry
 from app.models.schedule import ScheduleEntry
-from app.services.cache import cached, invalidate
+from app.services import gradebook, outbox, replica
+from app.services.cache import cached, invalidate_tags
+from app.services.gradebook import QuizGradeStats, StudentGrade
+from app.services.sessions import mark_claims_changed
+from app.services.snapshot import (
+    FIRST_DATA_ROW,
+    SubmissionIndex,
+    SubmissionsLog,
+    TabSnapshot,
+    cell_key,
+    email_key,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +39,13 @@ class SheetsUnavailableError(Exception):
     """Raised when the Google Sheets API is unreachable or rate-limited."""
 
 
+class StaleRowsError(Exception):
+    """Raised when sheet rows no longer hold the records a write was planned for."""
+
+
+# Fields identifying a stored submission
+SUBMISSION_KEY_FIELDS = ("submitted_at", "quiz_id", "attempt", "student_id")
+
 # Google Sheets API scopes
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -33,6 +58,55 @@ CACHE_TTL_QUIZZES = 300  # 5 minutes
 CACHE_TTL_SCHEDULE = 300  # 5 minutes
 CACHE_TTL_SUBMISSIONS = 120  # 2 minutes
 CACHE_TTL_BOOK_READING = 300  # 5 minutes
+CACHE_TTL_HEADERS = 600  # 10 minutes
+
+# Tabs mirrored into the local read replica, and the cache tag their reads use
+REPLICA_CACHE_TAGS = {
+    "Config": "config",
+    "Roster": "roster",
+    "Schedule": "schedule",
+    "Quizzes": "quizzes",
+    "Book_Reading": "book_reading",
+    "Quiz_Submissions": "submissions",
+}
+
+# Rarely-changing tabs keep serving their last value for this long past the TTL
+# while a background refresh fetches the new one
+CACHE_STALE_TTL = 900  # 15 minutes
+
+
+def _admin_emails(config_records: list[dict]) -> set[str]:
+    return {
+        str(r.get("value", "")).strip().lower()
+        for r in config_records
+        if r.get("key") == "admin_email"
+    }
+
+
+def _onboarded(roster_records: list[dict]) -> dict[str, bool]:
+    return {
+        str(r["student_id"]): bool(r.get("onboarding_completed_at"))
+        for r in roster_records
+        if r.get("student_id")
+    }
+
+
+def _mark_stale_claims(tab: str, before: list[dict], after: list[dict]) -> None:
+    """
+    Re-issue the sessions whose claims depend on rows that changed in a sync.
+
+    A new admin_email in Config affects every session; an onboarding change
+    in Roster affects only that student's.
+    """
+    if tab == "Config":
+        if _admin_emails(before) != _admin_emails(after):
+            mark_claims_changed()
+        return
+
+    old, new = _onboarded(before), _onboarded(after)
+    for student_id in old.keys() | new.keys():
+        if old.get(student_id) != new.get(student_id):
+            mark_claims_changed(student_id)
 
 
 class SheetsClient:
@@ -41,6 +115,7 @@ class SheetsClient:
     def __init__(self):
         self._client: gspread.Client | None = None
         self._spreadsheet: gspread.Spreadsheet | None = None
+        self._submissions_log = SubmissionsLog()
 
     def _get_client(self) -> gspread.Client:
         """Get or create gspread client."""
@@ -69,6 +144,105 @@ class SheetsClient:
         spreadsheet = self._get_spreadsheet()
         return spreadsheet.worksheet(name)
 
+    @cached(ttl_seconds=CACHE_TTL_HEADERS, prefix="headers")
+    def _get_header_map(self, tab: str) -> dict[str, int]:
+        """Get a tab's header name -> 1-based column number map."""
+        headers = self._get_worksheet(tab).row_values(1)
+        return {name: col for col, name in enumerate(headers, start=1) if name}
+
+    def _batch_update_rows(self, tab: str, updates: dict[int, dict[str, object]]) -> int:
+        """
+        Write field changes for one or more rows in a single batch_update request.
+
+        Args:
+            tab: Worksheet name
+            updates: Sheet row number -> {column header: new value}
+
+        Returns the number of cells written. Fields without a matching header
+        column are skipped.
+        """
+        header_map = self._get_header_map(tab)
+
+        data = []
+        for row_num, fields in updates.items():
+            for field_name, value in fields.items():
+                col_num = header_map.get(field_name)
+                if col_num is not None:
+                    data.append({"range": rowcol_to_a1(row_num, col_num), "values": [[value]]})
+
+        if data:
+            worksheet = self._get_worksheet(tab)
+            worksheet.batch_update(data, value_input_option="USER_ENTERED")
+            if tab in REPLICA_CACHE_TAGS:
+                self._patch_replica(tab, updates, header_map)
+
+        return len(data)
+
+    # -------------------------------------------------------------------------
+    # Read replica methods
+    # -------------------------------------------------------------------------
+
+    def _sync_tab(self, tab: str) -> bool:
+        """Sync one tab into the replica. Raises if Sheets can't be read."""
+        return replica.sync_tab(self._get_worksheet(tab), tab)
+
+    def sync_replica(self, tabs: list[str] | None = None) -> list[str]:
+        """
+        Sync tabs (default: all replicated tabs) from Sheets into the replica.
+
+        Cached reads of tabs that changed are invalidated. A tab that fails to
+        sync keeps serving its last replicated copy.
+
+        Returns the tabs that changed.
+        """
+        changed = []
+        for tab in tabs or REPLICA_CACHE_TAGS:
+            try:
+                # Roles and onboarding state may be edited in the sheet
+                before = replica.read_records(tab) if tab in ("Roster", "Config") else None
+                if self._sync_tab(tab):
+                    changed.append(tab)
+                    invalidate_tags(REPLICA_CACHE_TAGS[tab])
+                    if tab == "Roster":
+                        self.warm_student_cache()
+                    if before is not None:
+                        _mark_stale_claims(tab, before, replica.read_records(tab) or [])
+                    if tab == "Quiz_Submissions":
+                        self._catch_up_grade_book()
+            except Exception as e:
+                logger.warning("Replica sync of %s failed, serving last synced copy: %s", tab, e)
+        return changed
+
+    def _load_records(self, tab: str) -> list[dict]:
+        """
+        Get a tab's records from the replica.
+
+        On a cold start (tab never replicated) the tab is synced inline first,
+        so errors reach the caller just like a direct Sheets read.
+        """
+        records = replica.read_records(tab)
+        if records is None:
+            self._sync_tab(tab)
+            records = replica.read_records(tab) or []
+        return records
+
+    @staticmethod
+    def _patch_replica(
+        tab: str, updates: dict[int, dict[str, object]], header_map: dict[str, int]
+    ) -> None:
+        """Mirror a successful Sheets write into the replica."""
+        try:
+            replica.patch_rows(
+                tab,
+                {
+                    row_num: {k: v for k, v in fields.items() if k in header_map}
+                    for row_num, fields in updates.items()
+                },
+            )
+        except Exception as e:
+            # The next sync pass corrects the replica
+            logger.warning("Failed to patch %s replica: %s", tab, e)
+
     def check_connection(self) -> bool:
         """Check if Sheets connection is working."""
         try:
@@ -92,30 +266,48 @@ class SheetsClient:
     # Config methods
     # -------------------------------------------------------------------------
 
-    @cached(ttl_seconds=CACHE_TTL_CONFIG, prefix="config")
+    @cached(ttl_seconds=CACHE_TTL_CONFIG, prefix="config", stale_ttl=CACHE_STALE_TTL)
+    def _get_config_snapshot(self) -> TabSnapshot:
+        """Load the Config tab once per refresh."""
+        return TabSnapshot("Config", self._load_records("Config"))
+
     def get_config(self, key: str) -> str | None:
         """Get a config value by key."""
         try:
-            worksheet = self._get_worksheet("Config")
-            records = worksheet.get_all_records()
-
-            for record in records:
-                if record.get("key") == key:
-                    return str(record.get("value", ""))
-
-            return None
+            snapshot = self._get_config_snapshot()
+            pos = snapshot.find("key", key)
+            if pos is None:
+                return None
+            return str(snapshot.records[pos].get("value", ""))
         except Exception as e:
             logger.error("Failed to get config '%s': %s", key, e)
             return None
 
-    @cached(ttl_seconds=CACHE_TTL_CONFIG, prefix="config")
+    def get_admin_emails(self) -> set[str]:
+        """
+        Get the admin emails listed in Config (lowercased).
+
+        Unlike get_config, a failed read raises rather than looking like an
+        empty Config, so callers can keep an admin's existing role.
+
+        Raises:
+            SheetsUnavailableError: Config could not be read
+        """
+        try:
+            return _admin_emails(self._get_config_snapshot().records)
+        except Exception as e:
+            logger.error("Failed to read admin emails: %s", e)
+            raise SheetsUnavailableError(str(e)) from e
+
     def get_all_config(self) -> dict[str, str]:
         """Get all config values as a dictionary."""
         try:
-            worksheet = self._get_worksheet("Config")
-            records = worksheet.get_all_records()
-
-            return {str(r.get("key", "")): str(r.get("value", "")) for r in records if r.get("key")}
+            snapshot = self._get_config_snapshot()
+            return {
+                str(r.get("key", "")): str(r.get("value", ""))
+                for r in snapshot.records
+                if r.get("key")
+            }
         except Exception as e:
             logger.error("Failed to get all config: %s", e)
             return {}
@@ -124,18 +316,78 @@ class SheetsClient:
     # Roster methods
     # -------------------------------------------------------------------------
 
-    @cached(ttl_seconds=CACHE_TTL_ROSTER, prefix="roster")
-    def get_roster_by_email(self, email: str) -> RosterEntry | None:
-        """Get roster entry by email address."""
+    @cached(ttl_seconds=CACHE_TTL_ROSTER, prefix="roster", stale_ttl=CACHE_STALE_TTL)
+    def _get_roster_snapshot(self) -> TabSnapshot:
+        """
+        Load the Roster tab once per refresh and index it.
+
+        Every roster lookup is served from this one snapshot, so N distinct
+        students cost one replica read per TTL instead of N.
+        """
+        snapshot = TabSnapshot("Roster", self._load_records("Roster"), parse=RosterEntry.from_row)
+        # Build the hot indexes up front, outside any request's lookup
+        snapshot.index("student_id")
+        snapshot.index("preferred_email", email_key)
+
+        # Refresh the local student cache for the whole class in one write
+        try:
+            set_cached_students(snapshot.items("student_id"))
+        except Exception as e:
+            logger.warning("Failed to bulk-load student cache: %s", e)
+        return snapshot
+
+    def warm_student_cache(self) -> int:
+        """Load the roster (and with it the local student cache). Returns the student count."""
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
+            return self._get_roster_snapshot().count("student_id")
+        except Exception as e:
+            logger.warning("Failed to warm student cache: %s", e)
+            return 0
+
+    def _find_rows(
+        self, tab: str, load: Callable[[], TabSnapshot], column: str, keys: list[str]
+    ) -> dict[str, int]:
+        """
+        Return key -> sheet row number of the row holding it in a column,
+        leaving out keys not in the tab.
 
-            for record in records:
-                if record.get("preferred_email", "").lower() == email.lower():
-                    return RosterEntry.from_row(record)
+        Row numbers come from a snapshot of the replica, which can be a sync
+        behind the sheet. They are checked against the sheet's column (one
+        read) before being written to; if rows were inserted, deleted or
+        sorted since, the tab is resynced and looked up again.
+        """
 
-            return None
+        def lookup() -> dict[str, int]:
+            snapshot = load()
+            positions = {key: snapshot.find(column, key) for key in keys}
+            return {
+                key: snapshot.row_number(pos) for key, pos in positions.items() if pos is not None
+            }
+
+        rows = lookup()
+        col_num = self._get_header_map(tab).get(column)
+        if col_num is None:
+            return rows
+        values = [cell_key(value) for value in self._get_worksheet(tab).col_values(col_num)]
+        current = {key: num for num, key in enumerate(values, start=1) if num >= FIRST_DATA_ROW}
+        if all(current.get(cell_key(key)) == rows.get(key) for key in keys):
+            return rows
+
+        logger.info("%s rows moved since the last sync, resyncing before writing", tab)
+        if self._sync_tab(tab):
+            invalidate_tags(REPLICA_CACHE_TAGS[tab])
+        return lookup()
+
+    def _find_roster_rows(self, student_ids: list[str]) -> dict[str, int]:
+        """Return student_id -> sheet row number, leaving out students not on the roster."""
+        return self._find_rows("Roster", self._get_roster_snapshot, "student_id", student_ids)
+
+    def get_roster_by_email(self, email: str) -> RosterEntry | None:
+        """Get roster entry by email address."""
+        try:
+            snapshot = self._get_roster_snapshot()
+            pos = snapshot.find("preferred_email", email, email_key)
+            return None if pos is None else snapshot.item(pos)
         except gspread.exceptions.APIError as e:
             logger.error("Sheets API error getting roster by email '%s': %s", email, e)
             raise SheetsUnavailableError(str(e)) from e
@@ -143,18 +395,12 @@ class SheetsClient:
             logger.error("Failed to get roster by email '%s': %s", email, e)
             return None
 
-    @cached(ttl_seconds=CACHE_TTL_ROSTER, prefix="roster")
     def get_roster_by_id(self, student_id: str) -> RosterEntry | None:
         """Get roster entry by student_id."""
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
-
-            for record in records:
-                if str(record.get("student_id")) == str(student_id):
-                    return RosterEntry.from_row(record)
-
-            return None
+            snapshot = self._get_roster_snapshot()
+            pos = snapshot.find("student_id", student_id)
+            return None if pos is None else snapshot.item(pos)
         except gspread.exceptions.APIError as e:
             logger.error("Sheets API error getting roster by id '%s': %s", student_id, e)
             raise SheetsUnavailableError(str(e)) from e
@@ -169,38 +415,40 @@ class SheetsClient:
         Returns True if successful, False otherwise.
         """
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
-
-            # Find the student row
-            for idx, record in enumerate(records):
-                if str(record.get("student_id")) == str(student_id):
-                    # Check not already claimed (requires both email AND claimed_at)
-                    if record.get("preferred_email") and record.get("claimed_at"):
-                        logger.warning("Student %s already claimed", student_id)
-                        return False
-
-                    # Update the row (row index is 2-based: 1 for header, 1 for 0-index)
-                    row_num = idx + 2
+            # Always decide on fresh data: a stale replica could let two
+            # people claim the same student
+            self._sync_tab("Roster")
+            invalidate_tags("roster")
+            snapshot = self._get_roster_snapshot()
+            pos = snapshot.find("student_id", student_id)
+            if pos is None:
+                logger.warning("Student not found: %s", student_id)
+                return False
 
-                    # Find column indices
-                    headers = worksheet.row_values(1)
-                    email_col = headers.index("preferred_email") + 1
-                    claimed_at_col = headers.index("claimed_at") + 1
+            # Check not already claimed (requires both email AND claimed_at)
+            record = snapshot.records[pos]
+            if record.get("preferred_email") and record.get("claimed_at"):
+                logger.warning("Student %s already claimed", student_id)
+                return False
 
-                    # Update cells
-                    now = datetime.utcnow().isoformat()
-                    worksheet.update_cell(row_num, email_col, email)
-                    worksheet.update_cell(row_num, claimed_at_col, now)
+            header_map = self._get_header_map("Roster")
+            if "preferred_email" not in header_map or "claimed_at" not in header_map:
+                logger.error("Roster is missing preferred_email/claimed_at columns")
+                return False
 
-                    # Invalidate cache
-                    invalidate("roster")
+            # Update both cells in one write
+            now = datetime.utcnow().isoformat()
+            self._batch_update_rows(
+                "Roster",
+                {snapshot.row_number(pos): {"preferred_email": email, "claimed_at": now}},
+            )
 
-                    logger.info("Student %s claimed by %s", student_id, email)
-                    return True
+            # Invalidate cache
+            invalidate_tags("roster")
+            invalidate_cached_student(student_id)
 
-            logger.warning("Student not found: %s", student_id)
-            return False
+            logger.info("Student %s claimed by %s", student_id, email)
+            return True
 
         except Exception as e:
             logger.error("Failed to claim student %s: %s", student_id, e)
@@ -217,44 +465,74 @@ class SheetsClient:
         Returns True if successful.
         """
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
-            headers = worksheet.row_values(1)
-
-            # Find the student row
-            for idx, record in enumerate(records):
-                if str(record.get("student_id")) == str(student_id):
-                    row_num = idx + 2
-
-                    # Update each field
-                    for field_name, value in fields.items():
-                        if field_name in headers:
-                            col_num = headers.index(field_name) + 1
-                            worksheet.update_cell(row_num, col_num, value if value else "")
+            row_num = self._find_roster_rows([student_id]).get(student_id)
+            if row_num is None:
+                logger.warning("Student not found for update: %s", student_id)
+                return False
 
-                    # Invalidate cache
-                    invalidate("roster")
+            # Update all fields in one write
+            self._batch_update_rows(
+                "Roster",
+                {row_num: {name: value if value else "" for name, value in fields.items()}},
+            )
 
-                    logger.info("Updated roster %s: %s", student_id, list(fields.keys()))
-                    return True
+            # Invalidate cache
+            invalidate_tags("roster")
+            invalidate_cached_student(student_id)
+            if "onboarding_completed_at" in fields:
+                mark_claims_changed(student_id)
 
-            logger.warning("Student not found for update: %s", student_id)
-            return False
+            logger.info("Updated roster %s: %s", student_id, list(fields.keys()))
+            return True
 
         except Exception as e:
             logger.error("Failed to update roster %s: %s", student_id, e)
             return False
 
+    def update_roster_many(self, updates: dict[str, dict]) -> int:
+        """
+        Update fields for several students in a single write.
+
+        Args:
+            updates: student_id -> {field: value}
+
+        Returns the number of students updated (unknown student_ids are skipped).
+        """
+        try:
+            rows = {}
+            updated_ids = []
+            row_nums = self._find_roster_rows(list(updates))
+            for student_id, fields in updates.items():
+                row_num = row_nums.get(student_id)
+                if row_num is None:
+                    logger.warning("Student not found for update: %s", student_id)
+                    continue
+                rows[row_num] = {name: value if value else "" for name, value in fields.items()}
+                updated_ids.append(student_id)
+
+            if rows:
+                self._batch_update_rows("Roster", rows)
+                invalidate_tags("roster")
+                invalidate_cached_student(*updated_ids)
+                for student_id in updated_ids:
+                    if "onboarding_completed_at" in updates[student_id]:
+                        mark_claims_changed(student_id)
+                logger.info("Updated roster for %d students", len(rows))
+            return len(rows)
+
+        except Exception as e:
+            logger.error("Failed to update roster for %d students: %s", len(updates), e)
+            return 0
+
     # -------------------------------------------------------------------------
     # Schedule methods
     # -------------------------------------------------------------------------
 
-    @cached(ttl_seconds=CACHE_TTL_SCHEDULE, prefix="schedule")
+    @cached(ttl_seconds=CACHE_TTL_SCHEDULE, prefix="schedule", stale_ttl=CACHE_STALE_TTL)
     def get_schedule(self) -> list[ScheduleEntry]:
         """Get all schedule entries."""
         try:
-            worksheet = self._get_worksheet("Schedule")
-            records = worksheet.get_all_records()
+            records = self._load_records("Schedule")
 
             return [ScheduleEntry.from_row(r) for r in records if r.get("session")]
         except Exception as e:
@@ -272,19 +550,18 @@ class SheetsClient:
     # Quiz methods
     # -------------------------------------------------------------------------
 
-    @cached(ttl_seconds=CACHE_TTL_QUIZZES, prefix="quizzes")
+    @cached(ttl_seconds=CACHE_TTL_QUIZZES, prefix="quizzes", stale_ttl=CACHE_STALE_TTL)
     def get_quizzes(self) -> list[QuizMeta]:
         """Get all quizzes metadata."""
         try:
-            worksheet = self._get_worksheet("Quizzes")
-            records = worksheet.get_all_records()
+            records = self._load_records("Quizzes")
 
             return [QuizMeta.from_row(r) for r in records if r.get("quiz_id")]
         except Exception as e:
             logger.error("Failed to get quizzes: %s", e)
             return []
 
-    @cached(ttl_seconds=CACHE_TTL_QUIZZES, prefix="quizzes")
+    @cached(ttl_seconds=CACHE_TTL_QUIZZES, prefix="quizzes", stale_ttl=CACHE_STALE_TTL)
     def get_quiz_by_id(self, quiz_id: str) -> QuizMeta | None:
         """Get quiz metadata by ID."""
         quizzes = self.get_quizzes()
@@ -294,105 +571,248 @@ class SheetsClient:
         return None
 
     @cached(ttl_seconds=CACHE_TTL_SUBMISSIONS, prefix="submissions")
-    def get_quiz_submissions(self, student_id: str, quiz_id: str) -> list[QuizSubmission]:
-        """Get all submissions for a student on a quiz."""
-        try:
-            worksheet = self._get_worksheet("Quiz_Submissions")
-            records = worksheet.get_all_records()
+    def _get_submission_index(self) -> SubmissionIndex:
+        """
+        Return the Quiz_Submissions index, caught up with the replica.
 
-            submissions = []
-            for record in records:
-                if str(record.get("student_id")) == str(student_id) and str(
-                    record.get("quiz_id", "")
-                ) == str(quiz_id):
-                    submissions.append(QuizSubmission.from_row(record))
+        Both per-student and per-quiz lookups are served from this one parsed
+        index. Refreshes only parse rows replicated since the last one (see
+        SubmissionsLog).
+        """
+        state = replica.tab_state("Quiz_Submissions")
+        if state is None:
+            self._sync_tab("Quiz_Submissions")
+            state = replica.tab_state("Quiz_Submissions")
+        return self._submissions_log.update(
+            state.generation,
+            lambda row_num: replica.read_records_after("Quiz_Submissions", row_num),
+        )
 
-            return submissions
+    def get_quiz_submissions(self, student_id: str, quiz_id: str) -> list[QuizSubmission]:
+        """Get all submissions for a student on a quiz (including queued ones)."""
+        try:
+            submissions = self._get_submission_index().for_student(student_id, quiz_id)
+            pending = self._pending_quiz_submissions(
+                student_id=str(student_id), quiz_id=str(quiz_id)
+            )
+            return self._merge_pending(submissions, pending)
         except Exception as e:
             logger.error("Failed to get submissions for %s/%s: %s", student_id, quiz_id, e)
             return []
 
-    @cached(ttl_seconds=CACHE_TTL_SUBMISSIONS, prefix="all_submissions")
     def get_all_quiz_submissions(self, quiz_id: str) -> list[QuizSubmission]:
-        """Get ALL submissions for a quiz (all students)."""
+        """Get ALL submissions for a quiz (all students, including queued ones)."""
         try:
-            worksheet = self._get_worksheet("Quiz_Submissions")
-            records = worksheet.get_all_records()
-
-            submissions = []
-            for record in records:
-                if str(record.get("quiz_id", "")) == str(quiz_id):
-                    submissions.append(QuizSubmission.from_row(record))
-
-            return submissions
+            submissions = self._get_submission_index().for_quiz(quiz_id)
+            pending = self._pending_quiz_submissions(quiz_id=str(quiz_id))
+            return self._merge_pending(submissions, pending)
         except Exception as e:
             logger.error("Failed to get all submissions for quiz %s: %s", quiz_id, e)
             return []
 
-    @cached(ttl_seconds=CACHE_TTL_ROSTER, prefix="roster_count")
+    def get_submission_rows(self, quiz_id: str) -> list[tuple[int, dict]]:
+        """
+        Get (sheet row number, raw record) for every stored submission to a quiz.
+
+        Syncs Quiz_Submissions first. Queued submissions that have not been
+        flushed yet have no row number and are not included.
+        """
+        self.sync_replica(["Quiz_Submissions"])
+        return [
+            (row_num, record)
+            for row_num, record in replica.read_records_after(
+                "Quiz_Submissions", replica.FIRST_DATA_ROW - 1
+            )
+            if str(record.get("quiz_id", "")) == str(quiz_id)
+        ]
+
+    def update_submission_rows(
+        self,
+        updates: dict[int, dict[str, object]],
+        expected: dict[int, dict] | None = None,
+    ) -> int:
+        """
+        Rewrite fields of stored submissions in a single batch_update.
+
+        Args:
+            updates: Sheet row number -> {column header: new value}
+            expected: Sheet row number -> record the update was computed from.
+                Quiz_Submissions is synced first and nothing is written
+                unless each row still holds the same submission.
+
+        Returns the number of cells written.
+
+        Raises:
+            StaleRowsError: A row now holds a different submission
+        """
+        if expected:
+            self.sync_replica(["Quiz_Submissions"])
+            current = replica.read_rows("Quiz_Submissions", sorted(updates))
+            for row_num in updates:
+                before, now = expected.get(row_num, {}), current.get(row_num, {})
+                if any(
+                    cell_key(before.get(name)) != cell_key(now.get(name))
+                    for name in SUBMISSION_KEY_FIELDS
+                ):
+                    raise StaleRowsError(
+                        f"Quiz_Submissions row {row_num} changed since it was read"
+                    )
+
+        cells = self._batch_update_rows("Quiz_Submissions", updates)
+        invalidate_tags("submissions")
+        return cells
+
     def get_roster_count(self) -> int:
         """Get total number of students in roster."""
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
-
             # Count only rows with a student_id
-            return sum(1 for r in records if r.get("student_id"))
+            return self._get_roster_snapshot().count("student_id")
         except Exception as e:
             logger.error("Failed to get roster count: %s", e)
             return 0
 
-    @cached(ttl_seconds=CACHE_TTL_ROSTER, prefix="all_roster")
     def get_all_roster(self) -> list[RosterEntry]:
         """Get all roster entries."""
         try:
-            worksheet = self._get_worksheet("Roster")
-            records = worksheet.get_all_records()
-
-            return [RosterEntry.from_row(r) for r in records if r.get("student_id")]
+            return self._get_roster_snapshot().items("student_id")
         except Exception as e:
             logger.error("Failed to get all roster: %s", e)
             return []
 
     def append_quiz_submission(self, data: dict) -> bool:
-        """Append a new quiz submission."""
+        """
+        Queue a new quiz submission for appending.
+
+        The row is stored in the durable outbox and flushed to Sheets in the
+        background; reads merge queued rows so the student sees it at once.
+        It is added to the grade book straight away as well.
+        """
+        try:
+            outbox.enqueue("Quiz_Submissions", data)
+            logger.info(
+                "Queued quiz submission: %s/%s", data.get("student_id"), data.get("quiz_id")
+            )
+        except Exception as e:
+            logger.error("Failed to queue quiz submission: %s", e)
+            return False
+
+        try:
+            gradebook.record([QuizSubmission.from_row(data)])
+        except Exception as e:
+            # The grade book still picks it up once the row is replicated
+            logger.warning("Failed to record queued submission in the grade book: %s", e)
+        return True
+
+    def _pending_quiz_submissions(self, **match: str) -> list[QuizSubmission]:
+        """Get queued submissions (optionally matching fields) not yet in the Sheets data."""
         try:
-            worksheet = self._get_worksheet("Quiz_Submissions")
-            headers = worksheet.row_values(1)
+            return [
+                QuizSubmission.from_row(r) for r in outbox.pending_rows("Quiz_Submissions", **match)
+            ]
+        except Exception as e:
+            logger.error("Failed to read queued quiz submissions: %s", e)
+            return []
+
+    @staticmethod
+    def _merge_pending(
+        submissions: list[QuizSubmission], pending: list[QuizSubmission]
+    ) -> list[QuizSubmission]:
+        """Append queued submissions not already present in the sheet data."""
+        if not pending:
+            return submissions
 
-            # Build row in correct column order
-            row = [data.get(h, "") for h in headers]
-            worksheet.append_row(row, value_input_option="RAW")
+        def key(sub: QuizSubmission) -> tuple:
+            return (sub.student_id, sub.quiz_id, sub.attempt, sub.submitted_at)
 
-            # Invalidate submissions cache
-            invalidate("submissions")
-            invalidate("all_submissions")
+        seen = {key(sub) for sub in submissions}
+        return submissions + [sub for sub in pending if key(sub) not in seen]
 
-            logger.info(
-                "Appended quiz submission: %s/%s", data.get("student_id"), data.get("quiz_id")
+    def flush_appends(self, tab: str, rows: list[dict]) -> None:
+        """
+        Append rows to a tab in a single append_rows call.
+
+        Used by the outbox flusher; raises on failure so the rows are retried.
+        """
+        header_map = self._get_header_map(tab)
+        width = max(header_map.values(), default=0)
+
+        # Build rows in correct column order
+        values = []
+        for data in rows:
+            row = [""] * width
+            for name, col_num in header_map.items():
+                row[col_num - 1] = data.get(name, "")
+            values.append(row)
+
+        worksheet = self._get_worksheet(tab)
+        worksheet.append_rows(values, value_input_option="RAW")
+
+        if tab in REPLICA_CACHE_TAGS:
+            # Pull the new rows into the replica (a tail read for submissions)
+            self.sync_replica([tab])
+
+    # -------------------------------------------------------------------------
+    # Grade book methods
+    # -------------------------------------------------------------------------
+
+    def _catch_up_grade_book(self) -> None:
+        """Record replicated submissions the grade book has not seen yet."""
+        try:
+            state = replica.tab_state("Quiz_Submissions")
+            if state is None:
+                self._sync_tab("Quiz_Submissions")
+                state = replica.tab_state("Quiz_Submissions")
+            gradebook.catch_up(
+                state.generation,
+                lambda row_num: replica.read_records_after("Quiz_Submissions", row_num),
+                self._pending_quiz_submissions,
             )
-            return True
         except Exception as e:
-            logger.error("Failed to append quiz submission: %s", e)
-            return False
+            logger.warning("Grade book catch-up failed, serving last recorded grades: %s", e)
+
+    def get_student_grades(self, student_id: str) -> dict[str, StudentGrade]:
+        """Get quiz_id -> best score and attempt count for a student."""
+        self._catch_up_grade_book()
+        try:
+            return gradebook.get_student_grades(student_id)
+        except Exception as e:
+            logger.error("Failed to get grades for %s: %s", student_id, e)
+            return {}
+
+    def get_best_scores(self) -> dict[str, dict[str, float]]:
+        """Get student_id -> quiz_id -> best score for every student with submissions."""
+        self._catch_up_grade_book()
+        try:
+            return gradebook.get_best_scores()
+        except Exception as e:
+            logger.error("Failed to get best scores: %s", e)
+            return {}
+
+    def get_quiz_grade_stats(self) -> dict[str, QuizGradeStats]:
+        """Get quiz_id -> completion and score totals for every quiz with submissions."""
+        self._catch_up_grade_book()
+        try:
+            return gradebook.get_quiz_stats()
+        except Exception as e:
+            logger.error("Failed to get quiz grade stats: %s", e)
+            return {}
 
     # -------------------------------------------------------------------------
     # Onboarding methods
     # -------------------------------------------------------------------------
 
     def append_onboarding_response(self, data: dict) -> bool:
-        """Append a new onboarding response row."""
-        try:
-            worksheet = self._get_worksheet("Onboarding_Responses")
-            headers = worksheet.row_values(1)
-
-            row = [data.get(h, "") for h in headers]
-            worksheet.append_row(row, value_input_option="RAW")
+        """Queue a new onboarding response row for appending."""
+        return self.append_onboarding_responses([data])
 
-            logger.info("Appended onboarding response: %s", data.get("student_id"))
+    def append_onboarding_responses(self, rows: list[dict]) -> bool:
+        """Queue several onboarding response rows for appending, in one transaction."""
+        try:
+            outbox.enqueue_many("Onboarding_Responses", rows)
+            logger.info("Queued %d onboarding responses", len(rows))
             return True
         except Exception as e:
-            logger.error("Failed to append onboarding response: %s", e)
+            logger.error("Failed to queue onboarding responses: %s", e)
             return False
 
     # -------------------------------------------------------------------------
@@ -400,17 +820,12 @@ class SheetsClient:
     # -------------------------------------------------------------------------
 
     def append_magic_link_request(self, data: dict) -> bool:
-        """Append a magic link request to audit log."""
+        """Queue a magic link request for the audit log."""
         try:
-            worksheet = self._get_worksheet("MagicLink_Requests")
-            headers = worksheet.row_values(1)
-
-            row = [data.get(h, "") for h in headers]
-            worksheet.append_row(row, value_input_option="RAW")
-
+            outbox.enqueue("MagicLink_Requests", data)
             return True
         except Exception as e:
-            logger.error("Failed to append magic link request: %s", e)
+            logger.error("Failed to queue magic link request: %s", e)
             return False
 
     # -------------------------------------------------------------------------
@@ -421,8 +836,7 @@ class SheetsClient:
     def get_book_readings(self) -> list[BookChapter]:
         """Get all book reading chapter assignments."""
         try:
-            worksheet = self._get_worksheet("Book_Reading")
-            records = worksheet.get_all_records()
+            records = self._load_records("Book_Reading")
             return [BookChapter.from_row(r) for r in records if r.get("chapter")]
         except Exception as e:
             logger.error("Failed to get book readings: %s", e)
@@ -438,27 +852,30 @@ class SheetsClient:
             return False, "Invalid role."
 
         try:
-            worksheet = self._get_worksheet("Book_Reading")
-            records = worksheet.get_all_records()
-            headers = worksheet.row_values(1)
-
             col_name = "primary_reader" if role == "primary" else "secondary_reader"
-
-            for idx, record in enumerate(records):
-                if record.get("chapter") == chapter:
-                    if record.get(col_name):
-                        return False, f"This chapter already has a {role} reader."
-
-                    col_num = headers.index(col_name) + 1
-                    row_num = idx + 2
-                    worksheet.update_cell(row_num, col_num, display_name)
-                    invalidate("book_reading")
-                    logger.info(
-                        "Assigned %s as %s reader for chapter '%s'", display_name, role, chapter
-                    )
-                    return True, ""
-
-            return False, "Chapter not found."
+            col_num = self._get_header_map("Book_Reading").get(col_name)
+            if col_num is None:
+                logger.error("Book_Reading is missing the %s column", col_name)
+                return False, "An error occurred. Please try again."
+
+            rows = self._find_rows(
+                "Book_Reading",
+                lambda: TabSnapshot("Book_Reading", self._load_records("Book_Reading")),
+                "chapter",
+                [chapter],
+            )
+            row_num = rows.get(chapter)
+            if row_num is None:
+                return False, "Chapter not found."
+
+            # Another student may have taken the slot since the last sync
+            if self._get_worksheet("Book_Reading").cell(row_num, col_num).value:
+                return False, f"This chapter already has a {role} reader."
+
+            self._batch_update_rows("Book_Reading", {row_num: {col_name: display_name}})
+            invalidate_tags("book_reading")
+            logger.info("Assigned %s as %s reader for chapter '%s'", display_name, role, chapter)
+            return True, ""
         except Exception as e:
             logger.error("Failed to assign book reader: %s", e)
             return False, "An error occurred. Please try again."
@@ -558,3 +975,67 @@ def get_sheets_client() -> SheetsClient:
     if _sheets_client is None:
         _sheets_client = SheetsClient()
     return _sheets_client
+
+
+# -----------------------------------------------------------------------------
+# Async access
+# -----------------------------------------------------------------------------
+
+# Bounded worker pool for blocking gspread calls made from async route handlers
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the Sheets worker pool."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.sheets_max_workers, thread_name_prefix="sheets"
+                )
+    return _executor
+
+
+async def run_in_sheets_pool(func: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """Run a blocking Sheets call on the worker pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_sheets_executor() -> None:
+    """Stop the Sheets worker pool, waiting for in-flight calls to finish."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+class AsyncSheetsClient:
+    """
+    Awaitable facade over SheetsClient for async route handlers.
+
+    Every method of the wrapped client becomes a coroutine that runs the
+    original call on the bounded Sheets worker pool, so one slow Sheets round
+    trip no longer stalls the event loop for every other request.
+
+    Usage:
+        sheets = AsyncSheetsClient(get_sheets_client())
+        roster = await sheets.get_all_roster()
+    """
+
+    def __init__(self, client: SheetsClient):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await run_in_sheets_pool(attr, *args, **kwargs)
+
+        call.__name__ = name
+        return call
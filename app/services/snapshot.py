@@ -0,0 +1,184 @@
+"""Whole-tab snapshots of Google Sheets worksheets with in-memory indexes."""
+
+import logging
+import threading
+from time import time
+from typing import Any, Callable, Iterable
+
+from app.models.quiz import QuizSubmission
+
+logger = logging.getLogger(__name__)
+
+# Data rows start on sheet row 2 (row 1 holds the headers)
+FIRST_DATA_ROW = 2
+
+
+def cell_key(value: Any) -> str:
+    """Normalize a cell value into an index key."""
+    return str(value).strip() if value is not None else ""
+
+
+def email_key(value: Any) -> str:
+    """Normalize an email cell value into a case-insensitive index key."""
+    return cell_key(value).lower()
+
+
+class TabSnapshot:
+    """
+    One downloaded copy of a worksheet tab.
+
+    Records are kept in sheet order so a record's position maps directly to
+    its sheet row number. Hash indexes over columns are built on first use
+    and reused until the snapshot is replaced by the next refresh.
+    """
+
+    def __init__(
+        self,
+        tab: str,
+        records: list[dict],
+        parse: Callable[[dict], Any] | None = None,
+    ):
+        self.tab = tab
+        self.records = records
+        self.fetched_at = time()
+        self._parse = parse
+        self._parsed: dict[int, Any] = {}
+        self._indexes: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def index(self, column: str, normalize: Callable[[Any], str] = cell_key) -> dict[str, int]:
+        """
+        Get (building if needed) a hash index of column value -> record position.
+
+        Blank values are not indexed. When a value repeats, the first row wins,
+        matching the top-to-bottom scans this replaces.
+        """
+        index_name = f"{column}:{normalize.__name__}"
+        index = self._indexes.get(index_name)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(index_name)
+            if index is None:
+                index = {}
+                for pos, record in enumerate(self.records):
+                    key = normalize(record.get(column))
+                    if key and key not in index:
+                        index[key] = pos
+                self._indexes[index_name] = index
+        return index
+
+    def find(
+        self, column: str, value: Any, normalize: Callable[[Any], str] = cell_key
+    ) -> int | None:
+        """Return the record position whose column matches value, or None."""
+        return self.index(column, normalize).get(normalize(value))
+
+    def item(self, pos: int) -> Any:
+        """Return the parsed object for a record position (parsed once per snapshot)."""
+        if self._parse is None:
+            return self.records[pos]
+        item = self._parsed.get(pos)
+        if item is None:
+            item = self._parse(self.records[pos])
+            self._parsed[pos] = item
+        return item
+
+    def items(self, column: str | None = None) -> list[Any]:
+        """Return parsed objects for all records, optionally only those with column set."""
+        return [
+            self.item(pos)
+            for pos, record in enumerate(self.records)
+            if column is None or record.get(column)
+        ]
+
+    def count(self, column: str) -> int:
+        """Count records that have a value in column."""
+        return sum(1 for record in self.records if record.get(column))
+
+    @staticmethod
+    def row_number(pos: int) -> int:
+        """Convert a record position into its 1-based sheet row number."""
+        return pos + FIRST_DATA_ROW
+
+
+class SubmissionIndex:
+    """
+    Quiz_Submissions parsed in one pass and indexed for lookups.
+
+    Holds every submission in sheet order plus a (student_id, quiz_id) index
+    for a student's attempts and a quiz_id index for whole-class views.
+    """
+
+    def __init__(self, submissions: Iterable[QuizSubmission] = ()):
+        self.submissions: list[QuizSubmission] = []
+        self.by_student_quiz: dict[tuple[str, str], list[QuizSubmission]] = {}
+        self.by_quiz: dict[str, list[QuizSubmission]] = {}
+        self.fetched_at = time()
+        self.extend(submissions)
+
+    def __len__(self) -> int:
+        return len(self.submissions)
+
+    def add(self, submission: QuizSubmission) -> None:
+        """Add one submission to the index."""
+        self.submissions.append(submission)
+        self.by_student_quiz.setdefault((submission.student_id, submission.quiz_id), []).append(
+            submission
+        )
+        self.by_quiz.setdefault(submission.quiz_id, []).append(submission)
+
+    def extend(self, submissions: Iterable[QuizSubmission]) -> None:
+        """Add submissions to the index, in order."""
+        for submission in submissions:
+            self.add(submission)
+
+    def for_student(self, student_id: str, quiz_id: str) -> list[QuizSubmission]:
+        """Get a student's submissions for a quiz."""
+        return list(self.by_student_quiz.get((str(student_id), str(quiz_id)), ()))
+
+    def for_quiz(self, quiz_id: str) -> list[QuizSubmission]:
+        """Get every student's submissions for a quiz."""
+        return list(self.by_quiz.get(str(quiz_id), ()))
+
+
+class SubmissionsLog:
+    """
+    In-memory SubmissionIndex fed incrementally from replicated rows.
+
+    Rows appended since the last update are parsed and added; the index is
+    only rebuilt from scratch when the replica reports that existing rows
+    changed (a new generation).
+    """
+
+    def __init__(self):
+        self.index = SubmissionIndex()
+        self.generation: int | None = None
+        self.last_row = FIRST_DATA_ROW - 1
+        self._lock = threading.Lock()
+
+    def update(
+        self, generation: int, rows_after: Callable[[int], list[tuple[int, dict]]]
+    ) -> SubmissionIndex:
+        """
+        Catch the index up with the replica and return it.
+
+        Args:
+            generation: Current replica generation of Quiz_Submissions
+            rows_after: Returns (sheet row number, record) pairs below a row
+        """
+        with self._lock:
+            if generation != self.generation:
+                self.index = SubmissionIndex()
+                self.last_row = FIRST_DATA_ROW - 1
+                self.generation = generation
+
+            for row_num, record in rows_after(self.last_row):
+                if record.get("student_id") or record.get("quiz_id"):
+                    self.index.add(QuizSubmission.from_row(record))
+                self.last_row = row_num
+            return self.index
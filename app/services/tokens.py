@@ -10,6 +10,9 @@ from app.db.sqlite import get_db
 
 logger = logging.getLogger(__name__)
 
+# Magic link requests are counted per email over this window
+RATE_LIMIT_WINDOW_MINUTES = 15
+
 
 def create_magic_token(email: str, ttl_minutes: int | None = None) -> str:
     """
@@ -56,45 +59,38 @@ def validate_magic_token(token: str) -> str | None:
         Email address if valid, None otherwise
     """
     token_hash = hashlib.sha256(token.encode()).hexdigest()
+    now = datetime.utcnow().isoformat()
 
     with get_db() as db:
+        # Consume the token in one statement, so concurrent verifies of the
+        # same link cannot both succeed
         row = db.execute(
             """
-            SELECT email, expires_at, status FROM magic_tokens
-            WHERE token_hash = ?
+            UPDATE magic_tokens SET status = 'used', used_at = ?
+            WHERE token_hash = ? AND status = 'pending' AND expires_at >= ?
+            RETURNING email
             """,
-            (token_hash,),
+            (now, token_hash, now),
         ).fetchone()
+        if row is not None:
+            logger.info("Magic token validated for %s", row["email"])
+            return row["email"]
 
-        if not row:
-            logger.warning("Token not found")
-            return None
-
-        if row["status"] != "pending":
-            logger.warning("Token already used or expired (status: %s)", row["status"])
-            return None
-
-        expires_at = datetime.fromisoformat(row["expires_at"])
-        if expires_at < datetime.utcnow():
-            # Mark as expired
-            db.execute(
-                "UPDATE magic_tokens SET status = 'expired' WHERE token_hash = ?",
-                (token_hash,),
-            )
-            logger.warning("Token expired")
-            return None
-
-        # Mark as used
-        db.execute(
+        # Failure path only: a pending token that didn't match has expired
+        expired = db.execute(
             """
-            UPDATE magic_tokens SET status = 'used', used_at = ?
-            WHERE token_hash = ?
+            UPDATE magic_tokens SET status = 'expired'
+            WHERE token_hash = ? AND status = 'pending'
+            RETURNING token_hash
             """,
-            (datetime.utcnow().isoformat(), token_hash),
-        )
+            (token_hash,),
+        ).fetchone()
 
-        logger.info("Magic token validated for %s", row["email"])
-        return row["email"]
+    if expired is not None:
+        logger.warning("Token expired")
+    else:
+        logger.warning("Token not found or already used")
+    return None
 
 
 def check_rate_limit(email: str) -> tuple[bool, int]:
@@ -109,47 +105,37 @@ def check_rate_limit(email: str) -> tuple[bool, int]:
     """
     key = f"magic:{email.lower()}"
     max_requests = settings.rate_limit_per_email_15m
-    window_minutes = 15
 
     now = datetime.utcnow()
-    window_start = now - timedelta(minutes=window_minutes)
+    window_start = now - timedelta(minutes=RATE_LIMIT_WINDOW_MINUTES)
 
     with get_db() as db:
-        # Get existing rate limit record
+        # Start, reset or count the window in one statement. The stored count
+        # stops at max + 1, so rejected requests keep the window closed
+        # without growing the counter.
         row = db.execute(
-            "SELECT window_start, count FROM rate_limits WHERE key = ?",
-            (key,),
+            """
+            INSERT INTO rate_limits (key, window_start, count) VALUES (:key, :now, 1)
+            ON CONFLICT(key) DO UPDATE SET
+                window_start = CASE WHEN window_start < :window_start
+                    THEN excluded.window_start ELSE window_start END,
+                count = CASE WHEN window_start < :window_start
+                    THEN 1 ELSE MIN(count + 1, :max_requests + 1) END
+            RETURNING count
+            """,
+            {
+                "key": key,
+                "now": now.isoformat(),
+                "window_start": window_start.isoformat(),
+                "max_requests": max_requests,
+            },
         ).fetchone()
 
-        if row is None:
-            # First request
-            db.execute(
-                "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)",
-                (key, now.isoformat()),
-            )
-            return True, 1
-
-        record_window_start = datetime.fromisoformat(row["window_start"])
-
-        if record_window_start < window_start:
-            # Window expired, reset
-            db.execute(
-                "UPDATE rate_limits SET window_start = ?, count = 1 WHERE key = ?",
-                (now.isoformat(), key),
-            )
-            return True, 1
-
-        current_count = row["count"]
-        if current_count >= max_requests:
-            logger.warning("Rate limit exceeded for %s (count: %d)", email, current_count)
-            return False, current_count
-
-        # Increment counter
-        db.execute(
-            "UPDATE rate_limits SET count = count + 1 WHERE key = ?",
-            (key,),
-        )
-        return True, current_count + 1
+    count = row["count"]
+    if count > max_requests:
+        logger.warning("Rate limit exceeded for %s (count: %d)", email, max_requests)
+        return False, max_requests
+    return True, count
 
 
 def cleanup_expired_tokens() -> int:
@@ -184,3 +170,21 @@ def cleanup_expired_tokens() -> int:
             logger.info("Token cleanup: %d expired, %d deleted", expired_count, deleted_count)
 
         return expired_count + deleted_count
+
+
+def prune_rate_limits() -> int:
+    """
+    Delete rate limit records whose window has ended.
+
+    Returns:
+        Number of records deleted
+    """
+    cutoff = (datetime.utcnow() - timedelta(minutes=RATE_LIMIT_WINDOW_MINUTES)).isoformat()
+    with get_db() as db:
+        cursor = db.execute("DELETE FROM rate_limits WHERE window_start < ?", (cutoff,))
+        deleted_count = cursor.rowcount
+
+    if deleted_count:
+        logger.info("Rate limit cleanup: %d deleted", deleted_count)
+
+    return deleted_count
@@ -22,8 +22,12 @@ def setup_test_env():
     yield temp_path
 
     # Cleanup
-    if os.path.exists(temp_path):
-        os.unlink(temp_path)
+    from app.db.sqlite import close_all_connections
+
+    close_all_connections()
+    for path in (temp_path, f"{temp_path}-wal", f"{temp_path}-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
 
 
 @pytest.fixture
@@ -9,7 +9,13 @@ import pytest
 from app.db.sqlite import init_db
 from app.models.quiz import QuizMeta, QuizSubmission
 from app.models.roster import RosterEntry
-from app.services.sessions import create_session_token
+from app.services.gradebook import QuizGradeStats
+from app.services.sessions import (
+    ROLE_ADMIN,
+    ROLE_STUDENT,
+    create_session_token,
+    mark_claims_changed,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -72,7 +78,7 @@ class TestAdminAccessControl:
     @patch("app.dependencies.get_sheets_client")
     def test_non_admin_returns_403(self, mock_sheets, client):
         """Non-admin user gets 403."""
-        mock_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         token = create_session_token("user@example.com", "stu_001")
 
@@ -85,7 +91,7 @@ class TestAdminAccessControl:
     @patch("app.dependencies.get_sheets_client")
     def test_no_admin_email_configured_returns_403(self, mock_sheets, client):
         """No admin email configured returns 403."""
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         token = create_session_token("user@example.com", "stu_001")
 
@@ -99,7 +105,7 @@ class TestAdminAccessControl:
     @patch("app.dependencies.get_sheets_client")
     def test_admin_can_access(self, mock_dep_sheets, mock_router_sheets, client):
         """Admin user can access analytics."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = []
         mock_router_sheets.return_value.get_roster_count.return_value = 0
@@ -116,7 +122,7 @@ class TestAdminAccessControl:
     @patch("app.dependencies.get_sheets_client")
     def test_admin_email_case_insensitive(self, mock_dep_sheets, mock_router_sheets, client):
         """Admin email check is case insensitive."""
-        mock_dep_sheets.return_value.get_config.return_value = "Admin@Example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"Admin@Example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = []
         mock_router_sheets.return_value.get_roster_count.return_value = 0
@@ -129,6 +135,55 @@ class TestAdminAccessControl:
         )
         assert response.status_code == 200
 
+    @patch("app.routers.admin.get_sheets_client")
+    @patch("app.dependencies.get_sheets_client")
+    def test_current_admin_claim_skips_config_lookup(
+        self, mock_dep_sheets, mock_router_sheets, client
+    ):
+        """A session with a current admin claim is authorized without reading Config."""
+        mock_router_sheets.return_value.get_quizzes.return_value = []
+        mock_router_sheets.return_value.get_roster_count.return_value = 0
+
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.get("/admin/analytics", cookies={"session": token})
+        assert response.status_code == 200
+        mock_dep_sheets.return_value.get_admin_emails.assert_not_called()
+
+    @patch("app.routers.admin.get_sheets_client")
+    @patch("app.dependencies.get_sheets_client")
+    def test_stale_claims_are_reissued(self, mock_dep_sheets, mock_router_sheets, client):
+        """After a config change the session is re-issued with the new role."""
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
+        mock_router_sheets.return_value.get_quizzes.return_value = []
+        mock_router_sheets.return_value.get_roster_count.return_value = 0
+
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_STUDENT)
+        mark_claims_changed()
+
+        response = client.get("/admin/analytics", cookies={"session": token})
+        assert response.status_code == 200
+        assert "session=" in response.headers["set-cookie"]
+
+    @patch("app.routers.admin.get_sheets_client")
+    @patch("app.dependencies.get_sheets_client")
+    def test_failed_config_read_keeps_admin_claim(
+        self, mock_dep_sheets, mock_router_sheets, client
+    ):
+        """If Config can't be read during a refresh, the admin keeps their role."""
+        from app.services.sheets import SheetsUnavailableError
+
+        mock_dep_sheets.return_value.get_admin_emails.side_effect = SheetsUnavailableError("down")
+        mock_router_sheets.return_value.get_quizzes.return_value = []
+        mock_router_sheets.return_value.get_roster_count.return_value = 0
+
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+        mark_claims_changed()
+
+        response = client.get("/admin/analytics", cookies={"session": token})
+        assert response.status_code == 200
+        assert "session=" not in response.headers.get("set-cookie", "")
+
 
 class TestAnalyticsOverview:
     """Tests for analytics overview page."""
@@ -137,14 +192,14 @@ class TestAnalyticsOverview:
     @patch("app.dependencies.get_sheets_client")
     def test_shows_quiz_list(self, mock_dep_sheets, mock_router_sheets, client):
         """Analytics overview shows quiz list."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
             make_quiz_meta("q002", "Quiz 2"),
         ]
         mock_router_sheets.return_value.get_roster_count.return_value = 10
-        mock_router_sheets.return_value.get_all_quiz_submissions.return_value = []
+        mock_router_sheets.return_value.get_quiz_grade_stats.return_value = {}
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -162,17 +217,15 @@ class TestAnalyticsOverview:
     @patch("app.dependencies.get_sheets_client")
     def test_calculates_completion_rate(self, mock_dep_sheets, mock_router_sheets, client):
         """Analytics overview calculates completion rate."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
         ]
         mock_router_sheets.return_value.get_roster_count.return_value = 10
-        mock_router_sheets.return_value.get_all_quiz_submissions.return_value = [
-            make_submission("stu_001", "q001", 8),
-            make_submission("stu_002", "q001", 9),
-            make_submission("stu_003", "q001", 10),
-        ]
+        mock_router_sheets.return_value.get_quiz_grade_stats.return_value = {
+            "q001": QuizGradeStats("q001", 3, 3, 27, 30),
+        }
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -185,6 +238,34 @@ class TestAnalyticsOverview:
         assert "3/10" in response.text  # 3 students completed
         assert "30" in response.text  # 30% completion
 
+    @patch("app.routers.admin.get_sheets_client")
+    @patch("app.dependencies.get_sheets_client")
+    def test_reads_grade_book_totals(self, mock_dep_sheets, mock_router_sheets, client):
+        """Every quiz's summary comes from the grade book, not from submissions."""
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
+
+        mock_router_sheets.return_value.get_quizzes.return_value = [
+            make_quiz_meta("q001", "Quiz 1"),
+            make_quiz_meta("q002", "Quiz 2"),
+            make_quiz_meta("q003", "Quiz 3"),
+        ]
+        mock_router_sheets.return_value.get_roster_count.return_value = 4
+        mock_router_sheets.return_value.get_quiz_grade_stats.return_value = {
+            "q001": QuizGradeStats("q001", 1, 1, 8, 10),
+            "q002": QuizGradeStats("q002", 2, 3, 19, 20),
+        }
+
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.get("/admin/analytics", cookies={"session": token})
+
+        assert response.status_code == 200
+        assert "1/4" in response.text
+        assert "2/4" in response.text
+        assert "0/4" in response.text
+        mock_router_sheets.return_value.get_quiz_grade_stats.assert_called_once()
+        mock_router_sheets.return_value.get_all_quiz_submissions.assert_not_called()
+
 
 class TestQuizAnalytics:
     """Tests for per-quiz analytics page."""
@@ -193,7 +274,7 @@ class TestQuizAnalytics:
     @patch("app.dependencies.get_sheets_client")
     def test_quiz_not_found_returns_404(self, mock_dep_sheets, mock_router_sheets, client):
         """Non-existent quiz returns 404."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
         mock_router_sheets.return_value.get_quiz_by_id.return_value = None
 
         token = create_session_token("admin@example.com", "stu_admin")
@@ -212,7 +293,7 @@ class TestQuizAnalytics:
         self, mock_dep_sheets, mock_router_sheets, mock_parser, client
     ):
         """Quiz with unparseable content returns 500."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
         mock_router_sheets.return_value.get_quiz_by_id.return_value = make_quiz_meta(
             "q001", "Quiz 1"
         )
@@ -234,7 +315,7 @@ class TestQuizAnalytics:
         """Quiz analytics page shows statistics."""
         from app.models.quiz import Question, Quiz
 
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
         mock_router_sheets.return_value.get_quiz_by_id.return_value = make_quiz_meta(
             "q001", "Test Quiz"
         )
@@ -283,7 +364,7 @@ class TestGradingPage:
     @patch("app.dependencies.get_sheets_client")
     def test_non_admin_returns_403(self, mock_sheets, client):
         """Non-admin user gets 403."""
-        mock_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         token = create_session_token("user@example.com", "stu_001")
 
@@ -297,7 +378,7 @@ class TestGradingPage:
     @patch("app.dependencies.get_sheets_client")
     def test_admin_can_access_grading(self, mock_dep_sheets, mock_router_sheets, client):
         """Admin user can access grading page."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = []
         mock_router_sheets.return_value.get_all_roster.return_value = []
@@ -315,7 +396,7 @@ class TestGradingPage:
     @patch("app.dependencies.get_sheets_client")
     def test_grading_shows_all_students(self, mock_dep_sheets, mock_router_sheets, client):
         """Grading page shows all students."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
@@ -324,7 +405,7 @@ class TestGradingPage:
             make_roster_entry("stu_001", "Smith, John"),
             make_roster_entry("stu_002", "Doe, Jane"),
         ]
-        mock_router_sheets.return_value.get_all_quiz_submissions.return_value = []
+        mock_router_sheets.return_value.get_best_scores.return_value = {}
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -343,7 +424,7 @@ class TestGradingPage:
         self, mock_dep_sheets, mock_router_sheets, client
     ):
         """Grading page shows 0 for students with no submissions."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
@@ -351,7 +432,7 @@ class TestGradingPage:
         mock_router_sheets.return_value.get_all_roster.return_value = [
             make_roster_entry("stu_001", "Smith, John"),
         ]
-        mock_router_sheets.return_value.get_all_quiz_submissions.return_value = []
+        mock_router_sheets.return_value.get_best_scores.return_value = {}
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -367,8 +448,8 @@ class TestGradingPage:
     @patch("app.routers.admin.get_sheets_client")
     @patch("app.dependencies.get_sheets_client")
     def test_grading_shows_best_score(self, mock_dep_sheets, mock_router_sheets, client):
-        """Grading page shows best score for multiple attempts."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        """Grading page shows the grade book's best score."""
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
@@ -376,11 +457,7 @@ class TestGradingPage:
         mock_router_sheets.return_value.get_all_roster.return_value = [
             make_roster_entry("stu_001", "Smith, John"),
         ]
-        mock_router_sheets.return_value.get_all_quiz_submissions.return_value = [
-            make_submission("stu_001", "q001", 5, attempt=1),
-            make_submission("stu_001", "q001", 8, attempt=2),
-            make_submission("stu_001", "q001", 6, attempt=3),
-        ]
+        mock_router_sheets.return_value.get_best_scores.return_value = {"stu_001": {"q001": 8}}
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -390,7 +467,6 @@ class TestGradingPage:
         )
 
         assert response.status_code == 200
-        # Should show 8 (best score), not 5 or 6
         assert ">8</td>" in response.text
 
 
@@ -406,7 +482,7 @@ class TestGradingCSV:
     @patch("app.dependencies.get_sheets_client")
     def test_non_admin_returns_403(self, mock_sheets, client):
         """Non-admin user gets 403."""
-        mock_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         token = create_session_token("user@example.com", "stu_001")
 
@@ -420,7 +496,7 @@ class TestGradingCSV:
     @patch("app.dependencies.get_sheets_client")
     def test_csv_returns_correct_content_type(self, mock_dep_sheets, mock_router_sheets, client):
         """CSV download returns correct content type."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = []
         mock_router_sheets.return_value.get_all_roster.return_value = []
@@ -443,7 +519,7 @@ class TestGradingCSV:
         self, mock_dep_sheets, mock_router_sheets, client
     ):
         """CSV contains correct headers and data."""
-        mock_dep_sheets.return_value.get_config.return_value = "admin@example.com"
+        mock_dep_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
 
         mock_router_sheets.return_value.get_quizzes.return_value = [
             make_quiz_meta("q001", "Quiz 1"),
@@ -453,12 +529,7 @@ class TestGradingCSV:
             make_roster_entry("stu_001", "Smith, John", "john@example.com"),
         ]
 
-        def mock_submissions(quiz_id):
-            if quiz_id == "q001":
-                return [make_submission("stu_001", "q001", 8)]
-            return []
-
-        mock_router_sheets.return_value.get_all_quiz_submissions.side_effect = mock_submissions
+        mock_router_sheets.return_value.get_best_scores.return_value = {"stu_001": {"q001": 8}}
 
         token = create_session_token("admin@example.com", "stu_admin")
 
@@ -485,3 +556,30 @@ class TestGradingCSV:
         assert "stu_001" in lines[1]
         assert ",8," in lines[1] or lines[1].endswith(",8")  # Quiz 1 score
         assert ",0" in lines[1]  # Quiz 2 score (no submission)
+
+
+class TestAdminStats:
+    """Tests for the admin stats endpoint."""
+
+    @patch("app.dependencies.get_sheets_client")
+    def test_stats_requires_admin(self, mock_sheets, client):
+        """Non-admin users cannot read stats."""
+        mock_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
+        token = create_session_token("user@example.com", "stu_001")
+
+        response = client.get("/admin/stats", cookies={"session": token})
+        assert response.status_code == 403
+
+    @patch("app.dependencies.get_sheets_client")
+    def test_stats_reports_maintenance_and_cache(self, mock_sheets, client):
+        """Admin sees per-task maintenance timings and cache statistics."""
+        mock_sheets.return_value.get_admin_emails.return_value = {"admin@example.com"}
+        token = create_session_token("admin@example.com", "stu_admin")
+
+        response = client.get("/admin/stats", cookies={"session": token})
+        assert response.status_code == 200
+        data = response.json()
+        assert "token_cleanup" in data["maintenance"]
+        assert "runs" in data["maintenance"]["sqlite_optimize"]
+        assert "total_entries" in data["cache"]
+        assert data["sheets_outbox"] == {"pending": 0, "failed": 0}
@@ -6,8 +6,11 @@ from datetime import datetime
 import pytest
 
 from app.models.quiz import Question, Quiz, QuizSubmission
+from app.services import analytics as analytics_module
 from app.services.analytics import (
     QuizAnalytics,
+    aggregate_course,
+    build_columns,
     compute_quiz_analytics,
     get_best_submissions,
 )
@@ -76,6 +79,33 @@ class TestGetBestSubmissions:
         assert result["stu_002"].score == 10
 
 
+class TestAggregateCourse:
+    """Tests for aggregate_course function."""
+
+    def test_empty(self):
+        """No submissions gives an empty aggregate."""
+        course = aggregate_course([])
+
+        assert course.best == {}
+        assert course.attempts == {}
+
+    def test_groups_best_per_student_per_quiz(self):
+        """One pass keeps each student's best submission and attempts for every quiz."""
+        submissions = [
+            make_submission("stu_001", "q001", 5, 10, {}, {}),
+            make_submission("stu_001", "q001", 9, 10, {}, {}),
+            make_submission("stu_002", "q001", 6, 10, {}, {}),
+            make_submission("stu_001", "q002", 3, 4, {}, {}),
+        ]
+
+        course = aggregate_course(submissions)
+
+        assert course.best["q001"] == get_best_submissions(submissions[:3])
+        assert course.best["q002"]["stu_001"] is submissions[3]
+        assert course.attempts == {"q001": {"stu_001": 2, "stu_002": 1}, "q002": {"stu_001": 1}}
+        assert course.last_submitted_at["q001"]["stu_001"] == submissions[1].submitted_at
+
+
 class TestComputeQuizAnalytics:
     """Tests for compute_quiz_analytics function."""
 
@@ -210,6 +240,63 @@ class TestComputeQuizAnalytics:
         for qs in analytics.question_stats:
             assert qs.correct_count == 0
 
+    def test_parses_each_submission_once(self, sample_quiz, monkeypatch):
+        """JSON is decoded once per submission, not once per question."""
+        calls = []
+        real_loads = json.loads
+        monkeypatch.setattr(
+            analytics_module.json, "loads", lambda s: calls.append(s) or real_loads(s)
+        )
+        submissions = [
+            make_submission(f"stu_{i}", "q001", 5, 10, {"q1": "4"}, {"q1": {"correct": True}})
+            for i in range(3)
+        ]
+
+        compute_quiz_analytics(sample_quiz, submissions, 10)
+
+        # answers_json + autograde_json per submission, for both questions
+        assert len(calls) == 2 * len(submissions)
+
+
+class TestBuildColumns:
+    """Tests for build_columns function."""
+
+    def test_multi_select_and_unknown_options(self):
+        """Multi-select answers count every chosen option; unknown options are dropped."""
+        quiz = Quiz(
+            quiz_id="q002",
+            title="Multi",
+            questions=[
+                Question(
+                    id="m1",
+                    type="mcq_multi",
+                    text="Pick primes",
+                    points=1,
+                    options=["2", "3", "4"],
+                    correct=["2", "3"],
+                ),
+                Question(id="s1", type="short_text", text="Why?", points=1),
+            ],
+        )
+        subs = [
+            make_submission(
+                "a", "q002", 1, 2, {"m1": ["2", "3"], "s1": "x"}, {"m1": {"correct": True}}
+            ),
+            make_submission("b", "q002", 0, 2, {"m1": ["4", "9"]}, {"m1": {"correct": False}}),
+        ]
+
+        columns = build_columns(quiz, subs)
+
+        assert len(columns) == 2
+        assert columns.scores == [1, 0]
+        assert columns.correct == {"m1": [True, False], "s1": [False, False]}
+        assert sorted(columns.choices["m1"]) == [0, 1, 2]
+        assert "s1" not in columns.choices
+
+        analytics = compute_quiz_analytics(quiz, subs, 2)
+        assert analytics.question_stats[0].option_distribution == {"2": 1, "3": 1, "4": 1}
+        assert analytics.question_stats[1].option_distribution == {}
+
 
 class TestQuizAnalyticsCompletionRate:
     """Tests for QuizAnalytics completion_rate property."""
@@ -6,7 +6,6 @@ from unittest.mock import patch
 import pytest
 
 from app.db.sqlite import init_db
-from app.services.email import EmailResult
 
 
 @pytest.fixture(autouse=True)
@@ -39,12 +38,12 @@ class TestSigninPage:
 class TestRequestMagicLink:
     """Tests for magic link request endpoint."""
 
-    @patch("app.routers.auth.send_magic_link_email")
+    @patch("app.routers.auth.queue_magic_link_email")
     @patch("app.routers.auth.get_sheets_client")
     def test_request_link_success(self, mock_sheets, mock_email, client):
         """Magic link request shows success message."""
         mock_sheets.return_value.append_magic_link_request.return_value = True
-        mock_email.return_value = EmailResult(success=True, message_id="123")
+        mock_email.return_value = 1
 
         # Use unique email to avoid rate limit state from other tests
         email = f"test-{uuid.uuid4()}@example.com"
@@ -66,8 +65,8 @@ class TestRequestMagicLink:
         email = f"ratelimited-{uuid.uuid4()}@example.com"
 
         # Make requests up to the limit
-        with patch("app.routers.auth.send_magic_link_email") as mock_email:
-            mock_email.return_value = EmailResult(success=True)
+        with patch("app.routers.auth.queue_magic_link_email") as mock_email:
+            mock_email.return_value = 1
 
             for _ in range(3):
                 client.post("/auth/request-link", data={"email": email})
@@ -78,12 +77,12 @@ class TestRequestMagicLink:
         assert response.status_code == 200
         assert "too many requests" in response.text.lower()
 
-    @patch("app.routers.auth.send_magic_link_email")
+    @patch("app.routers.auth.queue_magic_link_email")
     @patch("app.routers.auth.get_sheets_client")
     def test_request_link_same_response_for_unknown_email(self, mock_sheets, mock_email, client):
         """Unknown emails get same response to prevent enumeration."""
         mock_sheets.return_value.append_magic_link_request.return_value = True
-        mock_email.return_value = EmailResult(success=True)
+        mock_email.return_value = 1
 
         # Use unique email to avoid rate limit state from other tests
         email = f"unknown-{uuid.uuid4()}@nonexistent.com"
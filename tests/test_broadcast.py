@@ -0,0 +1,248 @@
+"""Tests for class-wide email broadcasts."""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.db.sqlite import get_db, init_db
+from app.models.roster import RosterEntry
+from app.services import broadcast, email, email_outbox
+from app.services.email_outbox import RateLimiter
+from app.services.sessions import ROLE_ADMIN, create_session_token
+
+
+class FakeForwardEmail:
+    """Local stand-in for the Forward Email API, mounted as an httpx transport."""
+
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        self.sent: list[dict] = []
+        self.fail_first = fail_first
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return httpx.Response(429, text="Too Many Requests")
+            self.sent.append(json.loads(request.content))
+            return httpx.Response(200, json={"id": f"msg-{len(self.sent)}"})
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with an empty email queue before each test."""
+    init_db()
+    with get_db() as db:
+        db.execute("DELETE FROM email_outbox")
+        db.execute("DELETE FROM email_broadcasts")
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Route sends to a FakeForwardEmail with fast pacing."""
+    fake = FakeForwardEmail(delay=0.01)
+    monkeypatch.setattr(email.settings, "forwardemail_user", "portal@example.com")
+    monkeypatch.setattr(email.settings, "forwardemail_pass", "secret")
+    monkeypatch.setattr(email.settings, "email_send_concurrency", 3)
+    monkeypatch.setattr(email_outbox, "_limiter", RateLimiter(0))
+    monkeypatch.setattr(email, "_client", httpx.AsyncClient(transport=httpx.MockTransport(fake)))
+    return fake
+
+
+def make_students(count: int) -> list[RosterEntry]:
+    return [
+        RosterEntry(
+            student_id=f"stu_{i:03d}",
+            full_name=f"Doe, Student{i}",
+            preferred_email=f"s{i}@example.com",
+            claimed_at=datetime(2025, 1, 1),
+        )
+        for i in range(count)
+    ]
+
+
+async def drain() -> None:
+    while await email_outbox.deliver():
+        pass
+
+
+class TestRender:
+    """Tests for per-student templating."""
+
+    def test_placeholders_filled_per_student(self):
+        """Student fields and shared context fill the template."""
+        fields = {**broadcast.student_fields(make_students(1)[0]), "quiz": "Quiz 3"}
+
+        assert broadcast.render("Hi $name, $quiz is open", fields) == "Hi Student0, Quiz 3 is open"
+
+    def test_unknown_placeholders_kept(self):
+        """A typo in a placeholder doesn't fail the broadcast."""
+        assert broadcast.render("Hi $nmae", {"name": "A"}) == "Hi $nmae"
+
+    def test_html_values_escaped(self):
+        """Values are escaped in HTML templates."""
+        assert broadcast.render("<b>$name</b>", {"name": "<A&B>"}, escape=True) == (
+            "<b>&lt;A&amp;B&gt;</b>"
+        )
+
+
+class TestBroadcastDelivery:
+    """End-to-end broadcasts against the fake Forward Email API."""
+
+    async def test_every_claimed_student_gets_their_message(self, fake_api):
+        """Each claimed student receives a personalised email; unclaimed are skipped."""
+        students = make_students(5) + [RosterEntry(student_id="stu_x", full_name="No, Email")]
+
+        broadcast_id, queued = broadcast.create_broadcast(
+            "Quiz open", "Hi $name", students, created_by="admin@example.com"
+        )
+        await drain()
+
+        assert queued == 5
+        assert sorted(m["text"] for m in fake_api.sent) == [f"Hi Student{i}" for i in range(5)]
+        progress = broadcast.get_progress(broadcast_id)
+        assert progress["sent"] == 5
+        assert progress["done"] is True
+
+    async def test_concurrency_is_bounded(self, fake_api):
+        """No more than email_send_concurrency sends are in flight."""
+        broadcast.create_broadcast("Hi", "Hi", make_students(10), created_by="a@example.com")
+
+        await drain()
+
+        assert len(fake_api.sent) == 10
+        assert 1 < fake_api.max_in_flight <= 3
+
+    async def test_throttled_sends_are_retried(self, fake_api):
+        """Recipients rejected with 429 stay pending for a later pass."""
+        fake_api.fail_first = 2
+        broadcast_id, _ = broadcast.create_broadcast(
+            "Hi", "Hi", make_students(4), created_by="a@example.com"
+        )
+
+        await email_outbox.deliver()
+
+        progress = broadcast.get_progress(broadcast_id)
+        assert progress["sent"] == 2
+        assert progress["pending"] == 2
+        assert progress["done"] is False
+
+    async def test_resume_after_crash_sends_only_remaining(self, fake_api):
+        """After a crash mid-broadcast, only unsent recipients are sent."""
+        broadcast_id, _ = broadcast.create_broadcast(
+            "Hi", "Hi $name", make_students(6), created_by="a@example.com"
+        )
+        # A sender sent two emails, then died holding leases on the rest
+        await email_outbox.deliver(limit=2)
+        email_outbox._claim(10)
+        with get_db() as db:
+            db.execute(
+                "UPDATE email_outbox SET next_attempt_at = '2000-01-01' WHERE status = 'pending'"
+            )
+
+        await drain()
+
+        recipients = [m["to"] for m in fake_api.sent]
+        assert len(recipients) == 6
+        assert len(set(recipients)) == 6
+        assert broadcast.get_progress(broadcast_id)["sent"] == 6
+
+
+class TestBroadcastQueueing:
+    """Tests for what a broadcast queues and how it shares the outbox."""
+
+    def test_recipients_counts_queued_emails(self):
+        """Duplicate addresses and unclaimed students are not counted as recipients."""
+        students = make_students(3) + [
+            RosterEntry(
+                student_id="stu_dup",
+                full_name="Dup, Student",
+                preferred_email="S0@example.com",
+                claimed_at=datetime(2025, 1, 1),
+            ),
+            RosterEntry(
+                student_id="stu_unclaimed",
+                full_name="Un, Claimed",
+                preferred_email="unclaimed@example.com",
+            ),
+        ]
+
+        broadcast_id, queued = broadcast.create_broadcast(
+            "Hi", "Hi", students, created_by="a@example.com"
+        )
+
+        assert queued == 3
+        assert broadcast.get_progress(broadcast_id)["recipients"] == 3
+
+    def test_magic_links_claimed_before_broadcast(self):
+        """A magic link queued after a broadcast is claimed ahead of it."""
+        broadcast.create_broadcast("Hi", "Hi", make_students(20), created_by="a@example.com")
+        email_outbox.enqueue("magic_link", "late@example.com", "Sign in", text="link")
+
+        rows = email_outbox._claim(5)
+
+        assert [row["kind"] for row in rows] == ["magic_link"] + ["broadcast"] * 4
+
+    async def test_pass_bounded_by_send_rate(self, fake_api, monkeypatch):
+        """A pass claims no more than the send rate allows in MAX_PASS_SECONDS."""
+        monkeypatch.setattr(email_outbox.settings, "email_send_per_second", 1.0)
+        monkeypatch.setattr(email_outbox, "MAX_PASS_SECONDS", 4)
+        broadcast.create_broadcast("Hi", "Hi", make_students(10), created_by="a@example.com")
+
+        assert await email_outbox.deliver() == 4
+
+
+class TestRateLimiter:
+    """Tests for send pacing."""
+
+    async def test_starts_are_spaced(self):
+        """Consecutive waits are at least 1 / per_second apart."""
+        limiter = RateLimiter(50)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        await asyncio.gather(*(limiter.wait() for _ in range(4)))
+
+        assert loop.time() - started >= 3 / 50 * 0.9
+
+
+class TestBroadcastRoutes:
+    """Tests for the admin broadcast endpoints."""
+
+    @patch("app.routers.admin.get_sheets_client")
+    def test_admin_creates_broadcast_and_reads_progress(self, mock_router_sheets, client):
+        """An admin can queue a broadcast and poll its progress."""
+        mock_router_sheets.return_value.get_all_roster.return_value = make_students(3)
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.post(
+            "/admin/broadcasts",
+            data={"subject": "Reminder", "text": "Hi $name"},
+            cookies={"session": token},
+        )
+        assert response.status_code == 200
+        created = response.json()
+        assert created["recipients"] == 3
+
+        response = client.get(
+            f"/admin/broadcasts/{created['broadcast_id']}", cookies={"session": token}
+        )
+        assert response.json()["pending"] == 3
+
+    def test_unknown_broadcast_is_404(self, client):
+        """Progress of a missing broadcast is 404."""
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.get("/admin/broadcasts/999", cookies={"session": token})
+        assert response.status_code == 404
@@ -1,19 +1,29 @@
 """Tests for the cache module."""
 
+import asyncio
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import pytest
+
+from app.config import settings
 from app.services.cache import (
     _cache,
+    _tag_index,
     cached,
+    estimate_size,
     get_cache_stats,
-    invalidate,
     invalidate_all,
+    invalidate_tags,
+    sweep_expired,
 )
 
 
 def setup_function():
     """Clear cache before each test."""
-    _cache.clear()
+    invalidate_all()
 
 
 def test_cached_returns_result():
@@ -84,31 +94,6 @@ def test_cached_expires():
     assert call_count == 2  # Called twice due to expiry
 
 
-def test_invalidate_by_prefix():
-    """Test that invalidate removes matching entries."""
-
-    @cached(ttl_seconds=60, prefix="student")
-    def get_student(id):
-        return {"id": id}
-
-    @cached(ttl_seconds=60, prefix="quiz")
-    def get_quiz(id):
-        return {"id": id}
-
-    # Populate cache
-    get_student(1)
-    get_student(2)
-    get_quiz(1)
-
-    assert len(_cache) == 3
-
-    # Invalidate students
-    count = invalidate("student")
-
-    assert count == 2
-    assert len(_cache) == 1  # Only quiz remains
-
-
 def test_invalidate_all():
     """Test that invalidate_all clears entire cache."""
 
@@ -170,3 +155,322 @@ def test_cached_with_kwargs():
     assert result2 == 15
     assert result3 == 10
     assert call_count == 2  # Different kwargs = different cache entries
+
+
+def test_concurrent_misses_are_coalesced():
+    """Concurrent misses for one key call the function once and share its result."""
+    call_count = 0
+    release = threading.Event()
+
+    @cached(ttl_seconds=60, prefix="herd")
+    def slow_load(x):
+        nonlocal call_count
+        call_count += 1
+        release.wait(5)
+        return {"x": x}
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        futures = [pool.submit(slow_load, 1) for _ in range(10)]
+        # Let every caller reach the cache before the load finishes
+        deadline = time.time() + 5
+        while get_cache_stats()["coalesced_misses"] < 9 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert call_count == 1
+    assert all(r is results[0] for r in results)
+    assert get_cache_stats()["inflight_loads"] == 0
+
+
+def test_coalesced_waiters_share_exception():
+    """A failed load raises in every waiter and is not cached."""
+    call_count = 0
+    release = threading.Event()
+
+    @cached(ttl_seconds=60, prefix="herd")
+    def failing_load():
+        nonlocal call_count
+        call_count += 1
+        release.wait(5)
+        raise RuntimeError("429 quota exceeded")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(failing_load) for _ in range(4)]
+        deadline = time.time() + 5
+        while get_cache_stats()["coalesced_misses"] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result()
+
+    assert call_count == 1
+    assert len(_cache) == 0
+
+    # The next call retries
+    with pytest.raises(RuntimeError):
+        failing_load()
+    assert call_count == 2
+
+
+def test_invalidate_during_load_discards_result():
+    """A load that was running when its key was invalidated does not populate the cache."""
+    started = threading.Event()
+    release = threading.Event()
+
+    @cached(ttl_seconds=60, prefix="inval")
+    def load():
+        started.set()
+        release.wait(5)
+        return "old"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(load)
+        started.wait(5)
+        invalidate_tags("inval")
+        release.set()
+        assert future.result() == "old"
+
+    assert len(_cache) == 0
+    assert not _tag_index
+
+
+async def test_coalescing_from_event_loop():
+    """Callers awaiting the load on worker threads share one call."""
+    call_count = 0
+
+    @cached(ttl_seconds=60, prefix="aio")
+    def load():
+        nonlocal call_count
+        call_count += 1
+        time.sleep(0.05)
+        return "value"
+
+    results = await asyncio.gather(*(asyncio.to_thread(load) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert call_count == 1
+    # The event loop thread itself is served from the cache
+    assert load() == "value"
+
+
+async def test_event_loop_miss_does_not_wait_on_worker_load():
+    """A miss on the event loop runs its own load instead of blocking on a worker's."""
+    started = threading.Event()
+    release = threading.Event()
+
+    @cached(ttl_seconds=60, prefix="aio-block")
+    def load():
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+            return "worker"
+        return "loop"
+
+    worker = asyncio.create_task(asyncio.to_thread(load))
+    await asyncio.to_thread(started.wait, 5)
+
+    # The worker's load is still running; the loop is not held up by it
+    assert load() == "loop"
+    release.set()
+    assert await worker == "worker"
+
+
+def wait_for_refresh(timeout: float = 5) -> None:
+    """Wait until no background refresh is running."""
+    deadline = time.time() + timeout
+    while get_cache_stats()["inflight_loads"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_stale_value_served_while_refreshing():
+    """Within the stale window the old value is returned and refreshed in the background."""
+    values = iter(["v1", "v2"])
+    refresh_started = threading.Event()
+    release = threading.Event()
+
+    @cached(ttl_seconds=0.05, prefix="swr", stale_ttl=60)
+    def load():
+        value = next(values)
+        if value == "v2":
+            refresh_started.set()
+            release.wait(5)
+        return value
+
+    assert load() == "v1"
+    time.sleep(0.1)
+
+    # Expired but still within the stale window: no waiting on the refresh
+    assert load() == "v1"
+    assert refresh_started.wait(5)
+    assert load() == "v1"  # only one refresh is started
+    assert get_cache_stats()["stale_entries"] == 1
+
+    release.set()
+    wait_for_refresh()
+    assert load() == "v2"
+
+
+def test_failed_refresh_keeps_stale_value():
+    """A background refresh that raises leaves the stale value in place."""
+    calls = 0
+
+    @cached(ttl_seconds=0.05, prefix="swr", stale_ttl=60)
+    def load():
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise RuntimeError("503 backend error")
+        return "v1"
+
+    load()
+    time.sleep(0.1)
+    assert load() == "v1"
+    wait_for_refresh()
+
+    assert calls == 2
+    assert load() == "v1"
+
+
+def test_hard_expiry_after_stale_window():
+    """Past the stale window the caller waits for a fresh value."""
+    values = iter(["v1", "v2"])
+
+    @cached(ttl_seconds=0.05, prefix="swr", stale_ttl=0.05)
+    def load():
+        return next(values)
+
+    assert load() == "v1"
+    time.sleep(0.15)
+    assert load() == "v2"
+
+
+def test_lru_evicts_least_recently_used(monkeypatch):
+    """Over the entry budget, the least recently used entry is evicted."""
+    monkeypatch.setattr(settings, "cache_max_entries", 2)
+    call_count = 0
+
+    @cached(ttl_seconds=60, prefix="lru")
+    def load(x):
+        nonlocal call_count
+        call_count += 1
+        return x
+
+    load(1)
+    load(2)
+    load(1)  # 1 is now most recently used
+    load(3)  # evicts 2
+
+    assert len(_cache) == 2
+    assert get_cache_stats()["evictions"] >= 1
+
+    load(1)
+    assert call_count == 3
+    load(2)
+    assert call_count == 4
+
+
+def test_byte_budget_evicts(monkeypatch):
+    """Entries are evicted to stay within the approximate byte budget."""
+    big = "x" * 10_000
+    monkeypatch.setattr(settings, "cache_max_bytes", estimate_size(big) * 2 + 100)
+
+    @cached(ttl_seconds=60, prefix="bytes")
+    def load(x):
+        return x * 10_000
+
+    load("a")
+    load("b")
+    load("c")
+
+    stats = get_cache_stats()
+    assert len(_cache) == 2
+    assert stats["approx_bytes"] <= settings.cache_max_bytes
+
+
+def test_oversized_value_not_cached(monkeypatch):
+    """A value larger than the whole byte budget is returned but not stored."""
+    monkeypatch.setattr(settings, "cache_max_bytes", 1000)
+
+    @cached(ttl_seconds=60, prefix="bytes")
+    def load():
+        return "x" * 5000
+
+    assert len(load()) == 5000
+    assert len(_cache) == 0
+
+
+def test_sweep_removes_expired_entries():
+    """sweep_expired drops entries past their TTL and stale window only."""
+
+    @cached(ttl_seconds=0.05, prefix="sweep")
+    def short(x):
+        return x
+
+    @cached(ttl_seconds=60, prefix="sweep")
+    def long(x):
+        return x
+
+    short(1)
+    short(2)
+    long(1)
+    time.sleep(0.1)
+
+    assert sweep_expired() == 2
+    assert len(_cache) == 1
+    assert get_cache_stats()["approx_bytes"] == estimate_size(1)
+
+
+def test_estimate_size_counts_nested_objects():
+    """Nested containers and object attributes contribute to the estimate."""
+    flat = estimate_size([])
+    nested = estimate_size([{"name": "x" * 1000}])
+    assert nested > flat + 1000
+
+
+def test_estimate_size_samples_large_containers():
+    """Large containers are sized from a sample, scaled to their length."""
+    rows = [{"student_id": f"stu_{i:05d}", "full_name": "x" * 200 + str(i)} for i in range(20_000)]
+    full = sys.getsizeof(rows) + sum(
+        sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values()) for r in rows
+    )
+
+    assert abs(estimate_size(rows) - full) < full * 0.1
+
+
+def test_invalidate_tags_by_prefix():
+    """Every entry is tagged with its prefix."""
+
+    @cached(ttl_seconds=60, prefix="student")
+    def get_student(id):
+        return {"id": id}
+
+    @cached(ttl_seconds=60, prefix="students_page")
+    def get_page(id):
+        return {"id": id}
+
+    get_student(1)
+    get_student(2)
+    get_page(1)
+
+    # Unlike a prefix scan, the tag does not match "students_page"
+    assert invalidate_tags("student") == 2
+    assert len(_cache) == 1
+
+
+def test_tag_index_cleaned_up():
+    """Removed entries leave no tag index entries behind."""
+
+    @cached(ttl_seconds=0.05, prefix="tidy")
+    def load(x):
+        return x
+
+    load(1)
+    load(2)
+    invalidate_tags("tidy")
+    load(3)
+    time.sleep(0.1)
+    sweep_expired()
+
+    assert not _tag_index
@@ -0,0 +1,42 @@
+"""Tests for the email service."""
+
+import httpx
+
+from app.services import email
+from app.services.email import send_email
+
+
+class TestSharedClient:
+    """Tests for the app-lifetime HTTP client."""
+
+    async def test_sends_reuse_shared_client(self, monkeypatch):
+        """Every send goes through the one pooled client."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"id": f"m{len(requests)}"})
+
+        monkeypatch.setattr(email.settings, "forwardemail_user", "portal@example.com")
+        monkeypatch.setattr(email.settings, "forwardemail_pass", "secret")
+        monkeypatch.setattr(
+            email, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+
+        first = await send_email("a@example.com", "Hi", text="one")
+        second = await send_email("b@example.com", "Hi", text="two")
+        await email.close_http_client()
+
+        assert first.message_id == "m1"
+        assert second.message_id == "m2"
+        assert len(requests) == 2
+        assert email._client is None
+
+    async def test_unconfigured_credentials_fail_fast(self, monkeypatch):
+        """Without credentials no request is made."""
+        monkeypatch.setattr(email.settings, "forwardemail_user", "")
+
+        result = await send_email("a@example.com", "Hi", text="x")
+
+        assert result.success is False
+        assert result.error == "Email not configured"
@@ -0,0 +1,122 @@
+"""Tests for the outgoing email queue."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.db.sqlite import get_db, init_db
+from app.services import email_outbox
+from app.services.email import EmailResult, queue_magic_link_email
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with an empty email queue before each test."""
+    init_db()
+    with get_db() as db:
+        db.execute("DELETE FROM email_outbox")
+
+
+def email_row(email_id: int):
+    with get_db() as db:
+        return db.execute("SELECT * FROM email_outbox WHERE id = ?", (email_id,)).fetchone()
+
+
+class TestEnqueue:
+    """Tests for queueing email."""
+
+    def test_magic_link_is_queued_not_sent(self):
+        """Queueing a magic link stores it without calling the mail provider."""
+        with patch("app.services.email.send_email") as send:
+            email_id = queue_magic_link_email("a@example.com", "https://x/auth/verify?token=t")
+
+        send.assert_not_called()
+        row = email_row(email_id)
+        assert row["status"] == "pending"
+        assert row["kind"] == "magic_link"
+        assert "token=t" in row["text"]
+
+
+class TestDeliver:
+    """Tests for background delivery."""
+
+    @patch("app.services.email.send_email", new_callable=AsyncMock)
+    async def test_sent_email_is_marked_and_logged(self, send):
+        """A sent magic link is marked sent and written to the audit log."""
+        send.return_value = EmailResult(success=True, message_id="m1")
+        email_id = queue_magic_link_email("a@example.com", "https://x")
+        client = MagicMock()
+
+        assert await email_outbox.deliver(client) == 1
+
+        row = email_row(email_id)
+        assert row["status"] == "sent"
+        assert row["message_id"] == "m1"
+        logged = client.append_magic_link_request.call_args[0][0]
+        assert logged["email"] == "a@example.com"
+        assert logged["result"] == "sent"
+        # The login link is not kept once sent
+        assert row["html"] is None
+        assert row["text"] is None
+
+    @patch("app.services.email.send_email", new_callable=AsyncMock)
+    async def test_failure_is_retried_later(self, send):
+        """A failed send stays queued with backoff and is not logged yet."""
+        send.return_value = EmailResult(success=False, error="503")
+        email_id = email_outbox.enqueue("magic_link", "a@example.com", "Hi", text="x")
+        client = MagicMock()
+
+        assert await email_outbox.deliver(client) == 0
+        # Backing off: not due again immediately
+        assert await email_outbox.deliver(client) == 0
+
+        row = email_row(email_id)
+        assert row["status"] == "pending"
+        assert row["attempts"] == 1
+        assert row["last_error"] == "503"
+        assert row["text"] == "x"  # still needed for the retry
+        assert send.await_count == 1
+        client.append_magic_link_request.assert_not_called()
+
+    @patch("app.services.email.send_email", new_callable=AsyncMock)
+    async def test_gives_up_after_max_attempts(self, send):
+        """An email failing MAX_ATTEMPTS times is marked failed and logged."""
+        send.return_value = EmailResult(success=False, error="bad address")
+        email_id = email_outbox.enqueue("magic_link", "a@example.com", "Hi", text="x")
+        with get_db() as db:
+            db.execute(
+                "UPDATE email_outbox SET attempts = ? WHERE id = ?",
+                (email_outbox.MAX_ATTEMPTS - 1, email_id),
+            )
+        client = MagicMock()
+
+        await email_outbox.deliver(client)
+
+        assert email_row(email_id)["status"] == "failed"
+        assert email_row(email_id)["text"] is None
+        assert client.append_magic_link_request.call_args[0][0]["result"] == "error"
+
+    def test_prune_clears_finished_login_links(self):
+        """Finished magic links keep no body; other kinds keep theirs until retention ends."""
+        link_id = email_outbox.enqueue("magic_link", "a@example.com", "Hi", text="link")
+        other_id = email_outbox.enqueue("broadcast", "b@example.com", "Hi", text="news")
+        with get_db() as db:
+            db.execute("UPDATE email_outbox SET status = 'sent'")
+
+        email_outbox.prune_finished()
+
+        assert email_row(link_id)["text"] is None
+        assert email_row(other_id)["text"] == "news"
+
+    def test_claimed_email_is_not_claimed_twice(self):
+        """A leased email is invisible to a second sender."""
+        email_outbox.enqueue("magic_link", "a@example.com", "Hi", text="x")
+
+        assert len(email_outbox._claim(10)) == 1
+        assert email_outbox._claim(10) == []
+
+    def test_stats_count_by_status(self):
+        """Queue statistics report every status."""
+        email_outbox.enqueue("magic_link", "a@example.com", "Hi", text="x")
+
+        assert email_outbox.get_outbox_stats() == {"pending": 1, "sent": 0, "failed": 0}
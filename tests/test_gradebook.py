@@ -0,0 +1,223 @@
+"""Tests for the materialized grade book."""
+
+from datetime import datetime
+
+import pytest
+
+from app.db.sqlite import get_db, init_db
+from app.models.quiz import QuizSubmission
+from app.services import gradebook
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with an empty grade book before each test."""
+    init_db()
+    gradebook.clear()
+    yield
+    gradebook.clear()
+
+
+def make_submission(
+    student_id: str,
+    quiz_id: str,
+    score: float,
+    attempt: int = 1,
+    max_score: float = 10,
+    minute: int = 0,
+) -> QuizSubmission:
+    """Create a QuizSubmission for testing."""
+    return QuizSubmission(
+        submitted_at=datetime(2025, 1, 1, 10, minute),
+        quiz_id=quiz_id,
+        attempt=attempt,
+        student_id=student_id,
+        email=f"{student_id}@example.com",
+        answers_json="{}",
+        score=score,
+        max_score=max_score,
+        autograde_json="{}",
+    )
+
+
+def make_row(student_id: str, quiz_id: str, score: float, attempt: int = 1) -> dict:
+    """Create a replicated Quiz_Submissions record for testing."""
+    return {
+        "submitted_at": f"2025-01-01T10:0{attempt}:00",
+        "quiz_id": quiz_id,
+        "attempt": attempt,
+        "student_id": student_id,
+        "score": score,
+        "max_score": 10,
+    }
+
+
+class FakeReplica:
+    """Replicated rows with sheet row numbers, read like replica.read_records_after."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.reads: list[int] = []
+
+    def rows_after(self, row_num: int) -> list[tuple[int, dict]]:
+        self.reads.append(row_num)
+        numbered = [(pos + 2, row) for pos, row in enumerate(self.rows)]
+        return [(n, row) for n, row in numbered if n > row_num]
+
+
+class TestRecord:
+    """Tests for recording submissions."""
+
+    def test_keeps_best_score_and_counts_attempts(self):
+        """Each student keeps their best score, max score and latest submission time."""
+        added = gradebook.record(
+            [
+                make_submission("stu_001", "q001", 5, attempt=1, minute=1),
+                make_submission("stu_001", "q001", 8, attempt=2, max_score=12, minute=2),
+                make_submission("stu_001", "q001", 6, attempt=3, minute=3),
+            ]
+        )
+
+        assert added == 3
+        grade = gradebook.get_student_grades("stu_001")["q001"]
+        assert grade.best_score == 8
+        assert grade.max_score == 12
+        assert grade.attempts == 3
+        assert grade.last_submitted_at == "2025-01-01T10:03:00"
+
+    def test_same_submission_counted_once(self):
+        """Recording a submission again (queued, then replicated) changes nothing."""
+        sub = make_submission("stu_001", "q001", 7)
+        gradebook.record([sub])
+
+        assert gradebook.record([sub]) == 0
+        assert gradebook.get_student_grades("stu_001")["q001"].attempts == 1
+        assert gradebook.get_quiz_stats()["q001"].attempts == 1
+
+    def test_quiz_stats(self):
+        """Per-quiz totals cover each student's best submission."""
+        gradebook.record(
+            [
+                make_submission("stu_001", "q001", 4, attempt=1),
+                make_submission("stu_001", "q001", 9, attempt=2),
+                make_submission("stu_002", "q001", 6),
+                make_submission("stu_002", "q002", 3, max_score=4),
+            ]
+        )
+
+        stats = gradebook.get_quiz_stats()
+        assert (stats["q001"].students, stats["q001"].attempts) == (2, 3)
+        assert stats["q001"].avg_score == 75.0  # (9 + 6) / 20
+        assert stats["q002"].avg_score == 75.0
+        assert gradebook.get_best_scores() == {
+            "stu_001": {"q001": 9},
+            "stu_002": {"q001": 6, "q002": 3},
+        }
+
+    def test_empty(self):
+        """An empty grade book has no grades or totals."""
+        assert gradebook.get_student_grades("stu_001") == {}
+        assert gradebook.get_best_scores() == {}
+        assert gradebook.get_quiz_stats() == {}
+
+
+class TestCatchUp:
+    """Tests for following the replicated Quiz_Submissions."""
+
+    def test_only_reads_new_rows(self):
+        """Each catch-up records only rows replicated since the last one."""
+        fake = FakeReplica([make_row("stu_001", "q001", 5), make_row("stu_002", "q001", 7)])
+
+        assert gradebook.catch_up(1, fake.rows_after, list) == 2
+
+        fake.rows.append(make_row("stu_001", "q001", 9, attempt=2))
+        assert gradebook.catch_up(1, fake.rows_after, list) == 1
+        assert gradebook.catch_up(1, fake.rows_after, list) == 0
+
+        assert fake.reads == [1, 3, 4]
+        assert gradebook.get_best_scores() == {"stu_001": {"q001": 9}, "stu_002": {"q001": 7}}
+
+    def test_up_to_date_read_takes_no_lock(self, monkeypatch):
+        """With nothing new to record, catch-up neither locks nor writes."""
+        fake = FakeReplica([make_row("stu_001", "q001", 5)])
+        gradebook.catch_up(1, fake.rows_after, list)
+
+        class NoLock:
+            def __enter__(self):
+                raise AssertionError("lock taken")
+
+            def __exit__(self, *exc):
+                return False
+
+        monkeypatch.setattr(gradebook, "_lock", NoLock())
+
+        assert gradebook.catch_up(1, fake.rows_after, list) == 0
+
+    def test_new_generation_rebuilds(self):
+        """Changed rows rebuild the book from every row plus queued submissions."""
+        fake = FakeReplica([make_row("stu_001", "q001", 9)])
+        gradebook.catch_up(1, fake.rows_after, list)
+
+        # A regrade lowered the score; stu_002's submission is still queued
+        fake.rows[0] = make_row("stu_001", "q001", 4)
+        queued = make_submission("stu_002", "q001", 6, minute=5)
+        gradebook.catch_up(2, fake.rows_after, lambda: [queued])
+
+        assert gradebook.get_best_scores() == {"stu_001": {"q001": 4}, "stu_002": {"q001": 6}}
+        assert gradebook.get_quiz_stats()["q001"].total_best_score == 10
+
+    def test_rebuild_matches_incremental_book(self):
+        """A rebuilt book holds the same grades and totals as one built row by row."""
+        fake = FakeReplica(
+            [
+                make_row("stu_001", "q001", 5),
+                make_row("stu_001", "q001", 9, attempt=2),
+                make_row("stu_002", "q001", 7),
+                make_row("stu_001", "q002", 3),
+            ]
+        )
+        for count in range(1, 5):
+            gradebook.catch_up(1, FakeReplica(fake.rows[:count]).rows_after, list)
+        grades = gradebook.get_student_grades("stu_001")
+        stats = gradebook.get_quiz_stats()
+
+        queued = make_submission("stu_002", "q001", 7, minute=1)
+        assert gradebook.catch_up(2, fake.rows_after, lambda: [queued]) == 4
+
+        assert gradebook.get_student_grades("stu_001") == grades
+        assert gradebook.get_quiz_stats() == stats
+
+    def test_skips_blank_rows(self):
+        """Rows without a student or quiz are skipped but still advance the position."""
+        fake = FakeReplica([{"student_id": "", "quiz_id": ""}, make_row("stu_001", "q001", 5)])
+
+        gradebook.catch_up(1, fake.rows_after, list)
+        gradebook.catch_up(1, fake.rows_after, list)
+
+        assert fake.reads == [1, 3]
+        assert gradebook.get_student_grades("stu_001")["q001"].attempts == 1
+
+    def test_queued_submission_counted_once_when_replicated(self):
+        """A recorded submission is matched by its row's submitted_at cell."""
+        sub = make_submission("stu_001", "q001", 5)
+        gradebook.record([sub])
+
+        row = make_row("stu_001", "q001", 5)
+        row["submitted_at"] = sub.submitted_at.isoformat()
+        gradebook.catch_up(1, FakeReplica([row]).rows_after, list)
+
+        assert gradebook.get_student_grades("stu_001")["q001"].attempts == 1
+
+    def test_unparseable_submitted_at_counted_once(self):
+        """A row whose submitted_at doesn't parse keeps the same key when read again."""
+        row = make_row("stu_001", "q001", 5)
+        row["submitted_at"] = "yesterday"
+        fake = FakeReplica([row])
+        gradebook.catch_up(1, fake.rows_after, list)
+
+        # Read the row again as if the position had not been saved
+        with get_db() as db:
+            db.execute("UPDATE gradebook_state SET last_row = 1")
+        gradebook.catch_up(1, fake.rows_after, list)
+
+        assert gradebook.get_student_grades("stu_001")["q001"].attempts == 1
@@ -1,7 +1,14 @@
 """Tests for quiz grading service."""
 
+from unittest.mock import patch
+
 from app.models.quiz import Question, Quiz
-from app.services.grading import grade_question, grade_quiz
+from app.services.grading import (
+    compile_question,
+    compile_quiz,
+    grade_question,
+    grade_quiz,
+)
 
 
 class TestGradeQuestion:
@@ -236,3 +243,29 @@ class TestGradeQuiz:
         assert json_result["q1"]["correct"] is False
         assert json_result["q1"]["points"] == 0
         assert json_result["q1"]["max"] == 2
+
+
+class TestGradingPlan:
+    """Tests for compiled grading plans and batch grading."""
+
+    def make_quiz(self) -> Quiz:
+        return Quiz(
+            quiz_id="quiz1",
+            title="Test",
+            questions=[
+                Question(id="q1", type="mcq_multi", text="?", points=2, correct=["A", "C"]),
+                Question(id="q2", type="numeric", text="?", points=3, correct="8"),
+                Question(id="q3", type="short_text", text="?", points=1, correct="Paris"),
+            ],
+        )
+
+    def test_quiz_compiled_once(self):
+        """A quiz's answer keys are compiled once, not per submission."""
+        quiz = self.make_quiz()
+
+        with patch("app.services.grading.compile_question", wraps=compile_question) as compiled:
+            for _ in range(100):
+                grade_quiz(quiz, {"q2": "8"})
+
+        assert compiled.call_count == 3
+        assert compile_quiz(quiz) is compile_quiz(quiz)
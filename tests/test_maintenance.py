@@ -0,0 +1,59 @@
+"""Tests for the background maintenance runner."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from app.services.maintenance import MaintenanceTask, run_due, run_scheduler
+
+
+class TestRunDue:
+    """Tests for running due tasks."""
+
+    def test_runs_due_tasks_and_records_timing(self):
+        """A due task runs and its result and timing are recorded."""
+        task = MaintenanceTask("sweep", 60, MagicMock(return_value=3))
+
+        assert run_due([task]) == ["sweep"]
+
+        stats = task.stats()
+        assert stats["runs"] == 1
+        assert stats["last_result"] == 3
+        assert stats["last_duration_ms"] is not None
+        assert stats["last_run_at"] is not None
+
+    def test_respects_interval(self):
+        """A task does not run again before its interval has passed."""
+        func = MagicMock(return_value=0)
+        task = MaintenanceTask("prune", 3600, func)
+
+        run_due([task])
+        assert run_due([task]) == []
+        assert func.call_count == 1
+
+    def test_failure_is_recorded_and_others_still_run(self):
+        """A failing task is counted and does not stop the other tasks."""
+        failing = MaintenanceTask("bad", 60, MagicMock(side_effect=RuntimeError("locked")))
+        ok = MaintenanceTask("good", 60, MagicMock(return_value=1))
+
+        assert run_due([failing, ok]) == ["bad", "good"]
+
+        assert failing.stats()["failures"] == 1
+        assert failing.stats()["last_error"] == "locked"
+        assert ok.stats()["failures"] == 0
+
+
+class TestScheduler:
+    """Tests for the background loop."""
+
+    async def test_scheduler_stops_promptly(self, monkeypatch):
+        """The loop runs a pass and exits once stop is set."""
+        passes = MagicMock(return_value=[])
+        monkeypatch.setattr("app.services.maintenance.run_due", passes)
+        stop = asyncio.Event()
+
+        task = asyncio.create_task(run_scheduler(stop, tick=60))
+        await asyncio.sleep(0.05)
+        stop.set()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert passes.call_count == 1
@@ -98,7 +98,7 @@ class TestOnboardingSubmit:
         sheets = MagicMock()
         sheets.get_roster_by_id.return_value = claimed_entry
         sheets.update_roster.return_value = True
-        sheets.append_onboarding_response.return_value = True
+        sheets.append_onboarding_responses.return_value = True
         mock_sheets.return_value = sheets
 
         response = client.post(
@@ -117,6 +117,16 @@ class TestOnboardingSubmit:
         assert response.status_code == 302
         assert "/home" in response.headers["location"]
         sheets.update_roster.assert_called_once()
+        # All answered fields are logged in one queued batch
+        sheets.append_onboarding_responses.assert_called_once()
+        responses = sheets.append_onboarding_responses.call_args[0][0]
+        assert [r["question_key"] for r in responses] == [
+            "preferred_name",
+            "preferred_pronoun",
+            "cs_experience",
+            "hobbies",
+            "class_goals",
+        ]
 
     @patch("app.routers.onboarding.get_sheets_client")
     def test_onboarding_success_empty_form(self, mock_sheets, client, auth_token, claimed_entry):
@@ -0,0 +1,167 @@
+"""Tests for the Sheets write-behind outbox."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.db.sqlite import get_db, init_db
+from app.services import outbox
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with an empty outbox before each test."""
+    init_db()
+    with get_db() as db:
+        db.execute("DELETE FROM sheets_outbox")
+    yield
+    with get_db() as db:
+        db.execute("DELETE FROM sheets_outbox")
+
+
+def outbox_rows() -> list:
+    with get_db() as db:
+        return db.execute("SELECT * FROM sheets_outbox ORDER BY id").fetchall()
+
+
+class TestEnqueue:
+    """Tests for queueing rows."""
+
+    def test_enqueue_is_pending(self):
+        """Queued rows are returned by pending_rows for their tab only."""
+        outbox.enqueue("MagicLink_Requests", {"email": "a@example.com"})
+        outbox.enqueue_many("Onboarding_Responses", [{"answer": "x"}, {"answer": "y"}])
+
+        assert outbox.pending_rows("MagicLink_Requests") == [{"email": "a@example.com"}]
+        assert outbox.pending_rows("Onboarding_Responses") == [{"answer": "x"}, {"answer": "y"}]
+        assert outbox.pending_rows("Quiz_Submissions") == []
+
+    def test_pending_rows_filtered_by_field(self):
+        """Field filters return only matching rows, compared as text."""
+        outbox.enqueue_many(
+            "Quiz_Submissions",
+            [
+                {"student_id": "stu_001", "quiz_id": "q001"},
+                {"student_id": "stu_002", "quiz_id": "q001"},
+                {"student_id": "stu_001", "quiz_id": 2},
+            ],
+        )
+
+        assert outbox.pending_rows("Quiz_Submissions", student_id="stu_001", quiz_id="2") == [
+            {"student_id": "stu_001", "quiz_id": 2}
+        ]
+        assert len(outbox.pending_rows("Quiz_Submissions", quiz_id="q001")) == 2
+
+
+class TestFlush:
+    """Tests for flushing queued rows to Sheets."""
+
+    def test_flush_batches_per_tab_in_order(self):
+        """Each tab is written with one call containing its rows in queue order."""
+        outbox.enqueue("Onboarding_Responses", {"answer": "1"})
+        outbox.enqueue("MagicLink_Requests", {"email": "a@example.com"})
+        outbox.enqueue("Onboarding_Responses", {"answer": "2"})
+        client = MagicMock()
+
+        assert outbox.flush(client) == 3
+
+        calls = {c.args[0]: c.args[1] for c in client.flush_appends.call_args_list}
+        assert calls == {
+            "Onboarding_Responses": [{"answer": "1"}, {"answer": "2"}],
+            "MagicLink_Requests": [{"email": "a@example.com"}],
+        }
+        assert all(row["flushed_at"] for row in outbox_rows())
+
+        # Nothing left to send
+        client.reset_mock()
+        assert outbox.flush(client) == 0
+        client.flush_appends.assert_not_called()
+
+    def test_failed_flush_backs_off_and_retries(self):
+        """A failed tab keeps its rows, records the error and waits before retrying."""
+        outbox.enqueue("Quiz_Submissions", {"quiz_id": "q001"})
+        client = MagicMock()
+        client.flush_appends.side_effect = Exception("429 quota exceeded")
+
+        assert outbox.flush(client) == 0
+        row = outbox_rows()[0]
+        assert row["attempts"] == 1
+        assert row["flushed_at"] is None
+        assert "quota" in row["last_error"]
+
+        # Still backing off: not retried yet
+        client.flush_appends.reset_mock()
+        assert outbox.flush(client) == 0
+        client.flush_appends.assert_not_called()
+
+        # Shutdown flush ignores the backoff
+        client.flush_appends.side_effect = None
+        assert outbox.flush(client, force=True) == 1
+        assert outbox_rows()[0]["flushed_at"] is not None
+
+    def test_gives_up_after_max_attempts(self, monkeypatch):
+        """A row that keeps failing stops being retried and is no longer shown to readers."""
+        monkeypatch.setattr(outbox, "MAX_ATTEMPTS", 2)
+        outbox.enqueue("Quiz_Submissions", {"quiz_id": "q001"})
+        client = MagicMock()
+        client.flush_appends.side_effect = Exception("bad range")
+
+        outbox.flush(client, force=True)
+        assert outbox_rows()[0]["failed_at"] is None
+        outbox.flush(client, force=True)
+        assert outbox_rows()[0]["failed_at"] is not None
+
+        client.flush_appends.reset_mock()
+        assert outbox.flush(client, force=True) == 0
+        client.flush_appends.assert_not_called()
+        assert outbox.pending_rows("Quiz_Submissions") == []
+        assert outbox.get_outbox_stats() == {"pending": 0, "failed": 1}
+
+    def test_rows_behind_a_backing_off_row_wait(self):
+        """Rows queued after a failed one are not appended ahead of it."""
+        outbox.enqueue("Quiz_Submissions", {"quiz_id": "q001"})
+        client = MagicMock()
+        client.flush_appends.side_effect = Exception("429 quota exceeded")
+        outbox.flush(client)
+
+        outbox.enqueue("Quiz_Submissions", {"quiz_id": "q002"})
+        outbox.enqueue("MagicLink_Requests", {"email": "a@example.com"})
+        client.flush_appends.reset_mock(side_effect=True)
+
+        assert outbox.flush(client) == 1
+        client.flush_appends.assert_called_once_with(
+            "MagicLink_Requests", [{"email": "a@example.com"}]
+        )
+
+    def test_failure_on_one_tab_does_not_block_others(self):
+        """Rows for healthy tabs are flushed even when another tab fails."""
+        outbox.enqueue("Quiz_Submissions", {"quiz_id": "q001"})
+        outbox.enqueue("MagicLink_Requests", {"email": "a@example.com"})
+        client = MagicMock()
+
+        def flush_appends(tab, rows):
+            if tab == "Quiz_Submissions":
+                raise Exception("boom")
+
+        client.flush_appends.side_effect = flush_appends
+
+        assert outbox.flush(client) == 1
+
+    def test_backoff_grows_and_caps(self):
+        """Retry delays double per attempt up to the cap."""
+        assert outbox.backoff_seconds(1) == outbox.BACKOFF_BASE_SECONDS
+        assert outbox.backoff_seconds(2) == outbox.BACKOFF_BASE_SECONDS * 2
+        assert outbox.backoff_seconds(50) == outbox.BACKOFF_MAX_SECONDS
+
+    def test_prune_removes_old_flushed_rows(self):
+        """Flushed rows are deleted once past the visibility window."""
+        outbox.enqueue("MagicLink_Requests", {"email": "a@example.com"})
+        outbox.enqueue("MagicLink_Requests", {"email": "b@example.com"})
+        with get_db() as db:
+            db.execute(
+                "UPDATE sheets_outbox SET flushed_at = '2000-01-01T00:00:00' WHERE id = ?",
+                (outbox_rows()[0]["id"],),
+            )
+
+        assert outbox.prune_flushed() == 1
+        assert outbox.pending_rows("MagicLink_Requests") == [{"email": "b@example.com"}]
@@ -1,6 +1,9 @@
 """Tests for quiz markdown parser."""
 
-from app.services.quiz_parser import parse_quiz_content
+from pathlib import Path
+from unittest.mock import patch
+
+from app.services.quiz_parser import QuizRegistry, parse_quiz_content
 
 
 class TestQuizParser:
@@ -173,3 +176,71 @@ Test?
 """
         quiz = parse_quiz_content(content, "quiz_123")
         assert quiz.quiz_id == "quiz_123"
+
+
+QUIZ_MD = """---
+title: {title}
+---
+
+## Q1 [mcq_single, 1pt]
+
+Test?
+
+- [x] A
+- [ ] B
+"""
+
+
+def write_quiz(base: Path, name: str, title: str) -> str:
+    path = base / "content" / "cis55" / "quizzes" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(QUIZ_MD.format(title=title))
+    return str(path.relative_to(base))
+
+
+class TestQuizRegistry:
+    """Tests for the parsed quiz registry."""
+
+    def test_load_all_parses_every_quiz(self, tmp_path):
+        """Startup parses every file under content/*/quizzes."""
+        write_quiz(tmp_path, "001.md", "One")
+        write_quiz(tmp_path, "002.md", "Two")
+
+        assert QuizRegistry(tmp_path).load_all() == 2
+
+    def test_lookup_does_not_reparse(self, tmp_path, monkeypatch):
+        """Unchanged files are parsed once, even when their stat is re-checked."""
+        content_path = write_quiz(tmp_path, "001.md", "One")
+        registry = QuizRegistry(tmp_path)
+        registry.load_all()
+        monkeypatch.setattr(registry, "STAT_INTERVAL_SECONDS", 0)
+
+        with patch("app.services.quiz_parser.parse_quiz_file") as parse:
+            quiz = registry.get(content_path, "q001")
+            assert registry.get(content_path, "q001") is quiz
+        parse.assert_not_called()
+        assert quiz.quiz_id == "q001"
+        assert quiz.title == "One"
+
+    def test_changed_file_is_reloaded(self, tmp_path, monkeypatch):
+        """A quiz is re-parsed when its file changes."""
+        content_path = write_quiz(tmp_path, "001.md", "One")
+        registry = QuizRegistry(tmp_path)
+        assert registry.get(content_path, "q001").title == "One"
+        monkeypatch.setattr(registry, "STAT_INTERVAL_SECONDS", 0)
+
+        write_quiz(tmp_path, "001.md", "One, revised")
+
+        assert registry.get(content_path, "q001").title == "One, revised"
+
+    def test_missing_file_returns_none(self, tmp_path):
+        """A content path with no file returns None."""
+        assert QuizRegistry(tmp_path).get("content/cis55/quizzes/none.md", "q001") is None
+
+    def test_same_file_under_two_ids(self, tmp_path):
+        """Each quiz ID gets its own view of a shared file."""
+        content_path = write_quiz(tmp_path, "001.md", "One")
+        registry = QuizRegistry(tmp_path)
+
+        assert registry.get(content_path, "a").quiz_id == "a"
+        assert registry.get(content_path, "b").quiz_id == "b"
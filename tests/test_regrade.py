@@ -0,0 +1,196 @@
+"""Tests for bulk regrading of stored submissions."""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models.quiz import Question, Quiz
+from app.services import regrade
+from app.services.grading import grade_quiz
+from app.services.sessions import ROLE_ADMIN, create_session_token
+
+
+def make_quiz(correct: str = "B") -> Quiz:
+    return Quiz(
+        quiz_id="q001",
+        title="Test",
+        questions=[Question(id="q1", type="mcq_single", text="?", points=2, correct=correct)],
+    )
+
+
+def stored_row(answer: str, graded_with: Quiz) -> dict:
+    """A submission record as stored by the submit path (values as sheet strings)."""
+    answers = {"q1": answer}
+    result = grade_quiz(graded_with, answers)
+    return {
+        "quiz_id": "q001",
+        "answers_json": json.dumps(answers),
+        "score": str(result.score),
+        "max_score": str(result.max_score),
+        "autograde_json": json.dumps(result.to_autograde_json()),
+    }
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with no regrade jobs before each test."""
+    from app.db.sqlite import get_db, init_db
+
+    init_db()
+    with get_db() as db:
+        db.execute("DELETE FROM regrade_jobs")
+    regrade._jobs.clear()
+    regrade._running.clear()
+
+
+class TestDiffRows:
+    """Tests for re-grading and diffing stored rows."""
+
+    def test_only_changed_rows_are_returned(self):
+        """After a key fix, only rows whose grade changed are written."""
+        old_key, new_key = make_quiz("A"), make_quiz("B")
+        rows = [
+            (2, stored_row("A", old_key)),  # was right, now wrong
+            (3, stored_row("B", old_key)),  # was wrong, now right
+            (4, stored_row("C", old_key)),  # wrong either way, but the expected answer moved
+        ]
+
+        updates, skipped = regrade.diff_rows(new_key, rows)
+
+        assert skipped == 0
+        assert sorted(updates) == [2, 3, 4]
+        assert updates[4]["score"] == 0
+        assert updates[3]["score"] == 2
+        assert json.loads(updates[3]["autograde_json"])["q1"]["correct"] is True
+
+    def test_up_to_date_rows_are_unchanged(self):
+        """Rows already graded with the current key produce no writes."""
+        quiz = make_quiz()
+        rows = [(2, stored_row("A", quiz)), (3, stored_row("B", quiz))]
+
+        assert regrade.diff_rows(quiz, rows) == ({}, 0)
+
+    def test_unreadable_answers_are_skipped(self):
+        """Rows with corrupt answers_json are counted and left alone."""
+        rows = [(2, {"answers_json": "not json"}), (3, {"answers_json": "[1]"})]
+
+        assert regrade.diff_rows(make_quiz(), rows) == ({}, 2)
+
+
+class TestRegradeJob:
+    """Tests for the background regrade job."""
+
+    async def test_job_writes_changed_rows_in_batches(self, monkeypatch):
+        """Changed rows are written in batches and progress is reported."""
+        monkeypatch.setattr(regrade, "WRITE_BATCH_ROWS", 2)
+        monkeypatch.setattr(regrade, "WRITE_PAUSE_SECONDS", 0)
+        old_key = make_quiz("A")
+        client = MagicMock()
+        client.get_submission_rows.return_value = [
+            (row_num, stored_row("A", old_key)) for row_num in range(2, 7)
+        ]
+
+        job = regrade.start_regrade(client, make_quiz("B"))
+        assert regrade.start_regrade(client, make_quiz("B")) is job
+        await next(iter(regrade._tasks))
+
+        assert job.status == "done"
+        assert (job.total, job.graded, job.changed, job.written) == (5, 5, 5, 5)
+        batches = [c.args[0] for c in client.update_submission_rows.call_args_list]
+        assert [sorted(b) for b in batches] == [[2, 3], [4, 5], [6]]
+        # Each batch carries the records it was computed from, to check before writing
+        expected = client.update_submission_rows.call_args_list[0].args[1]
+        assert expected == {2: stored_row("A", old_key), 3: stored_row("A", old_key)}
+        assert regrade.get_job(job.job_id) is job
+
+    async def test_failure_is_reported(self):
+        """A Sheets failure marks the job failed with the error."""
+        client = MagicMock()
+        client.get_submission_rows.side_effect = RuntimeError("quota exceeded")
+
+        job = regrade.start_regrade(client, make_quiz())
+        await next(iter(regrade._tasks))
+
+        assert job.status == "failed"
+        assert job.error == "quota exceeded"
+        assert job.finished_at is not None
+
+    async def test_progress_is_saved(self, monkeypatch):
+        """A finished job's progress is still available after a restart."""
+        monkeypatch.setattr(regrade, "WRITE_PAUSE_SECONDS", 0)
+        client = MagicMock()
+        client.get_submission_rows.return_value = [(2, stored_row("A", make_quiz("A")))]
+
+        job = regrade.start_regrade(client, make_quiz("B"))
+        await next(iter(regrade._tasks))
+        regrade._jobs.clear()
+
+        saved = regrade.get_job(job.job_id)
+        assert saved is not job
+        assert saved.to_dict() == job.to_dict()
+
+    async def test_interrupted_job_resumes(self, monkeypatch):
+        """A job cancelled at shutdown resumes on restart without rewriting rows."""
+        monkeypatch.setattr(regrade, "WRITE_BATCH_ROWS", 1)
+        monkeypatch.setattr(regrade, "WRITE_PAUSE_SECONDS", 60)
+        old_key, new_key = make_quiz("A"), make_quiz("B")
+        client = MagicMock()
+        client.get_submission_rows.return_value = [
+            (row_num, stored_row("A", old_key)) for row_num in range(2, 5)
+        ]
+
+        job = regrade.start_regrade(client, new_key)
+        while job.written < 1:
+            await asyncio.sleep(0)
+        await regrade.shutdown()
+
+        assert not regrade._tasks
+        assert regrade.get_job(job.job_id).status == "running"
+
+        # Restart: row 2 was written before shutdown
+        regrade._jobs.clear()
+        monkeypatch.setattr(regrade, "WRITE_PAUSE_SECONDS", 0)
+        client.reset_mock()
+        client.get_submission_rows.return_value = [
+            (2, stored_row("A", new_key)),
+            *((row_num, stored_row("A", old_key)) for row_num in range(3, 5)),
+        ]
+        with patch("app.services.regrade.get_parsed_quiz", return_value=new_key):
+            assert regrade.resume_jobs(client) == 1
+            await next(iter(regrade._tasks))
+
+        resumed = regrade.get_job(job.job_id)
+        assert resumed.status == "done"
+        assert (resumed.changed, resumed.written) == (3, 3)
+        batches = [c.args[0] for c in client.update_submission_rows.call_args_list]
+        assert [sorted(b) for b in batches] == [[3], [4]]
+
+
+class TestRegradeRoutes:
+    """Tests for the admin regrade endpoints."""
+
+    @patch("app.routers.admin.regrade.start_regrade")
+    @patch("app.routers.admin.get_parsed_quiz")
+    @patch("app.routers.admin.get_sheets_client")
+    def test_admin_starts_regrade(self, mock_sheets, mock_parse, mock_start, client):
+        """Starting a regrade returns the job's progress."""
+        mock_parse.return_value = make_quiz()
+        mock_start.return_value = regrade.RegradeJob(job_id="abc", quiz_id="q001")
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.post("/admin/quiz/q001/regrade", cookies={"session": token})
+
+        assert response.status_code == 200
+        assert response.json()["job_id"] == "abc"
+
+    @patch("app.routers.admin.get_sheets_client")
+    def test_unknown_quiz_is_404(self, mock_sheets, client):
+        """Regrading a quiz that doesn't exist is 404."""
+        mock_sheets.return_value.get_quiz_by_id.return_value = None
+        token = create_session_token("admin@example.com", "stu_admin", role=ROLE_ADMIN)
+
+        response = client.post("/admin/quiz/nope/regrade", cookies={"session": token})
+
+        assert response.status_code == 404
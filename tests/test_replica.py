@@ -0,0 +1,154 @@
+"""Tests for the local Sheets read replica."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.db.sqlite import init_db
+from app.services import replica
+
+
+@pytest.fixture(autouse=True)
+def setup_db(setup_test_env):
+    """Initialize database with an empty replica before each test."""
+    init_db()
+    replica.clear()
+    yield
+    replica.clear()
+
+
+def make_worksheet(records=None, values=None) -> MagicMock:
+    worksheet = MagicMock()
+    worksheet.get_all_records.return_value = records or []
+    worksheet.get_all_values.return_value = values or []
+    return worksheet
+
+
+class TestFullSync:
+    """Tests for whole-tab syncs."""
+
+    def test_not_replicated_is_none(self):
+        """A tab that was never synced reads as None, not empty."""
+        assert replica.read_records("Roster") is None
+        assert replica.tab_state("Roster") is None
+
+    def test_sync_stores_records_in_sheet_order(self):
+        """Records are stored by sheet row number."""
+        records = [{"student_id": "stu_002"}, {"student_id": "stu_001"}]
+
+        assert replica.sync_tab(make_worksheet(records), "Roster") is True
+
+        assert replica.read_records("Roster") == records
+        state = replica.tab_state("Roster")
+        assert state.last_row == 3
+        assert state.headers == ["student_id"]
+
+    def test_unchanged_sync_keeps_generation(self):
+        """Re-syncing identical content reports no change."""
+        worksheet = make_worksheet([{"key": "term", "value": "Spring"}])
+        replica.sync_tab(worksheet, "Config")
+        generation = replica.tab_state("Config").generation
+
+        assert replica.sync_tab(worksheet, "Config") is False
+        assert replica.tab_state("Config").generation == generation
+
+        worksheet.get_all_records.return_value = [{"key": "term", "value": "Fall"}]
+        assert replica.sync_tab(worksheet, "Config") is True
+        assert replica.tab_state("Config").generation == generation + 1
+
+    def test_empty_tab_is_replicated(self):
+        """An empty tab reads as an empty list once synced."""
+        replica.sync_tab(make_worksheet([]), "Schedule")
+
+        assert replica.read_records("Schedule") == []
+
+
+class TestTailSync:
+    """Tests for append-only tabs."""
+
+    HEADERS = ["quiz_id", "student_id"]
+
+    def test_tail_sync_appends_rows(self):
+        """New rows below the anchor are appended without bumping the generation."""
+        worksheet = make_worksheet(values=[self.HEADERS, ["q1", "s1"]])
+        replica.sync_tab(worksheet, "Quiz_Submissions")
+        generation = replica.tab_state("Quiz_Submissions").generation
+
+        worksheet.get_all_values.return_value = [["q1", "s1"], ["q1", "s2"]]
+        assert replica.sync_tab(worksheet, "Quiz_Submissions") is True
+
+        worksheet.get_all_values.assert_called_with("A2:B")
+        assert replica.read_records_after("Quiz_Submissions", 2) == [
+            (3, {"quiz_id": "q1", "student_id": "s2"})
+        ]
+        assert replica.tab_state("Quiz_Submissions").generation == generation
+
+    def test_anchor_mismatch_reloads(self):
+        """An edited anchor row triggers a full reload."""
+        worksheet = make_worksheet(values=[self.HEADERS, ["q1", "s1"]])
+        replica.sync_tab(worksheet, "Quiz_Submissions")
+
+        worksheet.get_all_values.side_effect = [
+            [["q1", "edited"]],
+            [self.HEADERS, ["q1", "edited"]],
+        ]
+        assert replica.sync_tab(worksheet, "Quiz_Submissions") is True
+
+        assert replica.read_records("Quiz_Submissions") == [
+            {"quiz_id": "q1", "student_id": "edited"}
+        ]
+
+    def test_full_resync_after_tail_sync_is_unchanged(self):
+        """Rows added by a tail sync count towards the content hash."""
+        worksheet = make_worksheet(values=[self.HEADERS, ["q1", "s1"]])
+        replica.sync_tab(worksheet, "Quiz_Submissions")
+        worksheet.get_all_values.return_value = [["q1", "s1"], ["q1", "s2"]]
+        replica.sync_tab(worksheet, "Quiz_Submissions")
+
+        state = replica.tab_state("Quiz_Submissions")
+        worksheet.get_all_values.return_value = [self.HEADERS, ["q1", "s1"], ["q1", "s2"]]
+        assert (
+            replica._full_sync_values(worksheet, "Quiz_Submissions", state, state.synced_at)
+            is False
+        )
+
+
+class TestPatch:
+    """Tests for mirroring writes into the replica."""
+
+    def test_patch_updates_fields_and_generation(self):
+        """Patched fields are visible and the generation moves on."""
+        replica.sync_tab(make_worksheet([{"student_id": "stu_001", "hobbies": ""}]), "Roster")
+        generation = replica.tab_state("Roster").generation
+
+        replica.patch_rows("Roster", {2: {"hobbies": "chess"}, 99: {"hobbies": "x"}})
+
+        assert replica.read_records("Roster") == [{"student_id": "stu_001", "hobbies": "chess"}]
+        assert replica.tab_state("Roster").generation == generation + 1
+
+    def test_sync_after_own_patch_is_unchanged(self):
+        """A sheet that now holds what the app wrote does not count as changed."""
+        worksheet = make_worksheet([{"student_id": "stu_001", "last_login_at": ""}])
+        replica.sync_tab(worksheet, "Roster")
+
+        replica.patch_rows("Roster", {2: {"last_login_at": "2025-01-01T10:00:00"}})
+        worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "last_login_at": "2025-01-01T10:00:00"}
+        ]
+
+        assert replica.sync_tab(worksheet, "Roster") is False
+
+    def test_patching_tail_row_keeps_tail_sync(self):
+        """A patched last row still matches the sheet, so the next sync reads only the tail."""
+        headers = ["quiz_id", "student_id", "score"]
+        worksheet = make_worksheet(values=[headers, ["q1", "s1", "8"], ["q1", "s2", "5"]])
+        replica.sync_tab(worksheet, "Quiz_Submissions")
+
+        replica.patch_rows("Quiz_Submissions", {3: {"score": 10.0}})
+        assert replica.read_records_after("Quiz_Submissions", 2)[0][1]["score"] == "10"
+
+        # The sheet holds the written score; nothing new below it
+        worksheet.get_all_values.reset_mock()
+        worksheet.get_all_values.return_value = [["q1", "s2", "10"]]
+        assert replica.sync_tab(worksheet, "Quiz_Submissions") is False
+        worksheet.get_all_values.assert_called_once_with("A3:C")
@@ -0,0 +1,105 @@
+"""Tests for JWT session tokens."""
+
+from unittest.mock import patch
+
+from app.services import sessions
+from app.services.sessions import (
+    ROLE_ADMIN,
+    ROLE_STUDENT,
+    create_session_token,
+    mark_claims_changed,
+    role_for,
+    verify_session_token,
+)
+
+
+def setup_function():
+    sessions.clear_verified_sessions()
+
+
+class TestSessionTokens:
+    """Tests for issuing and verifying sessions."""
+
+    def test_claims_round_trip(self):
+        """Role and onboarding claims survive encoding."""
+        token = create_session_token("a@example.com", "stu_001", role=ROLE_ADMIN, onboarded=True)
+
+        session = verify_session_token(token)
+
+        assert session.email == "a@example.com"
+        assert session.is_admin
+        assert session.onboarded is True
+        assert session.claims_current
+
+    def test_invalid_token_rejected(self):
+        """A tampered token does not verify."""
+        token = create_session_token("a@example.com", "stu_001", role=ROLE_STUDENT)
+
+        assert verify_session_token(token[:-2] + "xx") is None
+
+    def test_session_without_claims_is_not_current(self):
+        """Sessions issued without a role must be refreshed."""
+        session = verify_session_token(create_session_token("a@example.com", "stu_001"))
+
+        assert session.role is None
+        assert not session.is_admin
+        assert not session.claims_current
+
+    def test_role_for_is_case_insensitive(self):
+        """The admin email matches regardless of case."""
+        assert role_for("admin@example.com", "Admin@Example.com") == ROLE_ADMIN
+        assert role_for("user@example.com", "admin@example.com") == ROLE_STUDENT
+        assert role_for("user@example.com", None) == ROLE_STUDENT
+        assert role_for("b@example.com", {"a@example.com", " B@example.com"}) == ROLE_ADMIN
+
+
+class TestVerifiedCache:
+    """Tests for the verified-token cache."""
+
+    def test_repeat_verification_skips_decode(self):
+        """A token verified once is served from memory."""
+        token = create_session_token("a@example.com", "stu_001", role=ROLE_STUDENT)
+        first = verify_session_token(token)
+
+        with patch("app.services.sessions.jwt.decode") as decode:
+            assert verify_session_token(token) is first
+        decode.assert_not_called()
+
+    def test_cache_is_bounded(self, monkeypatch):
+        """The oldest verifications are dropped past the size limit."""
+        monkeypatch.setattr(sessions, "VERIFIED_CACHE_MAX_ENTRIES", 2)
+        for i in range(3):
+            verify_session_token(create_session_token(f"{i}@example.com", f"stu_{i}"))
+
+        assert len(sessions._verified) == 2
+
+
+class TestClaimsRefresh:
+    """Tests for invalidating claims on roster changes."""
+
+    def test_global_change_makes_claims_stale(self):
+        """A roster or config change invalidates every session's claims."""
+        token = create_session_token("a@example.com", "stu_001", role=ROLE_STUDENT)
+        mark_claims_changed()
+
+        assert not verify_session_token(token).claims_current
+
+    def test_student_change_only_affects_that_student(self):
+        """A change to one student leaves other sessions current."""
+        mine = create_session_token("a@example.com", "stu_001", role=ROLE_STUDENT)
+        other = create_session_token("b@example.com", "stu_002", role=ROLE_STUDENT)
+        mark_claims_changed("stu_001")
+
+        assert not verify_session_token(mine).claims_current
+        assert verify_session_token(other).claims_current
+
+    def test_student_changes_are_pruned(self, monkeypatch):
+        """Per-student changes older than a session's lifetime are forgotten."""
+        from app.services import sessions
+
+        monkeypatch.setattr(sessions, "_student_claims_changed_at", {"stu_old": 0.0})
+        mark_claims_changed("stu_001")
+        assert list(sessions._student_claims_changed_at) == ["stu_001"]
+
+        mark_claims_changed()
+        assert sessions._student_claims_changed_at == {}
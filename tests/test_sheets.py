@@ -1,20 +1,73 @@
 """Tests for the sheets service with mocked gspread."""
 
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from app.db.sqlite import init_db
 from app.models.quiz import QuizMeta
 from app.models.roster import RosterEntry
+from app.services import gradebook, replica
 from app.services.cache import invalidate_all
 
 
 @pytest.fixture(autouse=True)
 def clear_cache():
-    """Clear cache before each test."""
+    """Clear the cache, the local read replica and the grade book before each test."""
+    init_db()
+    replica.clear()
+    gradebook.clear()
     invalidate_all()
     yield
     invalidate_all()
+    replica.clear()
+    gradebook.clear()
+
+
+SUBMISSION_HEADERS = [
+    "submitted_at",
+    "quiz_id",
+    "attempt",
+    "student_id",
+    "email",
+    "answers_json",
+    "score",
+    "max_score",
+    "autograde_json",
+    "source",
+]
+
+SUBMISSION_DATA = {
+    "submitted_at": "2025-01-01T10:00:00",
+    "quiz_id": "q001",
+    "attempt": 1,
+    "student_id": "stu_001",
+    "email": "alice@example.com",
+    "answers_json": "{}",
+    "score": 8,
+    "max_score": 10,
+    "autograde_json": "{}",
+    "source": "web",
+}
+
+
+def submission_values(records: list[dict]) -> list[list[str]]:
+    """Render submission records as raw sheet values (header row first)."""
+    return [SUBMISSION_HEADERS] + [[str(r.get(h, "")) for h in SUBMISSION_HEADERS] for r in records]
+
+
+@pytest.fixture
+def empty_outbox(setup_test_env):
+    """Initialize the database with an empty Sheets outbox."""
+    from app.db.sqlite import get_db, init_db
+
+    init_db()
+    with get_db() as db:
+        db.execute("DELETE FROM sheets_outbox")
+    yield
+    with get_db() as db:
+        db.execute("DELETE FROM sheets_outbox")
 
 
 @pytest.fixture
@@ -118,6 +171,22 @@ class TestSheetsClientConfig:
 
         assert result is None
 
+    def test_get_admin_emails_raises_when_unreadable(self, sheets_client, mock_worksheet):
+        """Every admin_email row counts; a failed read raises instead of returning none."""
+        from app.services.sheets import SheetsUnavailableError
+
+        mock_worksheet.get_all_records.return_value = [
+            {"key": "admin_email", "value": "A@example.com"},
+            {"key": "admin_email", "value": "b@example.com"},
+        ]
+        assert sheets_client.get_admin_emails() == {"a@example.com", "b@example.com"}
+
+        invalidate_all()
+        replica.clear()
+        mock_worksheet.get_all_records.side_effect = Exception("quota exceeded")
+        with pytest.raises(SheetsUnavailableError):
+            sheets_client.get_admin_emails()
+
     def test_get_all_config(self, sheets_client, mock_worksheet):
         """Test getting all config values."""
         mock_worksheet.get_all_records.return_value = [
@@ -211,7 +280,121 @@ class TestSheetsClientRoster:
         result = sheets_client.claim_student("stu_001", "alice@example.com")
 
         assert result is True
-        assert mock_worksheet.update_cell.call_count == 2  # email + claimed_at
+        # email + claimed_at go out in a single write request
+        mock_worksheet.batch_update.assert_called_once()
+        data = mock_worksheet.batch_update.call_args[0][0]
+        assert [d["range"] for d in data] == ["C2", "D2"]
+        assert data[0]["values"] == [["alice@example.com"]]
+        mock_worksheet.update_cell.assert_not_called()
+
+    def test_roster_lookups_share_one_download(self, sheets_client, mock_worksheet):
+        """Lookups by id, email, count and full list are served from one tab download."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice", "preferred_email": "a@x.com"},
+            {"student_id": "stu_002", "full_name": "Jones, Bob", "preferred_email": "B@x.com"},
+            {"student_id": "", "full_name": "", "preferred_email": ""},
+        ]
+
+        assert sheets_client.get_roster_by_id("stu_002").full_name == "Jones, Bob"
+        assert sheets_client.get_roster_by_email("b@X.com").student_id == "stu_002"
+        assert sheets_client.get_roster_by_id("stu_999") is None
+        assert sheets_client.get_roster_count() == 2
+        assert [s.student_id for s in sheets_client.get_all_roster()] == ["stu_001", "stu_002"]
+
+        assert mock_worksheet.get_all_records.call_count == 1
+
+    def test_update_roster_uses_snapshot_row(self, sheets_client, mock_worksheet):
+        """update_roster writes to the row found in the roster snapshot."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+            {"student_id": "stu_002", "full_name": "Jones, Bob"},
+        ]
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies"]
+        mock_worksheet.col_values.return_value = ["student_id", "stu_001", "stu_002"]
+
+        result = sheets_client.update_roster("stu_002", hobbies="chess", unknown="x")
+
+        assert result is True
+        mock_worksheet.batch_update.assert_called_once_with(
+            [{"range": "C3", "values": [["chess"]]}], value_input_option="USER_ENTERED"
+        )
+
+    def test_update_roster_resyncs_when_rows_moved(self, sheets_client, mock_worksheet):
+        """A row inserted in the sheet since the snapshot doesn't redirect the write."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+            {"student_id": "stu_002", "full_name": "Jones, Bob"},
+        ]
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies"]
+        sheets_client.get_roster_by_id("stu_002")
+
+        # Someone inserted a student above Bob in the sheet
+        moved = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+            {"student_id": "stu_003", "full_name": "New, Carol"},
+            {"student_id": "stu_002", "full_name": "Jones, Bob"},
+        ]
+        mock_worksheet.get_all_records.return_value = moved
+        mock_worksheet.col_values.return_value = ["student_id", "stu_001", "stu_003", "stu_002"]
+
+        assert sheets_client.update_roster("stu_002", hobbies="chess") is True
+
+        mock_worksheet.batch_update.assert_called_once_with(
+            [{"range": "C4", "values": [["chess"]]}], value_input_option="USER_ENTERED"
+        )
+
+    def test_update_roster_invalidates_cached_student(self, sheets_client, mock_worksheet):
+        """A roster write drops the student's locally cached profile."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+        ]
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies"]
+
+        with patch("app.services.sheets.invalidate_cached_student") as mock_invalidate:
+            sheets_client.update_roster("stu_001", hobbies="chess")
+
+        mock_invalidate.assert_called_once_with("stu_001")
+
+    def test_update_roster_many_fields_is_one_write(self, sheets_client, mock_worksheet):
+        """A multi-field profile save costs one write and reuses the cached header map."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+        ]
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies", "linkedin"]
+        mock_worksheet.col_values.return_value = ["student_id", "stu_001"]
+
+        sheets_client.update_roster("stu_001", hobbies="chess", linkedin="")
+        sheets_client.update_roster("stu_001", hobbies="go")
+
+        assert mock_worksheet.batch_update.call_count == 2
+        first = mock_worksheet.batch_update.call_args_list[0][0][0]
+        assert first == [
+            {"range": "C2", "values": [["chess"]]},
+            {"range": "D2", "values": [[""]]},
+        ]
+        assert mock_worksheet.row_values.call_count == 1
+
+    def test_update_roster_many_is_one_write(self, sheets_client, mock_worksheet):
+        """Field changes for several students go out in a single batch_update."""
+        mock_worksheet.get_all_records.return_value = [
+            {"student_id": "stu_001", "full_name": "Smith, Alice"},
+            {"student_id": "stu_002", "full_name": "Jones, Bob"},
+        ]
+        mock_worksheet.row_values.return_value = ["student_id", "presentation_order"]
+        mock_worksheet.col_values.return_value = ["student_id", "stu_001", "stu_002"]
+
+        count = sheets_client.update_roster_many(
+            {
+                "stu_001": {"presentation_order": "2"},
+                "stu_002": {"presentation_order": "1"},
+                "stu_404": {"presentation_order": "3"},
+            }
+        )
+
+        assert count == 2
+        mock_worksheet.batch_update.assert_called_once()
+        data = mock_worksheet.batch_update.call_args[0][0]
+        assert [(d["range"], d["values"]) for d in data] == [("B2", [["2"]]), ("B3", [["1"]])]
 
     def test_claim_student_already_claimed(self, sheets_client, mock_worksheet):
         """Test claim on already claimed student."""
@@ -229,6 +412,81 @@ class TestSheetsClientRoster:
         assert result is False
 
 
+class TestSheetsClientBookReading:
+    """Tests for book reading methods."""
+
+    HEADERS = ["chapter", "primary_reader", "secondary_reader"]
+
+    def test_assign_reader_uses_snapshot_row(self, sheets_client, mock_worksheet):
+        """The reader is written to the chapter's row found in the replica."""
+        mock_worksheet.get_all_records.return_value = [
+            {"chapter": "Ch 1", "primary_reader": "Alice", "secondary_reader": ""},
+            {"chapter": "Ch 2", "primary_reader": "", "secondary_reader": ""},
+        ]
+        mock_worksheet.row_values.return_value = self.HEADERS
+        mock_worksheet.col_values.return_value = ["chapter", "Ch 1", "Ch 2"]
+        mock_worksheet.cell.return_value.value = ""
+
+        assert sheets_client.assign_book_reader("Ch 2", "Bob", "primary") == (True, "")
+
+        mock_worksheet.cell.assert_called_once_with(3, 2)
+        mock_worksheet.batch_update.assert_called_once_with(
+            [{"range": "B3", "values": [["Bob"]]}], value_input_option="USER_ENTERED"
+        )
+
+    def test_assign_reader_resyncs_when_rows_moved(self, sheets_client, mock_worksheet):
+        """A chapter inserted in the sheet since the last sync doesn't redirect the write."""
+        mock_worksheet.get_all_records.return_value = [
+            {"chapter": "Ch 1", "primary_reader": "", "secondary_reader": ""},
+            {"chapter": "Ch 2", "primary_reader": "", "secondary_reader": ""},
+        ]
+        mock_worksheet.row_values.return_value = self.HEADERS
+        sheets_client.get_book_readings()
+
+        mock_worksheet.get_all_records.return_value = [
+            {"chapter": "Intro", "primary_reader": "", "secondary_reader": ""},
+            {"chapter": "Ch 1", "primary_reader": "", "secondary_reader": ""},
+            {"chapter": "Ch 2", "primary_reader": "", "secondary_reader": ""},
+        ]
+        mock_worksheet.col_values.return_value = ["chapter", "Intro", "Ch 1", "Ch 2"]
+        mock_worksheet.cell.return_value.value = ""
+
+        assert sheets_client.assign_book_reader("Ch 2", "Bob", "secondary") == (True, "")
+
+        mock_worksheet.batch_update.assert_called_once_with(
+            [{"range": "C4", "values": [["Bob"]]}], value_input_option="USER_ENTERED"
+        )
+
+    def test_taken_slot_is_not_overwritten(self, sheets_client, mock_worksheet):
+        """A slot filled in the sheet since the last sync is reported as taken."""
+        mock_worksheet.get_all_records.return_value = [
+            {"chapter": "Ch 1", "primary_reader": "", "secondary_reader": ""},
+        ]
+        mock_worksheet.row_values.return_value = self.HEADERS
+        mock_worksheet.col_values.return_value = ["chapter", "Ch 1"]
+        mock_worksheet.cell.return_value.value = "Carol"
+
+        ok, error = sheets_client.assign_book_reader("Ch 1", "Bob", "primary")
+
+        assert ok is False
+        assert error == "This chapter already has a primary reader."
+        mock_worksheet.batch_update.assert_not_called()
+
+    def test_unknown_chapter(self, sheets_client, mock_worksheet):
+        """A chapter not in the sheet is reported and nothing is written."""
+        mock_worksheet.get_all_records.return_value = [
+            {"chapter": "Ch 1", "primary_reader": "", "secondary_reader": ""},
+        ]
+        mock_worksheet.row_values.return_value = self.HEADERS
+        mock_worksheet.col_values.return_value = ["chapter", "Ch 1"]
+
+        assert sheets_client.assign_book_reader("Ch 9", "Bob", "primary") == (
+            False,
+            "Chapter not found.",
+        )
+        mock_worksheet.batch_update.assert_not_called()
+
+
 class TestSheetsClientQuizzes:
     """Tests for quiz methods."""
 
@@ -274,35 +532,375 @@ class TestSheetsClientQuizzes:
         assert result.quiz_id == "q002"
         assert result.title == "Advanced Quiz"
 
-    def test_append_quiz_submission(self, sheets_client, mock_worksheet):
-        """Test appending a quiz submission."""
-        mock_worksheet.row_values.return_value = [
-            "submitted_at",
-            "quiz_id",
-            "attempt",
-            "student_id",
-            "email",
-            "answers_json",
-            "score",
-            "max_score",
-            "autograde_json",
-            "source",
-        ]
-
-        data = {
-            "submitted_at": "2025-01-01T10:00:00",
-            "quiz_id": "q001",
-            "attempt": 1,
-            "student_id": "stu_001",
-            "email": "alice@example.com",
-            "answers_json": "{}",
-            "score": 8,
-            "max_score": 10,
-            "autograde_json": "{}",
-            "source": "web",
-        }
+    def test_submission_lookups_share_one_download(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """Per-student and per-quiz lookups are served from one indexed download."""
+        mock_worksheet.get_all_values.return_value = submission_values(
+            [
+                {**SUBMISSION_DATA, "student_id": "stu_001", "quiz_id": "q001", "score": 5},
+                {**SUBMISSION_DATA, "student_id": "stu_001", "quiz_id": "q002", "score": 6},
+                {**SUBMISSION_DATA, "student_id": "stu_002", "quiz_id": "q001", "score": 7},
+                {**SUBMISSION_DATA, "student_id": 1234, "quiz_id": "q001", "score": 9},
+            ]
+        )
+
+        mine = sheets_client.get_quiz_submissions("stu_001", "q001")
+        assert [s.score for s in mine] == [5]
+        assert [s.score for s in sheets_client.get_quiz_submissions("1234", "q001")] == [9]
+        assert sheets_client.get_quiz_submissions("stu_002", "q002") == []
+        assert [s.score for s in sheets_client.get_all_quiz_submissions("q001")] == [5, 7, 9]
+
+        # Callers get copies; mutating one does not corrupt the shared index
+        mine.clear()
+        assert len(sheets_client.get_quiz_submissions("stu_001", "q001")) == 1
+
+        assert mock_worksheet.get_all_values.call_count == 1
+
+    def test_append_quiz_submission(self, sheets_client, mock_worksheet, empty_outbox):
+        """Appending queues the row; the flusher writes it with one append_rows call."""
+        from app.services import outbox
+
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        mock_worksheet.get_all_values.return_value = submission_values([])
 
-        result = sheets_client.append_quiz_submission(data)
+        result = sheets_client.append_quiz_submission(SUBMISSION_DATA)
 
         assert result is True
-        mock_worksheet.append_row.assert_called_once()
+        mock_worksheet.append_row.assert_not_called()
+        mock_worksheet.append_rows.assert_not_called()
+
+        # Visible to the student straight away, before any flush
+        submissions = sheets_client.get_quiz_submissions("stu_001", "q001")
+        assert len(submissions) == 1
+        assert submissions[0].score == 8
+
+        assert outbox.flush(sheets_client) == 1
+        mock_worksheet.append_rows.assert_called_once_with(
+            [[SUBMISSION_DATA[h] for h in SUBMISSION_HEADERS]], value_input_option="RAW"
+        )
+
+    def test_flushed_submission_not_duplicated(self, sheets_client, mock_worksheet, empty_outbox):
+        """A flushed row that is also in the sheet data is only returned once."""
+        from app.services import outbox
+
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        sheets_client.append_quiz_submission(SUBMISSION_DATA)
+        outbox.flush(sheets_client)
+
+        # The sheet now contains the row; the outbox still remembers it for a while
+        mock_worksheet.get_all_values.return_value = submission_values([SUBMISSION_DATA])
+
+        assert len(sheets_client.get_quiz_submissions("stu_001", "q001")) == 1
+        assert len(sheets_client.get_all_quiz_submissions("q001")) == 1
+
+    def test_grade_book_follows_queued_and_replicated_submissions(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """Queued submissions count at once and are not counted again once replicated."""
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        mock_worksheet.get_all_values.return_value = submission_values(
+            [{**SUBMISSION_DATA, "student_id": "stu_002", "score": 6}]
+        )
+        queued = {**SUBMISSION_DATA, "attempt": 2, "score": 9}
+        sheets_client.append_quiz_submission(queued)
+
+        assert sheets_client.get_student_grades("stu_001")["q001"].best_score == 9
+        assert sheets_client.get_best_scores() == {"stu_001": {"q001": 9}, "stu_002": {"q001": 6}}
+
+        # The flushed row reaches the replica on the next sync
+        mock_worksheet.get_all_values.return_value = submission_values(
+            [{**SUBMISSION_DATA, "student_id": "stu_002", "score": 6}, queued]
+        )
+        sheets_client.sync_replica(["Quiz_Submissions"])
+
+        grade = sheets_client.get_student_grades("stu_001")["q001"]
+        assert (grade.best_score, grade.attempts) == (9, 1)
+        stats = sheets_client.get_quiz_grade_stats()["q001"]
+        assert (stats.students, stats.attempts) == (2, 2)
+
+    def test_grade_book_rebuilt_after_rows_change(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """Rewriting stored submissions (e.g. a regrade) rebuilds the grade book."""
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        mock_worksheet.get_all_values.return_value = submission_values([SUBMISSION_DATA])
+
+        assert sheets_client.get_best_scores() == {"stu_001": {"q001": 8}}
+
+        sheets_client.update_submission_rows({2: {"score": 3}})
+
+        assert sheets_client.get_best_scores() == {"stu_001": {"q001": 3}}
+        assert sheets_client.get_quiz_grade_stats()["q001"].total_best_score == 3
+
+
+class TestAsyncSheetsClient:
+    """Tests for the async facade used by route handlers."""
+
+    async def test_call_runs_off_the_event_loop_thread(self):
+        """Wrapped methods run on the Sheets worker pool and return their result."""
+        from app.services.sheets import AsyncSheetsClient
+
+        loop_thread = threading.get_ident()
+        client = MagicMock()
+        client.get_roster_count.side_effect = lambda: threading.get_ident()
+
+        worker_thread = await AsyncSheetsClient(client).get_roster_count()
+
+        assert worker_thread != loop_thread
+        client.get_roster_count.assert_called_once_with()
+
+    async def test_passes_arguments_and_exceptions(self):
+        """Arguments are forwarded and exceptions propagate to the awaiting handler."""
+        from app.services.sheets import AsyncSheetsClient, SheetsUnavailableError
+
+        client = MagicMock()
+        client.update_roster.return_value = True
+        client.get_roster_by_id.side_effect = SheetsUnavailableError("quota")
+        sheets = AsyncSheetsClient(client)
+
+        assert await sheets.update_roster("stu_001", hobbies="chess") is True
+        client.update_roster.assert_called_once_with("stu_001", hobbies="chess")
+        with pytest.raises(SheetsUnavailableError):
+            await sheets.get_roster_by_id("stu_001")
+
+
+class TestSubmissionsTailSync:
+    """Tests for incremental syncing of Quiz_Submissions."""
+
+    def rows(self, count: int) -> list[dict]:
+        return [
+            {
+                **SUBMISSION_DATA,
+                "student_id": f"stu_{i:03d}",
+                "submitted_at": f"2025-01-01T10:{i:02d}:00",
+            }
+            for i in range(count)
+        ]
+
+    def test_refresh_fetches_only_new_rows(self, sheets_client, mock_worksheet, empty_outbox):
+        """After the first load, a sync reads from the last replicated row onwards."""
+        rows = self.rows(3)
+        mock_worksheet.get_all_values.side_effect = [
+            submission_values(rows[:2]),
+            # Tail read: anchor row 3 (last ingested) plus one new row
+            submission_values(rows[1:3])[1:],
+        ]
+
+        assert len(sheets_client.get_all_quiz_submissions("q001")) == 2
+        sheets_client.sync_replica(["Quiz_Submissions"])
+        assert len(sheets_client.get_all_quiz_submissions("q001")) == 3
+
+        tail_call = mock_worksheet.get_all_values.call_args_list[1]
+        assert tail_call.args == ("A3:J",)
+
+    def test_submission_rows_carry_row_numbers(self, sheets_client, mock_worksheet, empty_outbox):
+        """Regrade reads get each stored submission of a quiz with its sheet row."""
+        rows = self.rows(2) + [{**SUBMISSION_DATA, "quiz_id": "q002"}]
+        mock_worksheet.get_all_values.return_value = submission_values(rows)
+
+        result = sheets_client.get_submission_rows("q001")
+
+        assert [row_num for row_num, _ in result] == [2, 3]
+        assert result[1][1]["student_id"] == "stu_001"
+
+    def test_update_submission_rows_patches_replica(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """Rewritten scores are written in one request and visible to reads at once."""
+        mock_worksheet.get_all_values.return_value = submission_values(self.rows(2))
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        sheets_client.get_all_quiz_submissions("q001")
+
+        sheets_client.update_submission_rows({3: {"score": 10}})
+
+        mock_worksheet.batch_update.assert_called_once()
+        scores = {s.student_id: s.score for s in sheets_client.get_all_quiz_submissions("q001")}
+        assert scores == {"stu_000": 8, "stu_001": 10}
+
+    def test_update_submission_rows_refuses_moved_rows(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """A regrade batch isn't written when its rows now hold other submissions."""
+        from app.services.sheets import StaleRowsError
+
+        rows = self.rows(2)
+        mock_worksheet.get_all_values.return_value = submission_values(rows)
+        mock_worksheet.row_values.return_value = SUBMISSION_HEADERS
+        read = dict(sheets_client.get_submission_rows("q001"))
+
+        # Row 2 was deleted in the sheet, so stu_001 moved up into it
+        mock_worksheet.get_all_values.return_value = submission_values(rows[1:])
+
+        with pytest.raises(StaleRowsError):
+            sheets_client.update_submission_rows({2: {"score": 1}}, expected={2: read[2]})
+        mock_worksheet.batch_update.assert_not_called()
+
+        assert sheets_client.update_submission_rows({2: {"score": 1}}, expected={2: read[3]}) == 1
+
+    def test_changed_anchor_triggers_full_reload(self, sheets_client, mock_worksheet, empty_outbox):
+        """If the last ingested row no longer matches, the whole tab is reloaded."""
+        rows = self.rows(3)
+        edited = {**rows[1], "score": 0}
+        mock_worksheet.get_all_values.side_effect = [
+            submission_values(rows[:2]),
+            submission_values([edited, rows[2]])[1:],
+            submission_values([rows[0], edited, rows[2]]),
+        ]
+
+        sheets_client.get_all_quiz_submissions("q001")
+        sheets_client.sync_replica(["Quiz_Submissions"])
+        submissions = sheets_client.get_all_quiz_submissions("q001")
+
+        assert [s.score for s in submissions] == [8, 0, 8]
+        assert mock_worksheet.get_all_values.call_count == 3
+        assert mock_worksheet.get_all_values.call_args_list[2].args == ()
+
+    def test_deleted_rows_trigger_full_reload(self, sheets_client, mock_worksheet, empty_outbox):
+        """A tab that shrank below the anchor row is reloaded from scratch."""
+        rows = self.rows(2)
+        mock_worksheet.get_all_values.side_effect = [
+            submission_values(rows),
+            [],
+            submission_values(rows[:1]),
+        ]
+
+        sheets_client.get_all_quiz_submissions("q001")
+        sheets_client.sync_replica(["Quiz_Submissions"])
+
+        assert len(sheets_client.get_all_quiz_submissions("q001")) == 1
+
+    def test_sync_failure_serves_last_synced_data(
+        self, sheets_client, mock_worksheet, empty_outbox
+    ):
+        """A failed sync keeps serving the replicated submissions."""
+        mock_worksheet.get_all_values.side_effect = [
+            submission_values(self.rows(2)),
+            Exception("503 backend error"),
+        ]
+
+        sheets_client.get_all_quiz_submissions("q001")
+        assert sheets_client.sync_replica(["Quiz_Submissions"]) == []
+        invalidate_all()
+
+        assert len(sheets_client.get_all_quiz_submissions("q001")) == 2
+
+
+class TestReadReplica:
+    """Tests for serving reads from the local read replica."""
+
+    ROSTER = [
+        {"student_id": "stu_001", "full_name": "Smith, Alice", "hobbies": ""},
+        {"student_id": "stu_002", "full_name": "Jones, Bob", "hobbies": ""},
+    ]
+
+    def test_reads_survive_sheets_outage(self, sheets_client, mock_worksheet):
+        """Once replicated, reads keep working when Sheets fails."""
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        sheets_client.sync_replica(["Roster"])
+
+        mock_worksheet.get_all_records.side_effect = Exception("503 backend error")
+        assert sheets_client.sync_replica(["Roster"]) == []
+        invalidate_all()
+
+        assert sheets_client.get_roster_by_id("stu_002").full_name == "Jones, Bob"
+
+    def test_reads_do_not_call_sheets(self, sheets_client, mock_worksheet):
+        """Reads after a sync are served without Sheets API calls."""
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        sheets_client.sync_replica(["Roster"])
+        mock_worksheet.get_all_records.reset_mock()
+        invalidate_all()
+
+        assert sheets_client.get_roster_count() == 2
+        mock_worksheet.get_all_records.assert_not_called()
+
+    def test_sync_invalidates_changed_tabs_only(self, sheets_client, mock_worksheet):
+        """A sync that finds changes makes the next read see them."""
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        assert sheets_client.sync_replica(["Roster"]) == ["Roster"]
+        assert sheets_client.get_roster_count() == 2
+
+        # Unchanged content is not reported as a change
+        assert sheets_client.sync_replica(["Roster"]) == []
+
+        mock_worksheet.get_all_records.return_value = self.ROSTER[:1]
+        assert sheets_client.sync_replica(["Roster"]) == ["Roster"]
+        assert sheets_client.get_roster_count() == 1
+
+    def test_write_patches_replica(self, sheets_client, mock_worksheet):
+        """A roster write is visible in replica reads without a resync."""
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies"]
+        mock_worksheet.col_values.return_value = ["student_id", "stu_001", "stu_002"]
+        sheets_client.sync_replica(["Roster"])
+
+        assert sheets_client.update_roster("stu_002", hobbies="chess") is True
+
+        assert sheets_client.get_roster_by_id("stu_002").hobbies == "chess"
+        assert mock_worksheet.get_all_records.call_count == 1
+
+    def test_own_write_does_not_stale_claims(self, sheets_client, mock_worksheet):
+        """A login's roster write is not a sheet-side change and leaves sessions current."""
+        from app.services.sessions import ROLE_STUDENT, create_session_token, verify_session_token
+
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        mock_worksheet.row_values.return_value = ["student_id", "full_name", "hobbies"]
+        sheets_client.sync_replica(["Roster"])
+        token = create_session_token("bob@example.com", "stu_002", role=ROLE_STUDENT)
+
+        sheets_client.update_roster("stu_001", hobbies="chess")
+        mock_worksheet.get_all_records.return_value = [
+            {**self.ROSTER[0], "hobbies": "chess"},
+            self.ROSTER[1],
+        ]
+
+        assert sheets_client.sync_replica(["Roster"]) == []
+        assert verify_session_token(token).claims_current
+
+    def test_sheet_onboarding_edit_stales_that_student_only(self, sheets_client, mock_worksheet):
+        """Only the student whose onboarding changed in the sheet is re-issued."""
+        from app.services.sessions import ROLE_STUDENT, create_session_token, verify_session_token
+
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+        sheets_client.sync_replica(["Roster"])
+        alice = create_session_token("alice@example.com", "stu_001", role=ROLE_STUDENT)
+        bob = create_session_token("bob@example.com", "stu_002", role=ROLE_STUDENT)
+
+        mock_worksheet.get_all_records.return_value = [
+            self.ROSTER[0],
+            {**self.ROSTER[1], "onboarding_completed_at": "2025-01-01T10:00:00"},
+        ]
+        assert sheets_client.sync_replica(["Roster"]) == ["Roster"]
+
+        assert verify_session_token(alice).claims_current
+        assert not verify_session_token(bob).claims_current
+
+    def test_admin_email_change_stales_every_session(self, sheets_client, mock_worksheet):
+        """A new admin_email re-issues every session; other Config edits do not."""
+        from app.services.sessions import ROLE_STUDENT, create_session_token, verify_session_token
+
+        config = [{"key": "admin_email", "value": "a@example.com"}, {"key": "term", "value": "1"}]
+        mock_worksheet.get_all_records.return_value = config
+        sheets_client.sync_replica(["Config"])
+        token = create_session_token("alice@example.com", "stu_001", role=ROLE_STUDENT)
+
+        mock_worksheet.get_all_records.return_value = [config[0], {"key": "term", "value": "2"}]
+        assert sheets_client.sync_replica(["Config"]) == ["Config"]
+        assert verify_session_token(token).claims_current
+
+        mock_worksheet.get_all_records.return_value = [
+            {"key": "admin_email", "value": "b@example.com"}
+        ]
+        sheets_client.sync_replica(["Config"])
+        assert not verify_session_token(token).claims_current
+
+    def test_roster_refresh_bulk_loads_student_cache(self, sheets_client, mock_worksheet):
+        """Each roster load stores every student in the local cache in one call."""
+        mock_worksheet.get_all_records.return_value = self.ROSTER
+
+        with patch("app.services.sheets.set_cached_students") as mock_store:
+            assert sheets_client.warm_student_cache() == 2
+
+        mock_store.assert_called_once()
+        assert [s.student_id for s in mock_store.call_args.args[0]] == ["stu_001", "stu_002"]
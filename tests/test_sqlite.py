@@ -1,9 +1,28 @@
+import gc
 import os
+import sqlite3
 import tempfile
+import threading
+from dataclasses import fields
+from datetime import datetime
 
 import pytest
 
-from app.db.sqlite import check_db_health, get_db, init_db
+from app.db.sqlite import (
+    STUDENT_CACHE_FIELDS,
+    _all_connections,
+    _student_l1,
+    check_db_health,
+    close_all_connections,
+    get_cached_student,
+    get_db,
+    init_db,
+    invalidate_cached_student,
+    optimize_db,
+    set_cached_student,
+    set_cached_students,
+)
+from app.models.roster import RosterEntry
 
 
 @pytest.fixture
@@ -18,8 +37,10 @@ def temp_db(monkeypatch):
     yield temp_path
 
     # Cleanup
-    if os.path.exists(temp_path):
-        os.unlink(temp_path)
+    close_all_connections()
+    for path in (temp_path, f"{temp_path}-wal", f"{temp_path}-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
 
 
 def test_init_db_creates_tables(temp_db):
@@ -145,3 +166,259 @@ def test_magic_tokens_status_constraint(temp_db):
                     "invalid_status",
                 ),
             )
+
+
+def test_connection_pragmas(temp_db):
+    """Pooled connections use WAL with NORMAL sync, mmap and a larger page cache."""
+    with get_db() as db:
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert db.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        assert db.execute("PRAGMA cache_size").fetchone()[0] < 0  # sized in KiB
+
+
+def test_optimize_db_releases_free_pages(temp_db):
+    """Incremental auto-vacuum lets optimize_db() return deleted pages."""
+    init_db()
+    with get_db() as db:
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+        db.executemany(
+            "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)",
+            [(f"k{i}" * 50, "2025-01-01T00:00:00") for i in range(2000)],
+        )
+    with get_db() as db:
+        db.execute("DELETE FROM rate_limits")
+
+    assert optimize_db()["freed_pages"] > 0
+    with get_db() as db:
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_connection_reused_per_thread(temp_db):
+    """A thread reuses its connection; other threads get their own."""
+    with get_db() as db:
+        first = db
+    with get_db() as db:
+        assert db is first
+
+    other = []
+
+    def worker():
+        with get_db() as db:
+            other.append(db)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert other[0] is not first
+
+
+def test_nested_get_db_commits_once(temp_db):
+    """An error in the outer block rolls back writes made in a nested block."""
+    init_db()
+
+    with pytest.raises(RuntimeError):
+        with get_db() as outer:
+            with get_db() as inner:
+                assert inner is outer
+                inner.execute(
+                    "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, ?)",
+                    ("nested", "2025-01-01T00:00:00", 1),
+                )
+            raise RuntimeError("fail after nested block")
+
+    with get_db() as db:
+        assert db.execute("SELECT * FROM rate_limits WHERE key = 'nested'").fetchone() is None
+
+
+def test_caught_nested_error_rolls_back_nested_writes(temp_db):
+    """A nested block that raises is undone even when the outer block catches and commits."""
+    init_db()
+
+    with get_db() as outer:
+        outer.execute(
+            "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, ?)",
+            ("outer", "2025-01-01T00:00:00", 1),
+        )
+        try:
+            with get_db() as inner:
+                inner.execute(
+                    "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, ?)",
+                    ("inner", "2025-01-01T00:00:00", 1),
+                )
+                raise RuntimeError("fail inside nested block")
+        except RuntimeError:
+            pass
+
+    with get_db() as db:
+        keys = [row["key"] for row in db.execute("SELECT key FROM rate_limits")]
+    assert keys == ["outer"]
+
+
+def test_thread_connections_closed_when_thread_exits(temp_db):
+    """Connections opened by short-lived threads do not outlive them."""
+    init_db()
+    opened = []
+
+    def worker():
+        with get_db() as db:
+            opened.append(db)
+
+    for _ in range(20):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert len(_all_connections) <= 1  # this thread's own
+
+
+def test_close_all_connections_reopens(temp_db):
+    """After closing the pool, the next get_db opens a fresh connection."""
+    init_db()
+    with get_db() as db:
+        first = db
+
+    close_all_connections()
+
+    with get_db() as db:
+        assert db is not first
+        assert db.execute("SELECT 1").fetchone()[0] == 1
+
+
+class TestStudentCache:
+    """Tests for the two-level student cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_db):
+        init_db()
+        _student_l1.clear()
+        yield
+        _student_l1.clear()
+
+    def make_student(self, **fields) -> RosterEntry:
+        return RosterEntry.from_row(
+            {"student_id": "stu_001", "full_name": "Smith, Alice", **fields}
+        )
+
+    def test_l1_serves_without_sqlite(self):
+        """A cached student is served from memory as the same object."""
+        student = self.make_student()
+        set_cached_student(student)
+
+        with get_db() as db:
+            db.execute("DELETE FROM student_cache")
+
+        assert get_cached_student("stu_001") is student
+
+    def test_l2_refills_l1_after_restart(self):
+        """With an empty L1, the SQLite row is parsed once and then kept in memory."""
+        set_cached_student(self.make_student(preferred_name="Ali"))
+        _student_l1.clear()
+
+        first = get_cached_student("stu_001")
+        assert first.preferred_name == "Ali"
+        assert get_cached_student("stu_001") is first
+
+    def test_l1_respects_max_age(self):
+        """An L1 entry older than max_age_seconds is not served."""
+        set_cached_student(self.make_student())
+
+        assert get_cached_student("stu_001", max_age_seconds=-1) is None
+
+    def test_invalidate_clears_both_levels(self):
+        """invalidate_cached_student drops the L1 copy and keeps only a stale L2 row."""
+        set_cached_student(self.make_student())
+
+        invalidate_cached_student("stu_001")
+
+        assert "stu_001" not in _student_l1
+        assert get_cached_student("stu_001") is None
+        # Still there as the fallback while Sheets is unavailable
+        assert get_cached_student("stu_001", max_age_seconds=86400).full_name == "Smith, Alice"
+
+    def test_bulk_load_whole_roster(self):
+        """set_cached_students stores every student in one call."""
+        students = [
+            self.make_student(student_id=f"stu_{i:03d}", full_name=f"Student {i}") for i in range(5)
+        ]
+
+        assert set_cached_students(students) == 5
+        _student_l1.clear()
+
+        with get_db() as db:
+            assert db.execute("SELECT COUNT(*) FROM student_cache").fetchone()[0] == 5
+        assert get_cached_student("stu_003").full_name == "Student 3"
+
+    def test_unchanged_rows_stay_fresh_for_stale_fallback(self):
+        """After a restart, a student whose row never changes is still served stale."""
+        student = self.make_student()
+        set_cached_students([student])
+        with get_db() as db:
+            db.execute("UPDATE student_cache SET cached_at = '2000-01-01T00:00:00'")
+
+        # A roster load finds the row unchanged; then the process restarts
+        assert set_cached_students([self.make_student()]) == 0
+        _student_l1.clear()
+
+        assert get_cached_student("stu_001", max_age_seconds=86400).full_name == "Smith, Alice"
+
+    def test_typed_columns_round_trip(self):
+        """Fields are stored in typed columns and read back without JSON."""
+        set_cached_student(
+            self.make_student(
+                claimed_at="2025-01-01T10:00:00",
+                presentation_order="3",
+                hobbies="chess",
+            )
+        )
+        _student_l1.clear()
+
+        with get_db() as db:
+            row = db.execute("SELECT * FROM student_cache").fetchone()
+        assert row["hobbies"] == "chess"
+        assert row["presentation_order"] == 3
+        assert "profile_json" not in row.keys()
+
+        student = get_cached_student("stu_001")
+        assert student.claimed_at == datetime(2025, 1, 1, 10, 0)
+        assert student.presentation_order == 3
+
+    def test_columns_match_roster_entry(self):
+        """Every RosterEntry field has a student_cache column."""
+        with get_db() as db:
+            columns = [row["name"] for row in db.execute("PRAGMA table_info(student_cache)")]
+        assert columns == [f.name for f in fields(RosterEntry)] + ["cached_at"]
+        assert STUDENT_CACHE_FIELDS == tuple(columns[:-1])
+
+    def test_bulk_load_writes_only_changed_rows(self):
+        """Reloading the roster rewrites only students whose fields changed."""
+        students = [
+            self.make_student(student_id=f"stu_{i:03d}", full_name=f"Student {i}") for i in range(3)
+        ]
+        set_cached_students(students)
+
+        students[1] = self.make_student(student_id="stu_001", full_name="Renamed")
+
+        assert set_cached_students(students) == 1
+        _student_l1.clear()
+        assert get_cached_student("stu_001").full_name == "Renamed"
+
+    def test_old_json_table_is_replaced(self):
+        """init_db drops a student_cache table still in the old JSON layout."""
+        with get_db() as db:
+            db.execute("DROP TABLE student_cache")
+            db.execute(
+                "CREATE TABLE student_cache "
+                "(student_id TEXT PRIMARY KEY, profile_json TEXT, cached_at TEXT)"
+            )
+
+        init_db()
+
+        set_cached_student(self.make_student())
+        _student_l1.clear()
+        assert get_cached_student("stu_001").full_name == "Smith, Alice"
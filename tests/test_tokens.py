@@ -1,14 +1,17 @@
 """Tests for magic token service."""
 
+import threading
 import uuid
+from datetime import datetime, timedelta
 
 import pytest
 
-from app.db.sqlite import init_db
+from app.db.sqlite import get_db, init_db
 from app.services.tokens import (
     check_rate_limit,
     cleanup_expired_tokens,
     create_magic_token,
+    prune_rate_limits,
     validate_magic_token,
 )
 
@@ -63,6 +66,37 @@ class TestMagicTokens:
         email = validate_magic_token(token)
         assert email == "test@example.com"
 
+    def test_concurrent_validation_consumes_once(self):
+        """Only one of several concurrent verifies of a link succeeds."""
+        token = create_magic_token("race@example.com")
+        barrier = threading.Barrier(8)
+        results = []
+
+        def verify():
+            barrier.wait()
+            results.append(validate_magic_token(token))
+
+        threads = [threading.Thread(target=verify) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count("race@example.com") == 1
+        assert results.count(None) == 7
+
+    def test_expired_token_marked_expired(self):
+        """Validating an expired token records it as expired."""
+        token = create_magic_token("stale@example.com", ttl_minutes=-1)
+
+        assert validate_magic_token(token) is None
+
+        with get_db() as db:
+            row = db.execute(
+                "SELECT status FROM magic_tokens WHERE email = ?", ("stale@example.com",)
+            ).fetchone()
+        assert row["status"] == "expired"
+
 
 class TestRateLimiting:
     """Tests for rate limiting."""
@@ -99,6 +133,33 @@ class TestRateLimiting:
         assert allowed is False
         assert count == 3
 
+    def test_rejections_do_not_grow_count(self):
+        """Repeated rejected requests keep reporting the limit."""
+        email = f"spam-{uuid.uuid4()}@example.com"
+        for _ in range(10):
+            allowed, count = check_rate_limit(email)
+
+        assert allowed is False
+        assert count == 3
+        with get_db() as db:
+            row = db.execute(
+                "SELECT count FROM rate_limits WHERE key = ?", (f"magic:{email}",)
+            ).fetchone()
+        assert row["count"] == 4
+
+    def test_ended_window_resets(self):
+        """A request after the window has ended starts a new window."""
+        email = f"reset-{uuid.uuid4()}@example.com"
+        for _ in range(4):
+            check_rate_limit(email)
+        old = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        with get_db() as db:
+            db.execute(
+                "UPDATE rate_limits SET window_start = ? WHERE key = ?", (old, f"magic:{email}")
+            )
+
+        assert check_rate_limit(email) == (True, 1)
+
 
 class TestCleanup:
     """Tests for token cleanup."""
@@ -113,3 +174,20 @@ class TestCleanup:
 
         # At least one token should have been cleaned up
         assert cleaned >= 1
+
+    def test_prune_rate_limits_drops_ended_windows(self):
+        """Only rate limit records whose window has ended are deleted."""
+        old = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        with get_db() as db:
+            db.execute(
+                "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)",
+                ("magic:old@example.com", old),
+            )
+        check_rate_limit("fresh@example.com")
+
+        assert prune_rate_limits() >= 1
+
+        with get_db() as db:
+            keys = {row["key"] for row in db.execute("SELECT key FROM rate_limits")}
+        assert "magic:old@example.com" not in keys
+        assert "magic:fresh@example.com" in keys
@@ -40,7 +40,7 @@ class TestToolsRoutes:
     def test_tools_landing_page(self, mock_sheets, mock_tools, client):
         """Tools landing page loads with tool list."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = [
             {"id": "nmap", "name": "Nmap", "description": "Network scanner"},
@@ -61,7 +61,7 @@ class TestToolsRoutes:
     def test_tools_landing_empty(self, mock_sheets, mock_tools, client):
         """Tools landing page handles empty tool list."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = []
 
@@ -83,7 +83,7 @@ class TestToolsRoutes:
     def test_tool_page_loads(self, mock_sheets, mock_dir, mock_tools, client):
         """Individual tool page loads successfully."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = [
             {"id": "nmap", "name": "Nmap", "description": "Network scanner"},
@@ -115,7 +115,7 @@ Nmap is great.
     def test_tool_page_not_found(self, mock_sheets, mock_tools, client):
         """Tool page returns 404 for unknown tool."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = []
 
@@ -133,7 +133,7 @@ Nmap is great.
     def test_tool_page_with_command_builder(self, mock_sheets, mock_tools, client):
         """Tool page renders command builder."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = [{"id": "nmap", "name": "Nmap", "description": "Scanner"}]
 
@@ -170,7 +170,7 @@ Test tool.
     def test_tool_page_with_scenarios(self, mock_sheets, mock_tools, client):
         """Tool page renders scenarios."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = [{"id": "nmap", "name": "Nmap", "description": "Scanner"}]
 
@@ -202,7 +202,7 @@ Test tool.
     def test_tool_page_with_quiz(self, mock_sheets, mock_tools, client):
         """Tool page renders inline quizzes."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = [{"id": "nmap", "name": "Nmap", "description": "Scanner"}]
 
@@ -238,7 +238,7 @@ class TestToolsNavigation:
     def test_tools_link_visible(self, mock_sheets, mock_tools, client):
         """Tools link appears in navigation."""
         mock_sheets.return_value.get_roster_by_id.return_value = make_roster_entry()
-        mock_sheets.return_value.get_config.return_value = None
+        mock_sheets.return_value.get_admin_emails.return_value = set()
 
         mock_tools.return_value = []
 